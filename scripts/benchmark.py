@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark
+
+Generates a synthetic data set (repos, issues, labels, assignees, comments) at
+a configurable scale, starts the real server against it, drives it with
+concurrent clients across a weighted mix of endpoints, and reports throughput
+plus p50/p95/p99 latency per endpoint as JSON.
+
+The JSON report can be compared against a previous run with --compare to
+catch regressions.
+
+Usage:
+    uv run python scripts/benchmark.py --issues 10000 --duration 30
+    uv run python scripts/benchmark.py --data-dir /tmp/bench --issues 100000   # reuse on later runs
+    uv run python scripts/benchmark.py --output new.json --compare old.json --max-regression 20
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+import http.client
+import json
+import os
+from pathlib import Path
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import IO
+from urllib.error import URLError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+# -- Config -----------------------------------------------------------------
+
+BENCH_PORT = 10104
+STARTUP_TIMEOUT = 60  # seconds; large data sets may take a while to open
+BASE_URL = f"http://127.0.0.1:{BENCH_PORT}"
+
+WORDS = [
+    "crash", "timeout", "login", "cache", "memory", "deploy", "flaky", "regression", "docs", "typo", "build",
+    "latency", "search", "index", "api", "error", "retry", "token", "upgrade", "config", "migration",
+]  # fmt: skip
+LABELS = ["bug", "enhancement", "docs", "p0", "p1", "p2", "backend", "frontend", "infra", "good first issue"]
+USERS = [f"user{i}" for i in range(50)]
+
+
+# -- Data set generation ------------------------------------------------------
+
+
+@dataclass
+class Dataset:
+    owners: int
+    repos_per_owner: int
+    issues: int
+    comments_per_issue: float
+    seed: int
+
+    def repos(self) -> list[tuple[str, str]]:
+        return [(f"org{o}", f"repo{r}") for o in range(self.owners) for r in range(self.repos_per_owner)]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def generate(data_dir: Path, dataset: Dataset) -> None:
+    """Populate *data_dir* through IssueStore so the on-disk format is authoritative."""
+    from storage_provider import create_storage
+
+    from gh_issues_local.storage import IssueStore
+
+    write_storage_config(data_dir)
+    store = IssueStore(create_storage(config_dir=data_dir), query_cache_size=0)
+    rng = random.Random(dataset.seed)
+    repos = dataset.repos()
+    base_url = "http://127.0.0.1"
+    started = time.time()
+
+    for i in range(dataset.issues):
+        owner, repo = repos[i % len(repos)]
+        issue, _ = store.create(
+            owner=owner,
+            repo=repo,
+            title=_sentence(rng, rng.randint(3, 8)),
+            body=_sentence(rng, rng.randint(10, 80)),
+            labels=rng.sample(LABELS, rng.randint(0, 3)),
+            assignee=None,
+            assignees=rng.sample(USERS, rng.randint(0, 2)),
+            base_url=base_url,
+        )
+        if rng.random() < 0.3:
+            store.update(owner, repo, issue["number"], {"state": "closed"}, base_url)
+        # Poisson-ish comment counts around the requested mean.
+        for _ in range(int(rng.expovariate(1 / dataset.comments_per_issue)) if dataset.comments_per_issue else 0):
+            store.create_comment(owner, repo, issue["number"], _sentence(rng, rng.randint(5, 30)), base_url)
+        if (i + 1) % 10_000 == 0:
+            print(f"  generated {i + 1}/{dataset.issues} issues ({time.time() - started:.0f}s)", file=sys.stderr)
+
+    (data_dir / "bench_dataset.json").write_text(json.dumps(vars(dataset)))
+
+
+# -- Server lifecycle -------------------------------------------------------
+
+
+def write_storage_config(data_dir: Path) -> None:
+    """Write .storage.yaml + .local_storage.yaml so create_storage() works."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / ".storage.yaml").write_text("provider: local\n")
+    (data_dir / ".local_storage.yaml").write_text("root_path: ./storage\n")
+
+
+def start_server(data_dir: Path, log: IO[bytes]) -> subprocess.Popen:
+    """Start the server; its stderr goes to *log* so a chatty server can't fill a pipe and stall."""
+    env = os.environ.copy()
+    env["GH_ISSUES_LOCAL_DATA_DIR"] = str(data_dir)
+    script = (
+        "import uvicorn; "
+        "from gh_issues_local.app import create_app; "
+        f'uvicorn.run(create_app(), host="127.0.0.1", port={BENCH_PORT}, log_level="warning")'
+    )
+    return subprocess.Popen([sys.executable, "-c", script], env=env, stderr=log)
+
+
+def wait_ready(timeout: int = STARTUP_TIMEOUT) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urlopen(f"{BASE_URL}/api/health") as resp:
+                if resp.status == 200:
+                    return True
+        except (URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# -- Workload -----------------------------------------------------------------
+
+
+@dataclass
+class Endpoint:
+    name: str
+    weight: float
+    request: Callable[[random.Random], tuple[str, str, dict | None]]
+
+
+def endpoint_mix(dataset: Dataset, write_fraction: float) -> list[Endpoint]:
+    """Weighted request mix.  Each request() returns (method, path, body)."""
+    repos = dataset.repos()
+    issues_per_repo = max(1, dataset.issues // len(repos))
+
+    def repo(rng: random.Random) -> str:
+        owner, name = rng.choice(repos)
+        return f"/repos/{owner}/{name}"
+
+    def number(rng: random.Random) -> int:
+        return rng.randint(1, issues_per_repo)
+
+    mix = [
+        Endpoint("get_issue", 30, lambda rng: ("GET", f"{repo(rng)}/issues/{number(rng)}", None)),
+        Endpoint("list_issue_comments", 10, lambda rng: ("GET", f"{repo(rng)}/issues/{number(rng)}/comments", None)),
+        Endpoint(
+            "list_repo_issues",
+            15,
+            lambda rng: (
+                "GET",
+                f"{repo(rng)}/issues?state={rng.choice(['open', 'all'])}&page={rng.randint(1, 3)}",
+                None,
+            ),
+        ),
+        Endpoint(
+            "list_repo_issues_labels",
+            5,
+            lambda rng: ("GET", f"{repo(rng)}/issues?labels={quote(rng.choice(LABELS))}", None),
+        ),
+        Endpoint("list_repo_comments", 5, lambda rng: ("GET", f"{repo(rng)}/issues/comments?sort=updated", None)),
+        Endpoint("list_all", 5, lambda rng: ("GET", f"/issues?sort={rng.choice(['created', 'updated'])}", None)),
+        Endpoint("list_org", 5, lambda rng: ("GET", f"/orgs/org{rng.randrange(dataset.owners)}/issues", None)),
+        Endpoint("search", 5, lambda rng: ("GET", f"/search/issues?q={rng.choice(WORDS)}", None)),
+    ]
+    if write_fraction > 0:
+        reads = sum(e.weight for e in mix)
+        weight = reads * write_fraction / (1 - write_fraction)
+        mix += [
+            Endpoint(
+                "create_comment",
+                weight / 2,
+                lambda rng: ("POST", f"{repo(rng)}/issues/{number(rng)}/comments", {"body": _sentence(rng, 10)}),
+            ),
+            Endpoint(
+                "update_issue",
+                weight / 2,
+                lambda rng: ("PATCH", f"{repo(rng)}/issues/{number(rng)}", {"title": _sentence(rng, 5)}),
+            ),
+        ]
+    return mix
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and status collection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name: str, seconds: float, status: int) -> None:
+        with self._lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+
+def client_loop(mix: list[Endpoint], recorder: Recorder, stop_at: float, seed: int) -> None:
+    """One keep-alive client issuing weighted random requests until *stop_at*."""
+    rng = random.Random(seed)
+    weights = [e.weight for e in mix]
+    conn = http.client.HTTPConnection("127.0.0.1", BENCH_PORT, timeout=60)
+    while time.time() < stop_at:
+        endpoint = rng.choices(mix, weights)[0]
+        method, path, body = endpoint.request(rng)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", BENCH_PORT, timeout=60)
+        recorder.record(endpoint.name, time.perf_counter() - started, status)
+    conn.close()
+
+
+# -- Reporting ------------------------------------------------------------------
+
+
+def summarize(latencies: list[float], statuses: dict[int, int], duration: float) -> dict:
+    ordered = sorted(latencies)
+    if len(ordered) >= 2:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else 0.0
+    ok = sum(n for status, n in statuses.items() if 200 <= status < 300)
+    return {
+        "count": len(ordered),
+        "errors": len(ordered) - ok,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": round(len(ordered) / duration, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float | None) -> bool:
+    """Print p95 deltas against *baseline*.  Returns False on a regression over the limit."""
+    ok = True
+    print("\nendpoint                      base p95    new p95     delta", file=sys.stderr)
+    for name, new in report["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if not old or not old["p95_ms"]:
+            continue
+        delta = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        flag = ""
+        if max_regression is not None and delta > max_regression:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{name:<28}{old['p95_ms']:>10.2f}{new['p95_ms']:>11.2f}{delta:>+9.1f}%{flag}", file=sys.stderr)
+    return ok
+
+
+# -- Main -------------------------------------------------------------------
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, help="Data directory to generate into (or reuse if already generated)")
+    parser.add_argument("--owners", type=int, default=2)
+    parser.add_argument("--repos-per-owner", type=int, default=5)
+    parser.add_argument("--issues", type=int, default=10_000, help="Total issues across all repos")
+    parser.add_argument("--comments-per-issue", type=float, default=2.0, help="Mean comments per issue")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per run")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of unrecorded load before measuring")
+    parser.add_argument("--write-fraction", type=float, default=0.05, help="Share of requests that are writes")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", type=Path, help="Previous JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, help="Fail if any p95 regresses by more than this percent")
+    args = parser.parse_args()
+
+    dataset = Dataset(args.owners, args.repos_per_owner, args.issues, args.comments_per_issue, args.seed)
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="gh-issues-bench-"))
+    marker = data_dir / "bench_dataset.json"
+    if marker.is_file() and json.loads(marker.read_text()) == vars(dataset):
+        print(f"Reusing data set in {data_dir}", file=sys.stderr)
+    else:
+        print(f"Generating {dataset.issues} issues into {data_dir} ...", file=sys.stderr)
+        generate(data_dir, dataset)
+
+    with tempfile.TemporaryFile() as server_log:
+        proc = start_server(data_dir, server_log)
+        try:
+            if not wait_ready():
+                print("FATAL: server did not become ready", file=sys.stderr)
+                server_log.seek(0)
+                print(server_log.read().decode(errors="replace")[-2000:], file=sys.stderr)
+                return 1
+
+            mix = endpoint_mix(dataset, args.write_fraction)
+            results = Recorder()
+            for phase, seconds in (("warmup", args.warmup), ("measure", args.duration)):
+                if seconds <= 0:
+                    continue
+                print(f"{phase}: {args.concurrency} clients for {seconds:.0f}s ...", file=sys.stderr)
+                recorder = Recorder()
+                stop_at = time.time() + seconds
+                threads = [
+                    threading.Thread(target=client_loop, args=(mix, recorder, stop_at, args.seed * 1000 + i))
+                    for i in range(args.concurrency)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                results = recorder
+        finally:
+            stop_server(proc)
+
+    all_latencies = [s for values in results.latencies.values() for s in values]
+    all_statuses: dict[int, int] = defaultdict(int)
+    for statuses in results.statuses.values():
+        for status, n in statuses.items():
+            all_statuses[status] += n
+    report = {
+        "dataset": vars(dataset),
+        "load": {"concurrency": args.concurrency, "duration_s": args.duration, "write_fraction": args.write_fraction},
+        "total": summarize(all_latencies, all_statuses, args.duration),
+        "endpoints": {
+            name: summarize(results.latencies[name], results.statuses[name], args.duration)
+            for name in sorted(results.latencies)
+        },
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        return 0 if compare(report, json.loads(args.compare.read_text()), args.max_regression) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -233,6 +233,20 @@ def no_auth_checks(base: str) -> list[Check]:
             base=base,
             expect_json={"status": "ok"},
         ),
+        Check(
+            "ready",
+            "GET",
+            "/api/ready",
+            base=base,
+            expect_json_contains={"status": "ready", "phase": "ready"},
+        ),
+        Check(
+            "index_memory",
+            "GET",
+            "/api/index",
+            base=base,
+            expect_body_contains="total_bytes",
+        ),
         Check(
             "auth_status_reports_false",
             "GET",
@@ -313,6 +327,32 @@ def no_auth_checks(base: str) -> list[Check]:
             body={"title": "Updated title"},
             expect_json_contains={"number": 1, "title": "Updated title"},
         ),
+        Check(
+            # The optimistic-lock version travels in the ETag, not the body.
+            "issue_body_has_no_version",
+            "GET",
+            "/repos/test-owner/test-repo/issues/1",
+            base=base,
+            expect_json_contains={"number": 1, "version": "<MISSING>"},
+        ),
+        Check(
+            "update_with_stale_if_match_returns_412",
+            "PATCH",
+            "/repos/test-owner/test-repo/issues/1",
+            base=base,
+            body={"title": "Lost update"},
+            headers={"If-Match": '"1"'},
+            expect_status=412,
+            expect_body_contains="Precondition Failed",
+        ),
+        Check(
+            "list_repo_issues_open_before_close",
+            "GET",
+            "/repos/test-owner/test-repo/issues",
+            base=base,
+            # Cached here; closing #1 below must invalidate it.
+            expect_json_list_length=2,
+        ),
         Check(
             "close_issue",
             "PATCH",
@@ -384,6 +424,157 @@ def no_auth_checks(base: str) -> list[Check]:
             base=base,
             expect_json_contains={"total_count": 0},
         ),
+        # -- Issues API: List filters ----------------------------------------
+        Check(
+            "create_filters_issue_assigned",
+            "POST",
+            "/repos/test-owner/filters/issues",
+            base=base,
+            body={"title": "Assigned bug", "body": "ping @hubot", "assignee": "octocat", "labels": ["bug"]},
+            expect_status=201,
+        ),
+        Check(
+            "create_filters_issue_unassigned",
+            "POST",
+            "/repos/test-owner/filters/issues",
+            base=base,
+            body={"title": "Unassigned"},
+            expect_status=201,
+        ),
+        Check(
+            "filter_assignee",
+            "GET",
+            "/repos/test-owner/filters/issues?assignee=octocat",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "filter_assignee_none",
+            "GET",
+            "/repos/test-owner/filters/issues?assignee=none",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "filter_assignee_any",
+            "GET",
+            "/repos/test-owner/filters/issues?assignee=*",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "filter_creator",
+            "GET",
+            "/repos/test-owner/filters/issues?creator=local-user",
+            base=base,
+            expect_json_list_length=2,
+        ),
+        Check(
+            "filter_creator_unknown",
+            "GET",
+            "/repos/test-owner/filters/issues?creator=someone-else",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "filter_mentioned",
+            "GET",
+            "/repos/test-owner/filters/issues?mentioned=hubot",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "filter_milestone_none",
+            "GET",
+            "/repos/test-owner/filters/issues?milestone=none",
+            base=base,
+            expect_json_list_length=2,
+        ),
+        Check(
+            "filter_milestone_any",
+            "GET",
+            "/repos/test-owner/filters/issues?milestone=*",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "filter_since_past",
+            "GET",
+            "/repos/test-owner/filters/issues?state=all&since=2000-01-01T00:00:00Z",
+            base=base,
+            expect_json_list_length=2,
+        ),
+        Check(
+            "filter_since_future",
+            "GET",
+            "/repos/test-owner/filters/issues?state=all&since=2999-01-01T00:00:00Z",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "search_qualifier_label",
+            "GET",
+            "/search/issues?q=is:open+label:bug+repo:test-owner/filters",
+            base=base,
+            expect_json_contains={"total_count": 1},
+        ),
+        Check(
+            "search_qualifier_assignee_with_text",
+            "GET",
+            "/search/issues?q=assignee:octocat+Assigned",
+            base=base,
+            expect_json_contains={"total_count": 1},
+        ),
+        Check(
+            "search_qualifier_no_assignee",
+            "GET",
+            "/search/issues?q=no:assignee+repo:test-owner/filters",
+            base=base,
+            expect_json_contains={"total_count": 1},
+        ),
+        Check(
+            "search_qualifier_author",
+            "GET",
+            "/search/issues?q=author:local-user+repo:test-owner/filters",
+            base=base,
+            expect_json_contains={"total_count": 2},
+        ),
+        Check(
+            "filters_list_open_before_close",
+            "GET",
+            "/repos/test-owner/filters/issues",
+            base=base,
+            expect_json_list_length=2,
+        ),
+        Check(
+            "filters_close_issue",
+            "PATCH",
+            "/repos/test-owner/filters/issues/1",
+            base=base,
+            body={"state": "closed"},
+            expect_json_contains={"number": 1, "state": "closed"},
+        ),
+        Check(
+            "filters_list_open_after_close",
+            "GET",
+            "/repos/test-owner/filters/issues",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "filters_filtered_list_after_close",
+            "GET",
+            "/repos/test-owner/filters/issues?assignee=octocat",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "search_qualifier_open_after_close",
+            "GET",
+            "/search/issues?q=is:open+repo:test-owner/filters",
+            base=base,
+            expect_json_contains={"total_count": 1},
+        ),
         # -- Issues API: Validation -----------------------------------------
         Check(
             "create_issue_missing_title",
@@ -520,6 +711,27 @@ def no_auth_checks(base: str) -> list[Check]:
             base=base,
             expect_json_list_length=1,
         ),
+        Check(
+            "list_deleted_comments",
+            "GET",
+            "/repos/test-owner/test-repo/issues/comments/deleted?since=2000-01-01T00:00:00Z",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "list_deleted_comments_none_since_future",
+            "GET",
+            "/repos/test-owner/test-repo/issues/comments/deleted?since=2999-01-01T00:00:00Z",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "list_deleted_comments_bad_since",
+            "GET",
+            "/repos/test-owner/test-repo/issues/comments/deleted?since=yesterday",
+            base=base,
+            expect_status=422,
+        ),
         Check(
             "delete_missing_comment_returns_404",
             "DELETE",
@@ -545,6 +757,113 @@ def no_auth_checks(base: str) -> list[Check]:
             body={},
             expect_status=422,
         ),
+        # -- Mentions ---------------------------------------------------------
+        Check(
+            "create_issue_with_mentions",
+            "POST",
+            "/repos/test-owner/mentions/issues",
+            base=base,
+            body={"title": "Mentions", "body": "cc @alice, not `cc @bob`\n\n```\n@carol\n```\n"},
+            expect_status=201,
+        ),
+        Check(
+            "create_comment_with_mention_in_code",
+            "POST",
+            "/repos/test-owner/mentions/issues/1/comments",
+            base=base,
+            body={"body": "~~~\nping @dave\n~~~\n"},
+            expect_status=201,
+        ),
+        Check(
+            "mentioned_filter_matches_plain_mention",
+            "GET",
+            "/repos/test-owner/mentions/issues?mentioned=alice",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "mentioned_filter_skips_code_span",
+            "GET",
+            "/repos/test-owner/mentions/issues?mentioned=bob",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "mentioned_filter_skips_fenced_block",
+            "GET",
+            "/repos/test-owner/mentions/issues?mentioned=carol",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "mentioned_filter_skips_fenced_block_in_comment",
+            "GET",
+            "/repos/test-owner/mentions/issues?mentioned=dave",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        Check(
+            "mentioned_filter_with_unknown_creator",
+            "GET",
+            "/repos/test-owner/mentions/issues?mentioned=alice&creator=nobody",
+            base=base,
+            expect_json_list_length=0,
+        ),
+        # -- Labels API -------------------------------------------------------
+        Check(
+            "list_labels_from_issues",
+            "GET",
+            "/repos/test-owner/test-repo/labels",
+            base=base,
+            # "bug" and "urgent" were registered when issue #2 was created.
+            expect_json_list_length=2,
+        ),
+        Check(
+            "create_label",
+            "POST",
+            "/repos/test-owner/test-repo/labels",
+            base=base,
+            body={"name": "docs", "color": "0075ca", "description": "Documentation"},
+            expect_status=201,
+            expect_json_contains={"id": 3, "name": "docs", "color": "0075ca"},
+        ),
+        Check(
+            "create_duplicate_label_rejected",
+            "POST",
+            "/repos/test-owner/test-repo/labels",
+            base=base,
+            body={"name": "Docs"},
+            expect_status=422,
+        ),
+        Check(
+            "rename_label",
+            "PATCH",
+            "/repos/test-owner/test-repo/labels/bug",
+            base=base,
+            body={"new_name": "defect"},
+            expect_json_contains={"id": 1, "name": "defect"},
+        ),
+        Check(
+            "renamed_label_filters_issues",
+            "GET",
+            "/repos/test-owner/test-repo/issues?labels=defect",
+            base=base,
+            expect_json_list_length=1,
+        ),
+        Check(
+            "delete_label",
+            "DELETE",
+            "/repos/test-owner/test-repo/labels/defect",
+            base=base,
+            expect_status=204,
+        ),
+        Check(
+            "get_deleted_label_returns_404",
+            "GET",
+            "/repos/test-owner/test-repo/labels/defect",
+            base=base,
+            expect_status=404,
+        ),
     ]
 
 
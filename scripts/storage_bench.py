@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Storage microbenchmarks
+
+Runs every public IssueStore method against an instrumented MemoryStorage at
+several data sizes and reports, per operation, how many storage calls it made
+(read/write/list/exists/delete), how many bytes it moved and how long it
+took.  Each operation is measured cold (fresh IssueStore, empty caches) and,
+for reads, warm (the same call repeated).
+
+Call counts are deterministic, so they are compared against a checked-in
+baseline: any count above the baseline fails the run.  Timings are reported but
+never fail it.
+
+Usage:
+    uv run python scripts/storage_bench.py
+    uv run python scripts/storage_bench.py --sizes 100 1000 10000 --json report.json
+    uv run python scripts/storage_bench.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Callable
+from dataclasses import dataclass
+import inspect
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Any
+
+from gh_issues_local.memory_storage import MemoryStorage
+from gh_issues_local.packs import PackStore
+from gh_issues_local.snapshots import IndexSnapshots
+from gh_issues_local.storage import IssueStore
+
+# -- Config -----------------------------------------------------------------
+
+BASELINE_PATH = Path(__file__).with_name("storage_bench_baseline.json")
+DEFAULT_SIZES = (100, 1000)
+BASE_URL = "http://127.0.0.1:10100"
+REPOS = [("acme", "api"), ("acme", "web"), ("other", "tool"), ("other", "docs")]
+# A ``since`` no stored document reaches: measures the cost of an incremental
+# sync with nothing to report.
+FUTURE = "2100-01-01T00:00:00Z"
+COUNTED_OPS = ("read", "write", "list", "exists", "delete")
+
+
+# -- Instrumented in-memory storage ------------------------------------------
+
+
+class CountingMemoryStorage(MemoryStorage):
+    """MemoryStorage that counts every call and byte moved."""
+
+    def __init__(self, files: dict[str, bytes] | None = None) -> None:
+        super().__init__()
+        for path, data in (files or {}).items():
+            super().write(path, data)
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = dict.fromkeys(COUNTED_OPS, 0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def clone(self) -> CountingMemoryStorage:
+        return CountingMemoryStorage(self._files)
+
+    def read(self, path: str) -> bytes:
+        self.calls["read"] += 1
+        data = super().read(path)
+        self.bytes_read += len(data)
+        return data
+
+    def write(self, path: str, data: bytes) -> None:
+        self.calls["write"] += 1
+        self.bytes_written += len(data)
+        super().write(path, data)
+
+    def exists(self, path: str) -> bool:
+        self.calls["exists"] += 1
+        return super().exists(path)
+
+    def delete(self, path: str) -> None:
+        self.calls["delete"] += 1
+        super().delete(path)
+
+    def list(self, path: str = "") -> list[str]:
+        self.calls["list"] += 1
+        return super().list(path)
+
+
+# -- Data set ---------------------------------------------------------------
+
+
+def populate(size: int) -> CountingMemoryStorage:
+    """*size* issues spread over REPOS; every other issue has a comment, every third a label.
+
+    Every fifth issue is assigned to ``octocat``, and every fourth comment mentions them.
+    """
+    storage = CountingMemoryStorage()
+    store = IssueStore(storage, search_timeout=None)
+    for i in range(size):
+        owner, repo = REPOS[i % len(REPOS)]
+        issue, _ = store.create(
+            owner,
+            repo,
+            title=f"issue {i} {'needle' if i % 10 == 0 else 'hay'}",
+            body=f"body of issue {i}",
+            labels=["bug"] if i % 3 == 0 else None,
+            assignee=None,
+            assignees=["octocat"] if i % 5 == 0 else None,
+            base_url=BASE_URL,
+        )
+        if i % 7 == 0:
+            store.update(owner, repo, issue["number"], {"state": "closed"}, BASE_URL)
+        if i % 2 == 0:
+            mention = " cc @octocat" if i % 8 == 0 else ""
+            store.create_comment(owner, repo, issue["number"], f"comment on {i}{mention}", BASE_URL)
+    return storage
+
+
+# -- Scenarios ----------------------------------------------------------------
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str  # IssueStore method exercised (for coverage checking)
+    run: Callable[[IssueStore], Any]
+    repeatable: bool = True  # reads: also measure a warm second call
+    packs: bool = False  # give the store a PackStore (in a temp dir)
+    snapshots: bool = False  # give the store IndexSnapshots (in a temp dir)
+    setup: Callable[[IssueStore], Any] | None = None  # run on the store before measuring, not counted
+
+
+def scenarios() -> list[Scenario]:
+    owner, repo = REPOS[0]
+    return [
+        Scenario(
+            "create", "create", lambda s: s.create(owner, repo, "new", "body", ["bug"], None, None, BASE_URL), False
+        ),
+        Scenario("get", "get", lambda s: s.get(owner, repo, 1)),
+        Scenario("get_versioned", "get_versioned", lambda s: s.get_versioned(owner, repo, 1)),
+        Scenario("update", "update", lambda s: s.update(owner, repo, 1, {"title": "changed"}, BASE_URL), False),
+        Scenario("update_close", "update", lambda s: s.update(owner, repo, 1, {"state": "closed"}, BASE_URL), False),
+        Scenario("list_for_repo", "list_for_repo", lambda s: s.list_for_repo(owner, repo)),
+        Scenario("list_for_repo_labels", "list_for_repo", lambda s: s.list_for_repo(owner, repo, labels="bug")),
+        Scenario("list_for_repo_page5", "list_for_repo", lambda s: s.list_for_repo(owner, repo, state="all", page=5)),
+        Scenario(
+            "list_for_repo_after_write",
+            "list_for_repo",
+            lambda s: s.list_for_repo(owner, repo, sort="updated"),
+            setup=lambda s: (s.list_for_repo(owner, repo), s.update(owner, repo, 2, {"title": "t"}, BASE_URL)),
+        ),
+        Scenario(
+            "list_for_repo_comments",
+            "list_for_repo",
+            lambda s: s.list_for_repo(owner, repo, sort="comments", direction="asc"),
+        ),
+        Scenario(
+            "list_for_repo_since",
+            "list_for_repo",
+            lambda s: s.list_for_repo(owner, repo, state="all", since=FUTURE),
+            setup=lambda s: s.list_for_repo(owner, repo),
+        ),
+        Scenario("list_for_repo_assignee", "list_for_repo", lambda s: s.list_for_repo(owner, repo, assignee="octocat")),
+        Scenario("list_all", "list_all", lambda s: s.list_all()),
+        Scenario("list_all_mentioned", "list_all", lambda s: s.list_all(state="all", mentioned="octocat")),
+        Scenario("list_all_updated", "list_all", lambda s: s.list_all(sort="updated", state="all")),
+        Scenario("list_for_org", "list_for_org", lambda s: s.list_for_org(owner)),
+        Scenario("search", "search", lambda s: s.search("needle")),
+        Scenario("search_sorted", "search", lambda s: s.search("issue", sort="comments")),
+        Scenario("search_qualified", "search", lambda s: s.search("needle is:open label:bug", sort="created")),
+        Scenario("create_comment", "create_comment", lambda s: s.create_comment(owner, repo, 1, "hi", BASE_URL), False),
+        Scenario("get_comment", "get_comment", lambda s: s.get_comment(owner, repo, 1)),
+        Scenario("update_comment", "update_comment", lambda s: s.update_comment(owner, repo, 1, "x", BASE_URL), False),
+        Scenario("delete_comment", "delete_comment", lambda s: s.delete_comment(owner, repo, 1), False),
+        Scenario(
+            "list_comments_for_issue", "list_comments_for_issue", lambda s: s.list_comments_for_issue(owner, repo, 1)
+        ),
+        Scenario("list_comments_for_repo", "list_comments_for_repo", lambda s: s.list_comments_for_repo(owner, repo)),
+        Scenario(
+            "list_comments_for_repo_since",
+            "list_comments_for_repo",
+            lambda s: s.list_comments_for_repo(owner, repo, since=FUTURE),
+            setup=lambda s: s.list_comments_for_repo(owner, repo),
+        ),
+        Scenario(
+            "deleted_comments",
+            "deleted_comments",
+            lambda s: s.deleted_comments(owner, repo, "2000-01-01T00:00:00Z"),
+            setup=lambda s: (s.list_comments_for_repo(owner, repo), s.delete_comment(owner, repo, 1)),
+        ),
+        Scenario("pin_comment", "pin_comment", lambda s: s.pin_comment(owner, repo, 1), False),
+        Scenario("unpin_comment", "unpin_comment", lambda s: s.unpin_comment(owner, repo, 1), False),
+        Scenario("list_labels", "list_labels", lambda s: s.list_labels(owner, repo, BASE_URL)),
+        Scenario("get_label", "get_label", lambda s: s.get_label(owner, repo, "bug", BASE_URL)),
+        Scenario(
+            "create_label", "create_label", lambda s: s.create_label(owner, repo, "new", None, None, BASE_URL), False
+        ),
+        Scenario(
+            "update_label",
+            "update_label",
+            lambda s: s.update_label(owner, repo, "bug", {"new_name": "defect"}, BASE_URL),
+            False,
+        ),
+        Scenario("delete_label", "delete_label", lambda s: s.delete_label(owner, repo, "bug"), False),
+        Scenario("totals", "totals", lambda s: s.totals()),
+        Scenario("repos", "repos", lambda s: s.repos()),
+        Scenario("warm", "warm", lambda s: s.warm(owner, repo)),
+        Scenario("issue_numbers", "issue_numbers", lambda s: s.issue_numbers(owner, repo)),
+        Scenario("reload_pack", "reload_pack", lambda s: s.reload_pack(owner, repo), packs=True, setup=repack_first),
+        Scenario(
+            "refresh_paths",
+            "refresh_paths",
+            lambda s: s.refresh_paths([s._issue_path(owner, repo, 1), s._comment_path(owner, repo, 1)]),
+            setup=lambda s: s.list_comments_for_repo(owner, repo),
+        ),
+        Scenario("refresh_all", "refresh_all", lambda s: s.refresh_all(), setup=lambda s: s.list_all()),
+        Scenario("migrate_layout", "migrate_layout", lambda s: s.migrate_layout("sharded"), False),
+        Scenario("repack", "repack", lambda s: s.repack(owner, repo), False, packs=True),
+        Scenario("repack_all", "repack_all", lambda s: s.repack_all(), False, packs=True),
+        Scenario("unpack", "unpack", lambda s: s.unpack(owner, repo), False, packs=True, setup=repack_first),
+        Scenario("get_packed", "get", lambda s: s.get(owner, repo, 1), packs=True, setup=repack_first),
+        Scenario(
+            "list_for_repo_packed",
+            "list_for_repo",
+            lambda s: s.list_for_repo(owner, repo),
+            packs=True,
+            setup=repack_first,
+        ),
+        Scenario(
+            "checkpoint_indexes",
+            "checkpoint_indexes",
+            lambda s: s.checkpoint_indexes(),
+            False,
+            snapshots=True,
+            setup=lambda s: s.list_all(),
+        ),
+        Scenario(
+            "restore_indexes",
+            "restore_indexes",
+            restore_after_restart,
+            False,
+            snapshots=True,
+            setup=lambda s: (s.list_all(), s.checkpoint_indexes(), s.update(owner, repo, 1, {"title": "t"}, BASE_URL)),
+        ),
+    ]
+
+
+def repack_first(store: IssueStore) -> None:
+    owner, repo = REPOS[0]
+    store.repack(owner, repo)
+
+
+def restore_after_restart(store: IssueStore) -> int:
+    """Restore *store*'s checkpoint into a fresh store, as a restarted server would."""
+    restarted = IssueStore(store._storage, search_timeout=None, snapshots=store._snapshots)
+    return restarted.restore_indexes()
+
+
+def uncovered_methods(covered: set[str]) -> list[str]:
+    """Public IssueStore methods that touch storage but have no scenario."""
+    ignored = {"stats", "index_memory"}
+    public = {
+        name
+        for name, _ in inspect.getmembers(IssueStore, inspect.isfunction)
+        if not name.startswith("_") and name not in ignored
+    }
+    return sorted(public - covered)
+
+
+# -- Measurement ----------------------------------------------------------------
+
+
+def measure(storage: CountingMemoryStorage, store: IssueStore, scenario: Scenario) -> dict[str, Any]:
+    storage.reset()
+    started = time.perf_counter()
+    scenario.run(store)
+    elapsed = time.perf_counter() - started
+    return {
+        **storage.calls,
+        "bytes_read": storage.bytes_read,
+        "bytes_written": storage.bytes_written,
+        "wall_ms": round(elapsed * 1000, 3),
+    }
+
+
+def run(sizes: list[int]) -> dict[str, dict[str, dict[str, Any]]]:
+    """Return ``{size: {"<scenario>/<cold|warm>": metrics}}``."""
+    report: dict[str, dict[str, dict[str, Any]]] = {}
+    for size in sizes:
+        print(f"size {size}: populating ...", file=sys.stderr)
+        seed = populate(size)
+        results: dict[str, dict[str, Any]] = {}
+        for scenario in scenarios():
+            with tempfile.TemporaryDirectory() as scratch_dir:
+                storage = seed.clone()
+                packs = PackStore(Path(scratch_dir) / "packs") if scenario.packs else None
+                snapshots = IndexSnapshots(Path(scratch_dir) / "index") if scenario.snapshots else None
+                store = IssueStore(storage, search_timeout=None, packs=packs, snapshots=snapshots)
+                if scenario.setup is not None:
+                    scenario.setup(store)
+                results[f"{scenario.name}/cold"] = measure(storage, store, scenario)
+                if scenario.repeatable:
+                    results[f"{scenario.name}/warm"] = measure(storage, store, scenario)
+        report[str(size)] = results
+    return report
+
+
+def check(report: dict, baseline: dict) -> list[str]:
+    """Return a description of every storage call count that exceeds the baseline.
+
+    An operation or size the baseline has no entry for fails too: otherwise a
+    new scenario would never be checked until someone remembered to update it.
+    """
+    failures: list[str] = []
+    for size, results in report.items():
+        if size not in baseline:
+            failures.append(f"size={size}: not in baseline")
+            continue
+        for op, metrics in results.items():
+            expected = baseline[size].get(op)
+            if expected is None:
+                failures.append(f"size={size} {op}: not in baseline")
+                continue
+            for kind in COUNTED_OPS:
+                if metrics[kind] > expected.get(kind, 0):
+                    failures.append(
+                        f"size={size} {op}: {kind} calls {metrics[kind]} > baseline {expected.get(kind, 0)}"
+                    )
+    return failures
+
+
+def print_table(report: dict) -> None:
+    header = (
+        f"{'operation':<34}" + "".join(f"{k:>8}" for k in COUNTED_OPS) + f"{'B read':>11}{'B written':>11}{'ms':>10}"
+    )
+    for size, results in report.items():
+        print(f"\n== {size} issues ==\n{header}", file=sys.stderr)
+        for op, m in results.items():
+            counts = "".join(f"{m[k]:>8}" for k in COUNTED_OPS)
+            print(
+                f"{op:<34}{counts}{m['bytes_read']:>11}{m['bytes_written']:>11}{m['wall_ms']:>10.2f}", file=sys.stderr
+            )
+
+
+# -- Main -------------------------------------------------------------------
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--json", type=Path, help="Also write the full report here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Rewrite the baseline from this run")
+    args = parser.parse_args()
+
+    missing = uncovered_methods({s.method for s in scenarios()})
+    if missing:
+        print(f"FAIL: IssueStore methods without a scenario: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    report = run(args.sizes)
+    print_table(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        counts_only = {
+            size: {op: {k: m[k] for k in COUNTED_OPS} for op, m in results.items()} for size, results in report.items()
+        }
+        args.baseline.write_text(json.dumps(counts_only, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.", file=sys.stderr)
+        return 0
+    failures = check(report, json.loads(args.baseline.read_text()))
+    if failures:
+        print("\nStorage call regressions:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        if any(failure.endswith("not in baseline") for failure in failures):
+            print("Run with --update-baseline to record new operations or sizes.", file=sys.stderr)
+        return 1
+    print("\nAll storage call counts within baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,6 +36,40 @@ def main() -> None:
         action="store_true",
         help="Force re-download of the frontend build",
     )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Keep all data in memory; nothing is written to disk and everything is lost on exit",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        default=None,
+        help="Preload in-memory storage from this snapshot file (implies --memory)",
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Write all issues and comments from the configured storage to FILE and exit",
+    )
+    parser.add_argument(
+        "--migrate-layout",
+        choices=["flat", "sharded"],
+        default=None,
+        help="Move stored issues and comments to this directory layout and exit (stop the server first)",
+    )
+    parser.add_argument(
+        "--repack",
+        action="store_true",
+        help="Fold every repo's loose issue and comment files into its pack and exit",
+    )
+    parser.add_argument(
+        "--unpack",
+        action="store_true",
+        help="Write every packed document back as a loose file, remove the packs and exit (stop the server first)",
+    )
     args = parser.parse_args()
 
     host = args.host or ("0.0.0.0" if args.production else "127.0.0.1")
@@ -47,6 +81,48 @@ def main() -> None:
 
     data_dir = Path(os.environ.get("GH_ISSUES_LOCAL_DATA_DIR", str(Path.home())))
 
+    if args.memory or args.snapshot:
+        os.environ["GH_ISSUES_LOCAL_STORAGE"] = "memory"
+    if args.snapshot:
+        os.environ["GH_ISSUES_LOCAL_SNAPSHOT"] = str(args.snapshot)
+
+    if args.migrate_layout:
+        from gh_issues_local.app import _create_storage
+        from gh_issues_local.storage import IssueStore
+
+        storage, _ = _create_storage()
+        moved = IssueStore(storage).migrate_layout(args.migrate_layout)
+        print(f"Moved {moved} documents to the {args.migrate_layout} layout")
+        return
+
+    if args.repack or args.unpack:
+        from gh_issues_local.app import _create_storage
+        from gh_issues_local.packs import PackStore
+        from gh_issues_local.storage import IssueStore
+
+        storage, _ = _create_storage()
+        packs = PackStore(data_dir / "packs")
+        store = IssueStore(storage, packs=packs)
+        if args.unpack:
+            count = sum(store.unpack(owner, repo) for owner, repo in packs.repos())
+            print(f"Unpacked {count} documents")
+        else:
+            count = sum(store.repack_all().values())
+            print(f"Packed {count} documents")
+        return
+
+    if args.export_snapshot:
+        from gh_issues_local.app import _create_storage
+        from gh_issues_local.memory_storage import export_snapshot
+        from gh_issues_local.packs import PackStore
+
+        if PackStore(data_dir / "packs").repos():
+            parser.error("--export-snapshot reads loose files only; run --unpack first")
+        storage, _ = _create_storage()
+        count = export_snapshot(storage, args.export_snapshot)
+        print(f"Wrote {count} files to {args.export_snapshot}")
+        return
+
     # Download the frontend build unless in dev mode.
     if not args.dev:
         from gh_issues_local.frontend import fetch_frontend
@@ -0,0 +1,150 @@
+"""Cost-classed admission control for expensive scan endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import os
+import re
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+# GET endpoints that scan whole repos (or every repo), keyed by cost class.
+# Anything not listed -- point reads and mutations -- is always admitted.
+_CLASS_PATTERNS: tuple[tuple[str, re.Pattern[str]], ...] = (
+    ("search", re.compile(r"^/search/issues$")),
+    ("scan", re.compile(r"^/(issues|user/issues|orgs/[^/]+/issues)$")),
+    ("scan", re.compile(r"^/repos/[^/]+/[^/]+/issues(/comments)?$")),
+)
+
+
+def cost_class(method: str, path: str) -> str | None:
+    """The cost class of a request, or None for requests that are always admitted."""
+    if method != "GET":
+        return None
+    for name, pattern in _CLASS_PATTERNS:
+        if pattern.match(path):
+            return name
+    return None
+
+
+@dataclass(frozen=True)
+class AdmissionLimit:
+    """Concurrency and queue bounds for one cost class."""
+
+    max_concurrent: int
+    max_queue: int
+
+
+DEFAULT_LIMITS = {
+    "scan": AdmissionLimit(max_concurrent=8, max_queue=32),
+    "search": AdmissionLimit(max_concurrent=4, max_queue=16),
+}
+DEFAULT_RETRY_AFTER = 1  # seconds
+DEFAULT_QUEUE_TIMEOUT = 10.0  # seconds
+
+
+class _Gate:
+    """A semaphore that refuses new waiters once its queue is full."""
+
+    def __init__(self, limit: AdmissionLimit) -> None:
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self, timeout: float) -> bool:
+        if self._semaphore.locked() and self.waiting >= self.limit.max_queue:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+
+class AdmissionController:
+    """Per-class gates plus the settings used to reject overflow."""
+
+    def __init__(
+        self,
+        limits: dict[str, AdmissionLimit] | None = None,
+        *,
+        retry_after: int = DEFAULT_RETRY_AFTER,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+    ) -> None:
+        self.retry_after = retry_after
+        self.queue_timeout = queue_timeout
+        self._gates = {name: _Gate(limit) for name, limit in (limits or DEFAULT_LIMITS).items()}
+
+    @classmethod
+    def from_env(cls) -> AdmissionController:
+        """Build limits from ``GH_ISSUES_LOCAL_{CLASS}_CONCURRENCY`` / ``_QUEUE`` overrides."""
+        limits: dict[str, AdmissionLimit] = {}
+        for name, default in DEFAULT_LIMITS.items():
+            prefix = f"GH_ISSUES_LOCAL_{name.upper()}"
+            limits[name] = AdmissionLimit(
+                max_concurrent=int(os.environ.get(f"{prefix}_CONCURRENCY", default.max_concurrent)),
+                max_queue=int(os.environ.get(f"{prefix}_QUEUE", default.max_queue)),
+            )
+        return cls(
+            limits,
+            retry_after=int(os.environ.get("GH_ISSUES_LOCAL_RETRY_AFTER", DEFAULT_RETRY_AFTER)),
+            queue_timeout=float(os.environ.get("GH_ISSUES_LOCAL_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)),
+        )
+
+    def gate_for(self, method: str, path: str) -> _Gate | None:
+        name = cost_class(method, path)
+        return self._gates.get(name) if name is not None else None
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                "active": gate.active,
+                "waiting": gate.waiting,
+                "admitted": gate.admitted,
+                "rejected": gate.rejected,
+                "max_concurrent": gate.limit.max_concurrent,
+                "max_queue": gate.limit.max_queue,
+            }
+            for name, gate in self._gates.items()
+        }
+
+
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    """Bound concurrent scans per cost class; shed load with 503 + Retry-After."""
+
+    async def dispatch(self, request: Request, call_next):
+        controller: AdmissionController = request.app.state.admission
+        gate = controller.gate_for(request.method, request.url.path)
+        if gate is None:
+            return await call_next(request)
+
+        if not await gate.acquire(controller.queue_timeout):
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "message": "Service Unavailable: too many concurrent expensive requests",
+                    "documentation_url": "https://docs.github.com/rest",
+                },
+                headers={"Retry-After": str(controller.retry_after)},
+            )
+        try:
+            return await call_next(request)
+        finally:
+            gate.release()
@@ -1,20 +1,38 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import logging
 import os
 from pathlib import Path
+import threading
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from storage_provider import create_storage
 
+from gh_issues_local.admission import AdmissionController, AdmissionMiddleware
 from gh_issues_local.auth import TOKEN_FILE, AuthMiddleware, ensure_token
+from gh_issues_local.memory_storage import MemoryStorage
+from gh_issues_local.metrics import CONTENT_TYPE, InstrumentedStorage, MetricsMiddleware, RequestMetrics, render_metrics
+from gh_issues_local.packs import PackStore, Repacker
+from gh_issues_local.profiling import Profiler, ProfilingMiddleware
+from gh_issues_local.request_stats import JSONResponse, RequestStatsMiddleware
 from gh_issues_local.routes.comments import router as comments_router
 from gh_issues_local.routes.issues import router as issues_router
-from gh_issues_local.storage import IssueStore
+from gh_issues_local.routes.labels import router as labels_router
+from gh_issues_local.search_pool import SearchPool
+from gh_issues_local.snapshots import Checkpointer, IndexSnapshots
+from gh_issues_local.storage import DEFAULT_SEARCH_TIMEOUT, IssueStore, StorageBackend
+from gh_issues_local.tracing import Tracer, TracingMiddleware
+from gh_issues_local.warmup import Warmup, WarmupMiddleware
+from gh_issues_local.watcher import StorageWatcher
 
 # Built frontend output (produced by `pnpm build` in web/).
 FRONTEND_DIST = Path(__file__).parents[2] / "web" / "dist"
 
+logger = logging.getLogger(__name__)
+
 _data_dir = Path(os.environ.get("GH_ISSUES_LOCAL_DATA_DIR", str(Path.home())))
 
 
@@ -33,22 +51,132 @@ def _ensure_storage_config(data_dir: Path) -> None:
         local_yaml.write_text("root_path: ./storage\n")
 
 
-def create_app(auth_required: bool = False) -> FastAPI:
-    app = FastAPI(title="GitHub Issues API", version="0.1.0")
+def _create_storage() -> tuple[StorageBackend, bool]:
+    """Build the storage backend.  Returns ``(storage, config_backed)``.
+
+    ``GH_ISSUES_LOCAL_STORAGE=memory`` selects an ephemeral in-memory backend,
+    optionally preloaded from ``GH_ISSUES_LOCAL_SNAPSHOT``; nothing is written
+    to the data directory.  Otherwise storage is resolved from config files
+    (.storage.yaml) in the data directory.
+    """
+    backend = os.environ.get("GH_ISSUES_LOCAL_STORAGE", "config")
+    if backend == "memory":
+        storage = MemoryStorage()
+        snapshot = os.environ.get("GH_ISSUES_LOCAL_SNAPSHOT")
+        if snapshot:
+            storage.load_snapshot(Path(snapshot))
+        return storage, False
+    if backend != "config":
+        raise ValueError(f"Unknown GH_ISSUES_LOCAL_STORAGE backend {backend!r} (expected 'config' or 'memory')")
+    # If no config exists yet, create a default local-storage setup so the
+    # server can start without manual configuration.
+    _ensure_storage_config(_data_dir)
+    return create_storage(config_dir=_data_dir), True
+
+
+def _create_packs() -> PackStore | None:
+    """The pack store under the data directory, if ``GH_ISSUES_LOCAL_PACKS`` is set."""
+    if os.environ.get("GH_ISSUES_LOCAL_PACKS", "") in ("", "0"):
+        return None
+    return PackStore(_data_dir / "packs")
+
+
+def _create_snapshots() -> IndexSnapshots | None:
+    """Index snapshots under the data directory, if ``GH_ISSUES_LOCAL_INDEX_SNAPSHOTS`` is set."""
+    if os.environ.get("GH_ISSUES_LOCAL_INDEX_SNAPSHOTS", "") in ("", "0"):
+        return None
+    return IndexSnapshots(_data_dir / "index")
+
+
+def _warm_up(app: FastAPI) -> None:
+    """Restore and warm the indexes, then start checkpointing."""
+    app.state.warmup.run()
+    if app.state.checkpointer is not None:
+        app.state.checkpointer.start()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if app.state.repacker is not None:
+        app.state.repacker.start()
+    if app.state.watcher is not None:
+        app.state.watcher.start()
+    if not app.state.warmup.ready:
+        threading.Thread(target=_warm_up, args=(app,), name="gh-issues-local-warmup", daemon=True).start()
+    yield
+    app.state.warmup.stop()
+    if app.state.checkpointer is not None:
+        app.state.checkpointer.stop()
+    if app.state.repacker is not None:
+        app.state.repacker.stop()
+    if app.state.watcher is not None:
+        app.state.watcher.stop()
+    if app.state.search_pool is not None:
+        app.state.search_pool.shutdown()
+    app.state.tracer.close()
+
+
+def create_app(auth_required: bool = False, admission: AdmissionController | None = None) -> FastAPI:
+    app = FastAPI(title="GitHub Issues API", version="0.1.0", lifespan=_lifespan, default_response_class=JSONResponse)
 
     # Auth state -- set before middleware so it's available on first request.
     app.state.auth_required = auth_required
     app.state.auth_token = ensure_token() if auth_required else None
     app.state.auth_token_path = str(TOKEN_FILE)
 
-    # Storage -- resolved from config files (.storage.yaml) in the data directory.
-    # If no config exists yet, create a default local-storage setup so the
-    # server can start without manual configuration.
-    _ensure_storage_config(_data_dir)
-    storage = create_storage(config_dir=_data_dir)
-    app.state.issue_store = IssueStore(storage)
+    storage, config_backed = _create_storage()
+    app.state.storage_metrics = InstrumentedStorage(storage)
+    search_timeout = float(os.environ.get("GH_ISSUES_LOCAL_SEARCH_TIMEOUT", DEFAULT_SEARCH_TIMEOUT))
+    # Optional process pool for full-text search; workers open the same
+    # storage config, so it is only used with config-backed storage.
+    search_workers = int(os.environ.get("GH_ISSUES_LOCAL_SEARCH_WORKERS", "0"))
+    # Packed per-repo archives for cold reads; like the search pool, they
+    # live in the data directory, so they need config-backed storage.
+    packs = _create_packs() if config_backed else None
+    snapshots = _create_snapshots() if config_backed else None
+    app.state.search_pool = (
+        SearchPool(_data_dir, search_workers, packs.root if packs else None)
+        if config_backed and search_workers > 0
+        else None
+    )
+    app.state.issue_store = IssueStore(
+        app.state.storage_metrics,
+        search_timeout=search_timeout or None,
+        search_pool=app.state.search_pool,
+        layout=os.environ.get("GH_ISSUES_LOCAL_LAYOUT"),
+        packs=packs,
+        snapshots=snapshots,
+    )
+    app.state.repacker = Repacker.from_env(app.state.issue_store) if packs is not None else None
+    # Follows files changed under the storage root by other writers.
+    app.state.watcher = StorageWatcher.from_env(app.state.issue_store, _data_dir) if config_backed else None
+    app.state.checkpointer = Checkpointer.from_env(app.state.issue_store) if snapshots is not None else None
+    # Snapshot restore and the optional index warm-up run in the background;
+    # ``/api/ready`` reports their progress.
+    app.state.warmup = Warmup.from_env(app.state.issue_store, restore=snapshots is not None)
 
+    # Opt-in cProfile capture.  Innermost layer, so only requests that passed
+    # auth and admission are profiled.
+    app.state.profiler = Profiler.from_env(_data_dir)
+    app.add_middleware(ProfilingMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware below
+
+    # Admission control for scan endpoints.  Added before auth so that auth is
+    # the outer layer and unauthenticated requests never take a slot.
+    app.state.admission = admission or AdmissionController.from_env()
+    app.add_middleware(AdmissionMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware below
+    # Under the ``wait`` warm-up policy, scans queue here rather than holding
+    # admission slots while the indexes load.
+    app.add_middleware(WarmupMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware below
+    # Sampled span tracing, exported as OTLP/JSON lines.  Inside auth, so an
+    # unauthenticated ``traceparent`` cannot force traces into the file.
+    app.state.tracer = Tracer.from_env(_data_dir)
+    app.add_middleware(TracingMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware below
     app.add_middleware(AuthMiddleware)  # type: ignore[invalid-argument-type]  # BaseHTTPMiddleware subclass; ty can't resolve the generic factory signature
+    # Per-request storage/parse/serialize accounting (Server-Timing, slow log).
+    app.add_middleware(RequestStatsMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware above
+    # Request metrics are the outermost layer so 401s and 503s are counted too.
+    app.state.request_metrics = RequestMetrics()
+    app.add_middleware(MetricsMiddleware)  # type: ignore[invalid-argument-type]  # see AuthMiddleware above
 
     # -- Comments API routes (registered before issues so literal paths like
     # /issues/comments are matched before the parameterized /issues/{number}).
@@ -57,12 +185,55 @@ def create_app(auth_required: bool = False) -> FastAPI:
     # -- Issues API routes --------------------------------------------------
     app.include_router(issues_router)
 
+    # -- Labels API routes --------------------------------------------------
+    app.include_router(labels_router)
+
     # -- public endpoints (no auth) -----------------------------------------
 
     @app.get("/api/health")
     async def health():
         return {"status": "ok"}
 
+    @app.get("/api/ready")
+    async def ready():
+        warmup: Warmup = app.state.warmup
+        progress = warmup.progress()
+        if warmup.ready:
+            return {"status": "ready", **progress}
+        # Not ready under either policy, so load balancers hold traffic back;
+        # the status says whether requests sent anyway are answered.
+        status = "degraded" if warmup.policy == "serve" else "loading"
+        return JSONResponse(status_code=503, content={"status": status, **progress})
+
+    @app.get("/api/stats")
+    async def stats():
+        return {**app.state.issue_store.stats(), "admission": app.state.admission.stats()}
+
+    @app.get("/api/index")
+    def index_memory():
+        return app.state.issue_store.index_memory()
+
+    @app.get("/api/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(render_metrics(app), media_type=CONTENT_TYPE)
+
+    @app.get("/api/profiles")
+    def list_profiles():
+        return app.state.profiler.captured()
+
+    @app.get("/api/profiles/{profile_id}")
+    def get_profile(profile_id: str, format: str = "pstats"):
+        profiler: Profiler = app.state.profiler
+        if format == "text":
+            report = profiler.report(profile_id)
+            if report is None:
+                raise HTTPException(status_code=404, detail="Not Found")
+            return PlainTextResponse(report)
+        dump = profiler.path(profile_id)
+        if dump is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return FileResponse(dump, media_type="application/octet-stream", filename=dump.name)
+
     @app.get("/api/auth/status")
     async def auth_status():
         return {"required": app.state.auth_required}
@@ -6,8 +6,9 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-# Infrastructure API paths that skip auth (needed for the SPA login flow).
-PUBLIC_API_PATHS = frozenset({"/api/health", "/api/auth/status", "/api/auth/verify"})
+# Infrastructure API paths that skip auth (health and readiness probes, and
+# the SPA login flow).
+PUBLIC_API_PATHS = frozenset({"/api/health", "/api/ready", "/api/auth/status", "/api/auth/verify"})
 
 # GitHub-style data API prefixes (no /api prefix -- they mirror GitHub's real
 # paths).  Everything under these prefixes requires auth.
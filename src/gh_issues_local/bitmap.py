@@ -0,0 +1,158 @@
+"""Compressed integer bitmaps in the style of Roaring.
+
+Values are split by their high 16 bits into containers.  A container with
+at most ``ARRAY_MAX`` members is a sorted ``array("H")`` of the low 16 bits;
+a denser one is a 65536-bit Python ``int``, so intersecting two dense
+containers is a single C-level ``&``.  Containers switch representation as
+they grow and shrink.
+
+Used by ``RepoMetadata`` for per-label and per-state sets of issue slots:
+a multi-label filter is a few container intersections instead of a scan
+over every issue in the repo.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+import sys
+
+ARRAY_MAX = 4096
+_CONTAINER_BYTES = 8192
+
+# Bit positions set in each byte value, for iterating dense containers.
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+_Container = array | int
+
+
+def _dense(values: Iterable[int]) -> int:
+    bits = bytearray(_CONTAINER_BYTES)
+    for low in values:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _sparse(bits: int) -> array:
+    return array("H", _iter_dense(bits, 0))
+
+
+def _iter_dense(bits: int, base: int) -> Iterator[int]:
+    for i, byte in enumerate(bits.to_bytes(_CONTAINER_BYTES, "little")):
+        if byte:
+            offset = base + (i << 3)
+            for bit in _BYTE_BITS[byte]:
+                yield offset + bit
+
+
+def _cardinality(container: _Container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+def _intersect(a: _Container, b: _Container) -> _Container:
+    if isinstance(a, int) and isinstance(b, int):
+        both = a & b
+        return both if both.bit_count() > ARRAY_MAX else _sparse(both)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        bits = b.to_bytes(_CONTAINER_BYTES, "little")
+        return array("H", [low for low in a if bits[low >> 3] >> (low & 7) & 1])
+    if len(a) > len(b):
+        a, b = b, a
+    members = set(b)
+    return array("H", [low for low in a if low in members])
+
+
+class Bitmap:
+    """A mutable set of non-negative integers below 2**32."""
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, values: Iterable[int] = ()) -> None:
+        self._containers: dict[int, _Container] = {}
+        for value in values:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(c) for c in self._containers.values())
+
+    def __contains__(self, value: int) -> bool:
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __iter__(self) -> Iterator[int]:
+        """Members in ascending order."""
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            if isinstance(container, int):
+                yield from _iter_dense(container, base)
+            else:
+                for low in container:
+                    yield base + low
+
+    def add(self, value: int) -> None:
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", [low])
+        elif isinstance(container, int):
+            self._containers[high] = container | 1 << low
+        else:
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return
+            container.insert(i, low)
+            if len(container) > ARRAY_MAX:
+                self._containers[high] = _dense(container)
+
+    def discard(self, value: int) -> None:
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container &= ~(1 << low)
+            self._containers[high] = container if container.bit_count() > ARRAY_MAX else _sparse(container)
+            return
+        i = bisect_left(container, low)
+        if i < len(container) and container[i] == low:
+            del container[i]
+            if not container:
+                del self._containers[high]
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        result = Bitmap()
+        for high, container in self._containers.items():
+            theirs = other._containers.get(high)
+            if theirs is None:
+                continue
+            both = _intersect(container, theirs)
+            if _cardinality(both):
+                result._containers[high] = both
+        return result
+
+    @staticmethod
+    def intersection(bitmaps: Iterable[Bitmap]) -> Bitmap:
+        """Intersect several bitmaps, smallest first so intermediates stay small."""
+        ordered = sorted(bitmaps, key=len)
+        if not ordered:
+            return Bitmap()
+        result = ordered[0]
+        for bitmap in ordered[1:]:
+            if not result._containers:
+                break
+            result = result & bitmap
+        return result
+
+    def memory(self) -> int:
+        """Resident bytes, including the container dict."""
+        return sys.getsizeof(self._containers) + sum(sys.getsizeof(c) for c in self._containers.values())
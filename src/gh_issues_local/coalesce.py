@@ -0,0 +1,71 @@
+"""Single-flight coalescing of identical concurrent calls."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+import functools
+import inspect
+import threading
+from typing import Any
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers with the same key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running wait for and receive the same result.
+    Nothing is cached once the leader finishes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future[Any]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict[str, int]:
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+def coalesced(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate an ``IssueStore`` method so identical concurrent calls share one result.
+
+    The key is the method name plus its arguments with defaults applied, so
+    ``list_all()`` and ``list_all(state="open")`` coalesce.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, *list(bound.arguments.items())[1:])
+        return self._single_flight.do(key, method, self, *args, **kwargs)
+
+    return wrapper
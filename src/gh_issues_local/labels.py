@@ -0,0 +1,129 @@
+"""Per-repo label registry: stable ids, colors and descriptions.
+
+Each repo's labels live in ``repos/{owner}/{repo}/labels.json``.  Names are
+unique case-insensitively, as on GitHub, and ids come from a per-repo
+sequence that is never reused, so a label keeps its id across every issue it
+is attached to and across restarts.  Issues embed rendered copies of their
+labels; ``IssueStore`` rewrites those copies when a label is renamed,
+recolored or deleted.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+DEFAULT_COLOR = "ededed"
+
+_COLOR = re.compile(r"^[0-9a-fA-F]{6}$")
+
+
+class LabelExistsError(Exception):
+    """A label with that name (compared case-insensitively) already exists."""
+
+
+def normalize_color(color: str | None) -> str:
+    """A six-digit lower-case hex color, accepting a leading ``#``."""
+    if color is None:
+        return DEFAULT_COLOR
+    color = color.removeprefix("#")
+    if not _COLOR.match(color):
+        raise ValueError(f"invalid color {color!r}")
+    return color.lower()
+
+
+def render_label(label: dict[str, Any], base_url: str, owner: str, repo: str) -> dict[str, Any]:
+    """The API representation of a registry entry."""
+    return {
+        "id": label["id"],
+        "node_id": f"LA_{label['id']}",
+        "url": f"{base_url}/repos/{owner}/{repo}/labels/{label['name']}",
+        "name": label["name"],
+        "description": label["description"],
+        "color": label["color"],
+        "default": label["default"],
+    }
+
+
+class RepoLabels:
+    """One repo's labels, keyed by lower-cased name.
+
+    Not thread-safe; ``IssueStore`` serializes access with a per-repo lock.
+    ``version`` counts renames, recolors and deletions -- the changes that
+    make copies embedded in issues stale.
+    """
+
+    def __init__(self, labels: list[dict[str, Any]] | None = None, next_id: int = 1) -> None:
+        self._labels = {label["name"].lower(): label for label in labels or []}
+        self._by_id = {label["id"]: label for label in labels or []}
+        self._next_id = next_id
+        self.version = 0
+
+    @classmethod
+    def from_json(cls, data: bytes) -> RepoLabels:
+        doc = json.loads(data)
+        return cls(doc["labels"], doc["next_id"])
+
+    def to_json(self) -> bytes:
+        return json.dumps({"next_id": self._next_id, "labels": self.all()}, ensure_ascii=False).encode()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def all(self) -> list[dict[str, Any]]:
+        """Every label, oldest first."""
+        return sorted(self._labels.values(), key=lambda label: label["id"])
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        return self._labels.get(name.lower())
+
+    def by_id(self, label_id: int) -> dict[str, Any] | None:
+        return self._by_id.get(label_id)
+
+    def add(self, name: str, color: str | None = None, description: str | None = None) -> dict[str, Any]:
+        if name.lower() in self._labels:
+            raise LabelExistsError(name)
+        label = {
+            "id": self._next_id,
+            "name": name,
+            "description": description,
+            "color": normalize_color(color),
+            "default": False,
+        }
+        self._next_id += 1
+        self._labels[name.lower()] = self._by_id[label["id"]] = label
+        return label
+
+    def update(
+        self,
+        name: str,
+        *,
+        new_name: str | None = None,
+        color: str | None = None,
+        description: str | None = None,
+        set_description: bool = False,
+    ) -> dict[str, Any]:
+        """Replace an existing label's entry, keeping its id, and return the new entry."""
+        old = self._labels[name.lower()]
+        new = dict(old)
+        if new_name is not None and new_name != old["name"]:
+            if new_name.lower() != name.lower() and new_name.lower() in self._labels:
+                raise LabelExistsError(new_name)
+            new["name"] = new_name
+        if color is not None:
+            new["color"] = normalize_color(color)
+        if set_description:
+            new["description"] = description
+        del self._labels[name.lower()]
+        self._labels[new["name"].lower()] = self._by_id[new["id"]] = new
+        if new != old:
+            self.version += 1
+        return new
+
+    def remove(self, name: str) -> dict[str, Any] | None:
+        label = self._labels.pop(name.lower(), None)
+        if label is not None:
+            del self._by_id[label["id"]]
+            self.version += 1
+        return label
@@ -0,0 +1,140 @@
+"""Ephemeral in-memory storage backend with JSON snapshot import/export."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import threading
+
+from storage_provider.exceptions import StorageNotFoundError
+
+from gh_issues_local.storage import StorageBackend
+
+SNAPSHOT_VERSION = 1
+
+
+class MemoryStorage:
+    """Dict-backed storage with the same path semantics as the file providers.
+
+    Files map path -> bytes.  A directory index (dir prefix -> child entries,
+    with a trailing ``/`` on sub-directories) keeps ``list`` proportional to
+    the number of children rather than the number of files.  Nothing touches
+    the disk unless a snapshot is explicitly loaded or dumped.
+    """
+
+    def __init__(self) -> None:
+        self._files: dict[str, bytes] = {}
+        self._dirs: dict[str, set[str]] = {"": set()}
+        self._lock = threading.Lock()
+
+    # -- StorageBackend -----------------------------------------------------
+
+    def read(self, path: str) -> bytes:
+        try:
+            return self._files[path]
+        except KeyError:
+            raise StorageNotFoundError(path) from None
+
+    def write(self, path: str, data: bytes) -> None:
+        with self._lock:
+            if path not in self._files:
+                self._link(path)
+            self._files[path] = bytes(data)
+
+    def exists(self, path: str) -> bool:
+        return path in self._files or _dir_key(path) in self._dirs
+
+    def delete(self, path: str) -> None:
+        with self._lock:
+            if path in self._files:
+                del self._files[path]
+                self._unlink(path)
+                return
+            prefix = _dir_key(path)
+            if prefix not in self._dirs or not prefix:
+                raise StorageNotFoundError(path)
+            for file_path in [p for p in self._files if p.startswith(prefix)]:
+                del self._files[file_path]
+                self._unlink(file_path)
+
+    def list(self, path: str = "") -> list[str]:
+        children = self._dirs.get(_dir_key(path))
+        if children is None:
+            raise StorageNotFoundError(path)
+        return sorted(children)
+
+    # -- directory index ----------------------------------------------------
+
+    def _link(self, path: str) -> None:
+        parent, _, name = path.rpartition("/")
+        entry = name
+        while True:
+            key = f"{parent}/" if parent else ""
+            children = self._dirs.setdefault(key, set())
+            if entry in children:
+                return
+            children.add(entry)
+            if not parent:
+                return
+            parent, _, name = parent.rpartition("/")
+            entry = f"{name}/"
+
+    def _unlink(self, path: str) -> None:
+        parent, _, name = path.rpartition("/")
+        entry = name
+        while True:
+            key = f"{parent}/" if parent else ""
+            children = self._dirs[key]
+            children.discard(entry)
+            if children or not parent:
+                return
+            del self._dirs[key]
+            parent, _, name = parent.rpartition("/")
+            entry = f"{name}/"
+
+    # -- snapshots ----------------------------------------------------------
+
+    def load_snapshot(self, snapshot_path: Path) -> int:
+        """Load files from a snapshot written by ``dump_snapshot``.  Returns the file count."""
+        snapshot = json.loads(snapshot_path.read_text())
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {snapshot.get('version')!r} in {snapshot_path}")
+        for path, text in snapshot["files"].items():
+            self.write(path, text.encode())
+        return len(snapshot["files"])
+
+    def dump_snapshot(self, snapshot_path: Path) -> int:
+        """Write every file to *snapshot_path*.  Returns the file count."""
+        return _write_snapshot(snapshot_path, dict(self._files))
+
+
+def _dir_key(path: str) -> str:
+    path = path.strip("/")
+    return f"{path}/" if path else ""
+
+
+def _write_snapshot(snapshot_path: Path, files: dict[str, bytes]) -> int:
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "files": {path: data.decode() for path, data in sorted(files.items())},
+    }
+    snapshot_path.write_text(json.dumps(snapshot, ensure_ascii=False))
+    return len(files)
+
+
+def export_snapshot(storage: StorageBackend, snapshot_path: Path, root: str = "") -> int:
+    """Copy every file under *root* in any backend into a snapshot file.  Returns the file count."""
+    files: dict[str, bytes] = {}
+    pending = [root]
+    while pending:
+        prefix = pending.pop()
+        try:
+            entries = storage.list(prefix)
+        except StorageNotFoundError:
+            continue
+        for entry in entries:
+            if entry.endswith("/"):
+                pending.append(f"{prefix}{entry}")
+            else:
+                files[f"{prefix}{entry}"] = storage.read(f"{prefix}{entry}")
+    return _write_snapshot(snapshot_path, files)
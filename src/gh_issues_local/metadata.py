@@ -0,0 +1,1014 @@
+"""Columnar, array-backed issue metadata for list filtering and sorting.
+
+A ``RepoMetadata`` keeps what the list and search predicates need -- state,
+created/updated epoch seconds, comment count, milestone, author, assignee
+and label ids -- in typed arrays with one slot per issue number
+(``slot = number - 1``; numbers are dense because they come from the repo
+counter).  That is ~40 bytes per issue plus 4 per label or assignee,
+instead of a few hundred for a dict per issue, and lets filters run as bulk
+passes (``bytes.translate`` / ``itertools.compress`` and C-level ``sorted``
+keys) rather than per-issue Python dict lookups.
+Label, state and per-user (assignee, creator, @mentioned) membership is
+also kept as compressed bitmaps (``gh_issues_local.bitmap``), so a label or
+"my issues" filter intersects a few bitmaps instead of visiting every issue.
+Per-column sort orders (``_SortedSlots``) are kept incrementally once
+built, so ``first`` can return the leading page of a broad filter without
+sorting every match.
+
+``IssueStore`` builds a repo's metadata on first use from the stored issues
+and keeps it current from ``_write_issue``.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+import itertools
+import re
+import sys
+import threading
+import time
+from typing import Any
+
+from gh_issues_local.bitmap import Bitmap
+
+STATE_ABSENT = 0
+STATE_OPEN = 1
+STATE_CLOSED = 2
+STATE_OTHER = 3
+_STATE_CODES = {"open": STATE_OPEN, "closed": STATE_CLOSED}
+
+# ``bytes.translate`` tables turning the state column into a 0/1 mask.
+_MASKS = {
+    "all": bytes(0 if code == STATE_ABSENT else 1 for code in range(256)),
+    "open": bytes(1 if code == STATE_OPEN else 0 for code in range(256)),
+    "closed": bytes(1 if code == STATE_CLOSED else 0 for code in range(256)),
+}
+
+# Sortable columns by issue field.
+SORT_COLUMNS = {"created_at": "created", "updated_at": "updated", "comments": "comments"}
+
+# Sort keys pack ``(value, slot)`` into one int: ``value * _SLOT_SPAN + slot``.
+_SLOT_SPAN = 1 << 32
+
+# Inclusive ``(low, high)`` bound on a column; None means unbounded.
+Range = tuple[int | None, int | None]
+
+
+def iso_epoch(value: Any) -> int:
+    """Epoch seconds for a stored ISO-8601 timestamp (0 if missing or malformed)."""
+    if not value:
+        return 0
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return 0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return int(parsed.timestamp())
+
+
+# User roles with a per-user index.
+ROLE_ASSIGNEE = "assignee"
+ROLE_CREATOR = "creator"
+ROLE_MENTIONED = "mentioned"
+ROLES = (ROLE_ASSIGNEE, ROLE_CREATOR, ROLE_MENTIONED)
+
+# ``assignee`` / ``milestone`` filter values meaning "has any" and "has none".
+ANY = "*"
+NONE = "none"
+
+# GitHub logins: alphanumerics and single inner hyphens, at most 39 characters.
+# Emails and ``@org/team`` mentions are not user mentions.
+_MENTION = re.compile(r"(?<![\w@/.`-])@([A-Za-z0-9](?:[A-Za-z0-9]|-(?=[A-Za-z0-9])){0,38})(?![\w/-])")
+# Markdown code, where GitHub does not link mentions: fenced blocks (closed by
+# a fence of the same character at least as long, or running to the end of the
+# text) and inline code spans (closed by a backtick run of the same length).
+_FENCED_CODE = re.compile(
+    r"^ {0,3}((`|~)\2{2,})(?:(?<=`)[^`\n]*|(?<=~)[^\n]*)\n.*?(?:^ {0,3}\1\2*[ \t]*$|\Z)", re.MULTILINE | re.DOTALL
+)
+_CODE_SPAN = re.compile(r"(?<!`)(`+)(?!`).*?(?<!`)\1(?!`)", re.DOTALL)
+
+
+def parse_mentions(text: str | None) -> frozenset[str]:
+    """Lower-cased logins @mentioned in *text*, outside code blocks and code spans."""
+    if not text or "@" not in text:
+        return frozenset()
+    if "`" in text or "~" in text:
+        text = _CODE_SPAN.sub(" ", _FENCED_CODE.sub("\n", text))
+    return frozenset(login.lower() for login in _MENTION.findall(text))
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """Predicates evaluated against ``RepoMetadata`` columns.
+
+    ``assignee`` and ``milestone`` also accept ``ANY`` and ``NONE``; logins
+    are compared case-insensitively.
+    """
+
+    state: str = "all"
+    labels: tuple[str, ...] = ()
+    created: Range = (None, None)
+    updated: Range = (None, None)
+    comments: Range = (None, None)
+    assignee: str | None = None
+    creator: str | None = None
+    mentioned: str | None = None
+    milestone: str | None = None
+
+    @property
+    def users(self) -> list[tuple[str, str]]:
+        """``(role, lower-cased login)`` for each filter naming a specific user."""
+        named = ((ROLE_ASSIGNEE, self.assignee), (ROLE_CREATOR, self.creator), (ROLE_MENTIONED, self.mentioned))
+        return [(role, login.lower()) for role, login in named if login and login not in (ANY, NONE)]
+
+    @property
+    def is_trivial(self) -> bool:
+        return self == _NO_FILTER
+
+
+_NO_FILTER = MetadataFilter()
+
+
+class _Runs:
+    """A variable-length id list per slot, packed into one pool.
+
+    Slot ``s`` holds ``pool[start[s] : start[s] + count[s]]``.  Replacing a
+    list appends a fresh run; stale runs are reclaimed by compaction.
+    """
+
+    def __init__(self) -> None:
+        self.start = array("I")
+        self.count = array("H")
+        self.pool = array("I")
+        self._garbage = 0
+
+    def grow(self, extra: int) -> None:
+        self.start.frombytes(bytes(extra * self.start.itemsize))
+        self.count.frombytes(bytes(extra * self.count.itemsize))
+
+    def get(self, slot: int) -> list[int]:
+        start = self.start[slot]
+        return self.pool[start : start + self.count[slot]].tolist()
+
+    def put(self, slot: int, ids: list[int]) -> None:
+        self._garbage += self.count[slot]
+        self.start[slot] = len(self.pool)
+        self.count[slot] = len(ids)
+        self.pool.extend(ids)
+        if self._garbage > max(1024, len(self.pool) // 2):
+            self._compact()
+
+    def _compact(self) -> None:
+        pool = array("I")
+        for slot, (start, count) in enumerate(zip(self.start, self.count, strict=True)):
+            self.start[slot] = len(pool)
+            pool.extend(self.pool[start : start + count])
+        self.pool = pool
+        self._garbage = 0
+
+    def memory(self) -> int:
+        return sys.getsizeof(self.start) + sys.getsizeof(self.count) + sys.getsizeof(self.pool)
+
+
+class _Interned:
+    """Dense ids for strings (label names, user logins) within one repo."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def get(self, name: str) -> int | None:
+        return self._ids.get(name)
+
+    def memory(self) -> int:
+        return sys.getsizeof(self.names) + sys.getsizeof(self._ids) + sum(sys.getsizeof(n) for n in self.names)
+
+
+class _SortedSlots:
+    """Present slots ordered by ``(column[slot], slot)``, kept incrementally.
+
+    Stored as a list of sorted ``array("I")`` chunks plus each chunk's last
+    key, so an insert or removal is a bisect and a short ``memmove``.  A
+    slot must be removed *before* its column value changes and re-added
+    after.
+    """
+
+    CHUNK = 1024
+
+    def __init__(self, column: array, slots: Iterable[int]) -> None:
+        self._column = column
+        ordered = sorted(slots, key=self._key)
+        self._chunks = [array("I", ordered[i : i + self.CHUNK]) for i in range(0, len(ordered), self.CHUNK)]
+        self._maxes = [self._key(chunk[-1]) for chunk in self._chunks]
+
+    def _key(self, slot: int) -> int:
+        return self._column[slot] * _SLOT_SPAN + slot
+
+    def _locate(self, key: int) -> tuple[int, int]:
+        """Position of the first entry whose key is >= *key*."""
+        ci = bisect_left(self._maxes, key)
+        if ci == len(self._chunks):
+            return ci, 0
+        return ci, bisect_left(self._chunks[ci], key, key=self._key)
+
+    def add(self, slot: int) -> None:
+        key = self._key(slot)
+        if not self._chunks:
+            self._chunks.append(array("I", [slot]))
+            self._maxes.append(key)
+            return
+        ci = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+        chunk = self._chunks[ci]
+        chunk.insert(bisect_left(chunk, key, key=self._key), slot)
+        self._maxes[ci] = self._key(chunk[-1])
+        if len(chunk) > 2 * self.CHUNK:
+            head, tail = chunk[: self.CHUNK], chunk[self.CHUNK :]
+            self._chunks[ci : ci + 1] = [head, tail]
+            self._maxes[ci : ci + 1] = [self._key(head[-1]), self._key(tail[-1])]
+
+    def remove(self, slot: int) -> None:
+        ci, i = self._locate(self._key(slot))
+        chunk = self._chunks[ci]
+        del chunk[i]
+        if chunk:
+            self._maxes[ci] = self._key(chunk[-1])
+        else:
+            del self._chunks[ci], self._maxes[ci]
+
+    def _between(self, start: tuple[int, int], end: tuple[int, int]) -> Iterator[int]:
+        (cs, i), (ce, j) = start, end
+        if cs == len(self._chunks):
+            return
+        if cs == ce:
+            yield from self._chunks[cs][i:j]
+            return
+        yield from self._chunks[cs][i:]
+        for chunk in self._chunks[cs + 1 : ce]:
+            yield from chunk
+        if ce < len(self._chunks):
+            yield from self._chunks[ce][:j]
+
+    def count_from(self, value: int) -> int:
+        """How many slots have a column value >= *value*."""
+        ci, i = self._locate(value * _SLOT_SPAN)
+        return sum(map(len, self._chunks[ci:])) - i
+
+    def iter_from(self, value: int) -> Iterator[int]:
+        """Slots with a column value >= *value*, ascending by value."""
+        return self._between(self._locate(value * _SLOT_SPAN), (len(self._chunks), 0))
+
+    def iter(self, descending: bool) -> Iterator[int]:
+        """Slots by column value; equal values always in ascending slot order.
+
+        That matches a stable ``sorted(..., reverse=True)`` over ascending
+        slots, which is how the full sort orders ties.
+        """
+        if not descending:
+            for chunk in self._chunks:
+                yield from chunk
+            return
+        end = (len(self._chunks), 0)
+        while end != (0, 0):
+            ci, i = end
+            last = self._chunks[ci][i - 1] if i else self._chunks[ci - 1][-1]
+            start = self._locate(self._column[last] * _SLOT_SPAN)
+            yield from self._between(start, end)
+            end = start
+
+    def memory(self) -> int:
+        return sys.getsizeof(self._chunks) + sys.getsizeof(self._maxes) + sum(sys.getsizeof(c) for c in self._chunks)
+
+
+# Columns written by ``RepoMetadata.dump`` as raw buffers; the first is a bytearray.
+_DUMPED_COLUMNS = ("state", "created", "updated", "comments", "milestone", "author")
+_DUMPED_COMMENT_COLUMNS = ("comment_present", "comment_issue", "comment_created", "comment_updated")
+
+
+class RepoMetadata:
+    """Typed-array columns for one repo's issues.  Thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.state = bytearray()
+        self.created = array("q")
+        self.updated = array("q")
+        self.comments = array("I")
+        self.milestone = array("I")  # milestone number, 0 for none
+        self.author = array("I")  # creator's id in ``users``
+        self.labels = _Runs()  # ids in ``label_names``
+        self.assignees = _Runs()  # ids in ``users``
+        self.label_names = _Interned()
+        # Logins are matched case-insensitively, so they are interned lower-cased.
+        self.users = _Interned()
+        # Slots carrying each label id, per open/closed state, with any
+        # assignee, and per user id for each role.
+        self._label_bitmaps: dict[int, Bitmap] = {}
+        self._state_bitmaps = {STATE_OPEN: Bitmap(), STATE_CLOSED: Bitmap()}
+        self._assigned = Bitmap()
+        self._roles: dict[str, dict[int, Bitmap]] = {role: {} for role in ROLES}
+        # Mentions are tracked per source so an issue stays "mentioned" while
+        # its body or any of its comments still mention the user.
+        self._body_mentions: dict[int, frozenset[int]] = {}  # slot -> user ids
+        self._comment_mentions: dict[int, tuple[int, frozenset[int]]] = {}  # comment id -> (slot, user ids)
+        self._mention_counts: dict[tuple[int, int], int] = {}  # (user id, slot) -> sources
+        # Comments are only read for ``mentioned`` filters and comment lists;
+        # until then ``comments_indexed`` is False and comment writes are ignored.
+        self.comments_indexed = False
+        self._comment_pending: dict[int, tuple[dict[str, Any] | None, int]] | None = None
+        # Comment columns, by ``comment id - 1``, plus the comments ordered by
+        # update time and a tombstone per deletion seen since indexing, in
+        # deletion order, so "changed since T" is a seek.
+        self.comment_present = bytearray()
+        self.comment_issue = array("I")  # issue number, 0 if unknown
+        self.comment_created = array("q")
+        self.comment_updated = array("q")
+        self._comment_order = _SortedSlots(self.comment_updated, ())
+        self._comment_tombstones: list[tuple[int, int]] = []  # (deleted at, comment id)
+        # Sort orders per column name, built on first use by ``first`` and ``select``.
+        self._sorted: dict[str, _SortedSlots] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def has_issue(self, number: int) -> bool:
+        slot = number - 1
+        return 0 <= slot < len(self.state) and self.state[slot] != STATE_ABSENT
+
+    def has_comment(self, comment_id: int) -> bool:
+        slot = comment_id - 1
+        return 0 <= slot < len(self.comment_present) and self.comment_present[slot] == 1
+
+    # -- maintenance ---------------------------------------------------------
+
+    def _grow(self, size: int) -> None:
+        extra = size - len(self.state)
+        if extra <= 0:
+            return
+        self.state.extend(bytes(extra))
+        for column in (self.created, self.updated, self.comments, self.milestone, self.author):
+            column.frombytes(bytes(extra * column.itemsize))
+        self.labels.grow(extra)
+        self.assignees.grow(extra)
+
+    def _role_add(self, role: str, user_id: int, slot: int) -> None:
+        self._roles[role].setdefault(user_id, Bitmap()).add(slot)
+
+    def _role_discard(self, role: str, user_id: int, slot: int) -> None:
+        bitmap = self._roles[role].get(user_id)
+        if bitmap is not None:
+            bitmap.discard(slot)
+            if not bitmap:
+                del self._roles[role][user_id]
+
+    def _mention(self, user_ids: Iterable[int], slot: int, delta: int) -> None:
+        for user_id in user_ids:
+            key = (user_id, slot)
+            count = self._mention_counts.get(key, 0) + delta
+            if count > 0:
+                self._mention_counts[key] = count
+                if count == delta:
+                    self._role_add(ROLE_MENTIONED, user_id, slot)
+            else:
+                self._mention_counts.pop(key, None)
+                self._role_discard(ROLE_MENTIONED, user_id, slot)
+
+    def _set_sort_value(self, name: str, slot: int, value: int, old_state: int) -> None:
+        column: array = getattr(self, name)
+        present = old_state != STATE_ABSENT
+        if present and column[slot] == value:
+            return
+        index = self._sorted.get(name)
+        if index is not None and present:
+            index.remove(slot)
+        column[slot] = value
+        if index is not None:
+            index.add(slot)
+
+    def set(self, issue: dict[str, Any]) -> None:
+        """Record (or replace) an issue's metadata."""
+        slot = issue["number"] - 1
+        label_names = {lbl.get("name", "") if isinstance(lbl, dict) else str(lbl) for lbl in issue.get("labels") or []}
+        assignee_logins = {(user.get("login") or "").lower() for user in issue.get("assignees") or []}
+        creator_login = ((issue.get("user") or {}).get("login") or "").lower()
+        mention_logins = parse_mentions(issue.get("body"))
+        state = _STATE_CODES.get(issue.get("state", ""), STATE_OTHER)
+        with self._lock:
+            self._grow(slot + 1)
+            old_state = self.state[slot]
+            if old_state == STATE_ABSENT:
+                self._count += 1
+            if old_state != state:
+                if old_state in self._state_bitmaps:
+                    self._state_bitmaps[old_state].discard(slot)
+                if state in self._state_bitmaps:
+                    self._state_bitmaps[state].add(slot)
+            self.state[slot] = state
+            self._set_sort_value("created", slot, iso_epoch(issue.get("created_at")), old_state)
+            self._set_sort_value("updated", slot, iso_epoch(issue.get("updated_at")), old_state)
+            self._set_sort_value("comments", slot, issue.get("comments", 0), old_state)
+            self.milestone[slot] = (issue.get("milestone") or {}).get("number", 0)
+
+            label_ids = sorted(self.label_names.id(name) for name in label_names)
+            old_ids = self.labels.get(slot)
+            if old_ids != label_ids:
+                for label_id in set(old_ids).difference(label_ids):
+                    self._label_bitmaps[label_id].discard(slot)
+                for label_id in set(label_ids).difference(old_ids):
+                    self._label_bitmaps.setdefault(label_id, Bitmap()).add(slot)
+                self.labels.put(slot, label_ids)
+
+            creator = self.users.id(creator_login)
+            if old_state == STATE_ABSENT or self.author[slot] != creator:
+                if old_state != STATE_ABSENT:
+                    self._role_discard(ROLE_CREATOR, self.author[slot], slot)
+                self._role_add(ROLE_CREATOR, creator, slot)
+                self.author[slot] = creator
+
+            assignee_ids = sorted(self.users.id(login) for login in assignee_logins)
+            old_ids = self.assignees.get(slot)
+            if old_ids != assignee_ids:
+                for user_id in set(old_ids).difference(assignee_ids):
+                    self._role_discard(ROLE_ASSIGNEE, user_id, slot)
+                for user_id in set(assignee_ids).difference(old_ids):
+                    self._role_add(ROLE_ASSIGNEE, user_id, slot)
+                if assignee_ids:
+                    self._assigned.add(slot)
+                else:
+                    self._assigned.discard(slot)
+                self.assignees.put(slot, assignee_ids)
+
+            mentions = frozenset(self.users.id(login) for login in mention_logins)
+            old_mentions = self._body_mentions.get(slot, frozenset())
+            if mentions != old_mentions:
+                self._mention(old_mentions - mentions, slot, -1)
+                self._mention(mentions - old_mentions, slot, 1)
+                if mentions:
+                    self._body_mentions[slot] = mentions
+                else:
+                    del self._body_mentions[slot]
+
+    # -- comments ------------------------------------------------------------
+
+    def _apply_comment(
+        self, comment_id: int, comment: dict[str, Any] | None, at: int, *, scanned: bool = False
+    ) -> None:
+        """Index a comment, or with None a deletion at epoch *at*.
+
+        A deletion found by a scan (rather than seen as it happened) only
+        leaves a tombstone if the comment was indexed.
+        """
+        old = self._comment_mentions.pop(comment_id, None)
+        if old is not None:
+            self._mention(old[1], old[0], -1)
+        slot = comment_id - 1
+        extra = comment_id - len(self.comment_present)
+        if extra > 0:
+            self.comment_present.extend(bytes(extra))
+            for column in (self.comment_issue, self.comment_created, self.comment_updated):
+                column.frombytes(bytes(extra * column.itemsize))
+        present = self.comment_present[slot]
+        if present:
+            self._comment_order.remove(slot)
+        if comment is None:
+            self.comment_present[slot] = 0
+            if present or not scanned:
+                self._comment_tombstones.append((at, comment_id))
+            return
+        self.comment_present[slot] = 1
+        self.comment_issue[slot] = comment.get("issue_number") or 0
+        self.comment_created[slot] = iso_epoch(comment.get("created_at"))
+        self.comment_updated[slot] = iso_epoch(comment.get("updated_at"))
+        self._comment_order.add(slot)
+        if comment.get("issue_number") is None:
+            return
+        mentions = frozenset(self.users.id(login) for login in parse_mentions(comment.get("body")))
+        if mentions:
+            slot = comment["issue_number"] - 1
+            self._comment_mentions[comment_id] = (slot, mentions)
+            self._mention(mentions, slot, 1)
+
+    def set_comment(self, comment_id: int, comment: dict[str, Any] | None) -> None:
+        """Reflect a written (or, with None, deleted) comment in the comment index."""
+        with self._lock:
+            at = int(time.time())
+            if self._comment_pending is not None:
+                self._comment_pending[comment_id] = (comment, at)
+            elif self.comments_indexed:
+                self._apply_comment(comment_id, comment, at)
+
+    def begin_comment_scan(self) -> None:
+        """Start indexing stored comments; writes seen meanwhile are applied by ``end_comment_scan``."""
+        with self._lock:
+            self._comment_pending = {}
+
+    def scan_comment(self, comment_id: int, comment: dict[str, Any] | None) -> None:
+        """Index a stored comment; None records it as deleted."""
+        with self._lock:
+            self._apply_comment(comment_id, comment, int(time.time()), scanned=True)
+
+    def end_comment_scan(self, *, complete: bool) -> None:
+        with self._lock:
+            pending, self._comment_pending = self._comment_pending or {}, None
+            if complete:
+                for comment_id, (comment, at) in pending.items():
+                    self._apply_comment(comment_id, comment, at)
+                self.comments_indexed = True
+            else:
+                for comment_id in list(self._comment_mentions):
+                    self._apply_comment(comment_id, None, 0)
+                self.comment_present = bytearray()
+                self.comment_issue = array("I")
+                self.comment_created = array("q")
+                self.comment_updated = array("q")
+                self._comment_order = _SortedSlots(self.comment_updated, ())
+                self._comment_tombstones.clear()
+
+    def comment_ids(
+        self, *, issue_number: int | None = None, since: int = 0, field: str = "created_at", descending: bool = False
+    ) -> list[int]:
+        """Ids of indexed comments updated at or after *since* (epoch seconds), ordered by *field*.
+
+        Ties keep ascending id order.  With *since* the candidates come from
+        a seek in the update-time order, so the cost follows the number of
+        comments changed since then rather than the repo's size.
+        """
+        with self._lock:
+            if since:
+                slots = sorted(self._comment_order.iter_from(since))
+            else:
+                slots = list(itertools.compress(range(len(self.comment_present)), self.comment_present))
+            if issue_number is not None:
+                issue = self.comment_issue
+                slots = [s for s in slots if issue[s] == issue_number]
+            column = self.comment_updated if field == "updated_at" else self.comment_created
+            slots.sort(key=column.__getitem__, reverse=descending)
+            return [s + 1 for s in slots]
+
+    def deleted_comments(self, since: int) -> list[tuple[int, int]]:
+        """``(deleted at, comment id)`` for comments deleted at or after *since*, oldest first.
+
+        Only deletions seen since the comments were indexed are known.
+        """
+        with self._lock:
+            start = bisect_left(self._comment_tombstones, (since,))
+            return self._comment_tombstones[start:]
+
+    # -- queries -------------------------------------------------------------
+
+    def _mask_slots(self, column: array, bounds: Range, slots: list[int]) -> list[int]:
+        low, high = bounds
+        if low is not None:
+            slots = [s for s in slots if column[s] >= low]
+        if high is not None:
+            slots = [s for s in slots if column[s] <= high]
+        return slots
+
+    def excludes(self, where: MetadataFilter) -> bool:
+        """True if a label, assignee or creator in *where* never appears in the repo, so nothing matches.
+
+        Needs no comment index, so callers check it before scanning comments
+        for a ``mentioned`` filter.
+        """
+        with self._lock:
+            if any(self.label_names.get(name) is None for name in where.labels):
+                return True
+            for role, login in where.users:
+                if role == ROLE_MENTIONED:
+                    continue
+                user_id = self.users.get(login)
+                if user_id is None or user_id not in self._roles[role]:
+                    return True
+        return False
+
+    def select(self, where: MetadataFilter) -> list[int]:
+        """Slots passing *where*, ascending.
+
+        A ``mentioned`` filter needs ``comments_indexed``; the caller scans
+        the repo's comments first.
+        """
+        mask = _MASKS.get(where.state)
+        if mask is None:
+            return []
+        with self._lock:
+            bitmaps = self._bitmaps(where)
+            if bitmaps is None:
+                return []
+            since = where.updated[0]
+            if since is not None:
+                # A recent ``since`` (an incremental sync) matches few issues:
+                # seek in the update-time order instead of visiting every slot.
+                index = self._index("updated")
+                if index.count_from(since) < self._estimate(where, bitmaps):
+                    match = self._matcher(where, bitmaps)
+                    return [] if match is None else sorted(filter(match, index.iter_from(since)))
+            if bitmaps:
+                if where.state != "all":
+                    bitmaps.append(self._state_bitmaps[_STATE_CODES[where.state]])
+                slots = list(Bitmap.intersection(bitmaps))
+            else:
+                slots = list(itertools.compress(range(len(self.state)), self.state.translate(mask)))
+            if where.assignee == NONE:
+                slots = [s for s in slots if s not in self._assigned]
+            if where.milestone is not None:
+                milestone = self.milestone
+                if where.milestone == ANY:
+                    slots = [s for s in slots if milestone[s]]
+                elif where.milestone == NONE:
+                    slots = [s for s in slots if not milestone[s]]
+                elif where.milestone.isdigit():
+                    number = int(where.milestone)
+                    slots = [s for s in slots if milestone[s] == number]
+                else:
+                    return []
+            slots = self._mask_slots(self.created, where.created, slots)
+            slots = self._mask_slots(self.updated, where.updated, slots)
+            return self._mask_slots(self.comments, where.comments, slots)
+
+    def _bitmaps(self, where: MetadataFilter) -> list[Bitmap] | None:
+        """The membership bitmaps *where* intersects, or None if a label or user is unknown."""
+        bitmaps: list[Bitmap] = []
+        for name in where.labels:
+            label_id = self.label_names.get(name)
+            if label_id is None:
+                return None
+            bitmaps.append(self._label_bitmaps[label_id])
+        for role, login in where.users:
+            user_id = self.users.get(login)
+            bitmap = self._roles[role].get(user_id) if user_id is not None else None
+            if bitmap is None:
+                return None
+            bitmaps.append(bitmap)
+        if where.assignee == ANY:
+            bitmaps.append(self._assigned)
+        return bitmaps
+
+    def _estimate(self, where: MetadataFilter, bitmaps: list[Bitmap]) -> int:
+        """An upper bound on the slots passing *where*, from its smallest bitmap."""
+        if bitmaps:
+            return min(len(bitmap) for bitmap in bitmaps)
+        if where.state == "all":
+            return self._count
+        return len(self._state_bitmaps[_STATE_CODES[where.state]])
+
+    def _index(self, name: str) -> _SortedSlots:
+        """The sort order of column *name*, built on first use.  Hold the lock."""
+        index = self._sorted.get(name)
+        if index is None:
+            present = itertools.compress(range(len(self.state)), self.state.translate(_MASKS["all"]))
+            index = self._sorted[name] = _SortedSlots(getattr(self, name), present)
+        return index
+
+    def _matcher(self, where: MetadataFilter, bitmaps: list[Bitmap]) -> Callable[[int], bool] | None:
+        """A per-slot test equivalent to ``select``, or None if nothing can match."""
+        mask = _MASKS[where.state]
+        state = self.state
+        checks: list[Callable[[int], bool]] = [lambda s: mask[state[s]] == 1]
+        checks.extend(bitmap.__contains__ for bitmap in bitmaps)
+        if where.assignee == NONE:
+            assigned = self._assigned
+            checks.append(lambda s: s not in assigned)
+        if where.milestone is not None:
+            milestone = self.milestone
+            if where.milestone == ANY:
+                checks.append(lambda s: milestone[s] != 0)
+            elif where.milestone == NONE:
+                checks.append(lambda s: milestone[s] == 0)
+            elif where.milestone.isdigit():
+                number = int(where.milestone)
+                checks.append(lambda s: milestone[s] == number)
+            else:
+                return None
+        for column, (low, high) in (
+            (self.created, where.created),
+            (self.updated, where.updated),
+            (self.comments, where.comments),
+        ):
+            if low is not None:
+                checks.append(lambda s, column=column, low=low: column[s] >= low)
+            if high is not None:
+                checks.append(lambda s, column=column, high=high: column[s] <= high)
+        if len(checks) == 1:
+            return checks[0]
+        return lambda s: all(check(s) for check in checks)
+
+    def first(self, where: MetadataFilter, field: str, descending: bool, limit: int) -> list[int] | None:
+        """The first *limit* slots passing *where* in sort order, or None if a full sort is cheaper.
+
+        Walks the column's sort order, testing each slot, until *limit*
+        match.  With an estimated ``k`` of ``n`` slots matching, that visits
+        about ``limit * n / k`` slots; when that exceeds ``k`` (selective
+        filters), or the walk overruns its budget because range predicates
+        match less than estimated, it gives up and the caller falls back to
+        ``select`` + ``sort``.  It also gives up when a ``since`` bound leaves
+        fewer slots than the estimate, as ``select`` then seeks to them in
+        the update-time order.  Same ``mentioned`` caveat as ``select``.
+        """
+        if where.state not in _MASKS:
+            return []
+        name = SORT_COLUMNS[field]
+        with self._lock:
+            bitmaps = self._bitmaps(where)
+            if bitmaps is None:
+                return []
+            estimate = self._estimate(where, bitmaps)
+            since = where.updated[0]
+            if since is not None and self._index("updated").count_from(since) < estimate:
+                return None
+            if limit * self._count > estimate * estimate:
+                return None
+            match = self._matcher(where, bitmaps)
+            if match is None:
+                return []
+            index = self._index(name)
+            budget = estimate + limit
+            slots: list[int] = []
+            for slot in index.iter(descending):
+                budget -= 1
+                if budget < 0:
+                    return None
+                if match(slot):
+                    slots.append(slot)
+                    if len(slots) == limit:
+                        break
+            return slots
+
+    def label_slots(self, name: str) -> list[int]:
+        """Slots carrying a label named *name* in any letter case, ascending."""
+        folded = name.lower()
+        with self._lock:
+            slots: set[int] = set()
+            for label_id, label_name in enumerate(self.label_names.names):
+                if label_name.lower() == folded and label_id in self._label_bitmaps:
+                    slots.update(self._label_bitmaps[label_id])
+            return sorted(slots)
+
+    def column(self, field: str) -> array:
+        """The sort column for an issue field (``created_at``, ``updated_at`` or ``comments``)."""
+        return getattr(self, SORT_COLUMNS[field])
+
+    def sort(self, slots: list[int], field: str, descending: bool) -> list[int]:
+        """Order *slots* (ascending) by *field*; ties keep ascending number order."""
+        with self._lock:
+            return sorted(slots, key=self.column(field).__getitem__, reverse=descending)
+
+    def values(self, slots: list[int], field: str) -> list[int]:
+        with self._lock:
+            column = self.column(field)
+            return [column[s] for s in slots]
+
+    # -- snapshots -----------------------------------------------------------
+
+    def dump(self) -> tuple[dict[str, Any], dict[str, bytes]]:
+        """The persistent state, as a JSON-able document plus raw column buffers.
+
+        Bitmaps, mention counts and sort orders are derived and rebuilt by
+        ``restore``.  Comment columns are included once comments are indexed.
+        """
+        with self._lock:
+            self.labels._compact()
+            self.assignees._compact()
+            doc = {
+                "count": self._count,
+                "label_names": self.label_names.names,
+                "users": self.users.names,
+                "body_mentions": {str(slot): sorted(ids) for slot, ids in self._body_mentions.items()},
+                "comments_indexed": self.comments_indexed,
+            }
+            buffers = {name: bytes(getattr(self, name)) for name in _DUMPED_COLUMNS}
+            for name in ("labels", "assignees"):
+                runs: _Runs = getattr(self, name)
+                buffers.update({f"{name}.start": runs.start.tobytes(), f"{name}.count": runs.count.tobytes()})
+                buffers[f"{name}.pool"] = runs.pool.tobytes()
+            if self.comments_indexed:
+                doc["comment_mentions"] = {
+                    str(comment_id): [slot, sorted(ids)] for comment_id, (slot, ids) in self._comment_mentions.items()
+                }
+                buffers.update({name: bytes(getattr(self, name)) for name in _DUMPED_COMMENT_COLUMNS})
+                buffers["comment_tombstones"] = array("q", itertools.chain(*self._comment_tombstones)).tobytes()
+            return doc, buffers
+
+    @classmethod
+    def restore(cls, doc: dict[str, Any], buffers: dict[str, bytes]) -> RepoMetadata:
+        """Rebuild metadata from ``dump`` output.
+
+        ``comments_indexed`` stays False: the caller catches the comment
+        columns up inside a comment scan (``begin_comment_scan``), which
+        keeps them, and then ends it.
+        """
+        meta = cls()
+        meta.state = bytearray(buffers["state"])
+        for name in _DUMPED_COLUMNS[1:]:
+            getattr(meta, name).frombytes(buffers[name])
+        for name in ("labels", "assignees"):
+            runs: _Runs = getattr(meta, name)
+            for part in ("start", "count", "pool"):
+                getattr(runs, part).frombytes(buffers[f"{name}.{part}"])
+        for name in doc["label_names"]:
+            meta.label_names.id(name)
+        for login in doc["users"]:
+            meta.users.id(login)
+        meta._count = doc["count"]
+        for slot in itertools.compress(range(len(meta.state)), meta.state.translate(_MASKS["all"])):
+            if meta.state[slot] in meta._state_bitmaps:
+                meta._state_bitmaps[meta.state[slot]].add(slot)
+            for label_id in meta.labels.get(slot):
+                meta._label_bitmaps.setdefault(label_id, Bitmap()).add(slot)
+            meta._role_add(ROLE_CREATOR, meta.author[slot], slot)
+            assignee_ids = meta.assignees.get(slot)
+            for user_id in assignee_ids:
+                meta._role_add(ROLE_ASSIGNEE, user_id, slot)
+            if assignee_ids:
+                meta._assigned.add(slot)
+        for slot, ids in doc["body_mentions"].items():
+            meta._body_mentions[int(slot)] = frozenset(ids)
+            meta._mention(ids, int(slot), 1)
+        if doc["comments_indexed"]:
+            meta.comment_present = bytearray(buffers["comment_present"])
+            for name in _DUMPED_COMMENT_COLUMNS[1:]:
+                getattr(meta, name).frombytes(buffers[name])
+            present = itertools.compress(range(len(meta.comment_present)), meta.comment_present)
+            meta._comment_order = _SortedSlots(meta.comment_updated, present)
+            tombstones = array("q", buffers["comment_tombstones"])
+            meta._comment_tombstones = list(zip(tombstones[::2], tombstones[1::2], strict=True))
+            for comment_id, (slot, ids) in doc["comment_mentions"].items():
+                meta._comment_mentions[int(comment_id)] = (slot, frozenset(ids))
+                meta._mention(ids, slot, 1)
+        return meta
+
+    def memory(self) -> dict[str, Any]:
+        """Resident bytes per column (including array over-allocation)."""
+        with self._lock:
+            columns = {
+                name: sys.getsizeof(getattr(self, name))
+                for name in ("state", "created", "updated", "comments", "milestone", "author")
+            }
+            columns["labels"] = self.labels.memory()
+            columns["assignees"] = self.assignees.memory()
+            columns["label_names"] = self.label_names.memory()
+            columns["users"] = self.users.memory()
+            columns["label_bitmaps"] = sys.getsizeof(self._label_bitmaps) + sum(
+                bitmap.memory() for bitmap in self._label_bitmaps.values()
+            )
+            columns["state_bitmaps"] = sum(bitmap.memory() for bitmap in self._state_bitmaps.values())
+            columns["user_bitmaps"] = self._assigned.memory() + sum(
+                sys.getsizeof(bitmaps) + sum(bitmap.memory() for bitmap in bitmaps.values())
+                for bitmaps in self._roles.values()
+            )
+            columns["sort_indexes"] = sum(index.memory() for index in self._sorted.values())
+            columns["comments_index"] = (
+                sys.getsizeof(self.comment_present)
+                + sum(sys.getsizeof(c) for c in (self.comment_issue, self.comment_created, self.comment_updated))
+                + self._comment_order.memory()
+                + sys.getsizeof(self._comment_tombstones)
+            )
+            columns["mentions"] = (
+                sys.getsizeof(self._body_mentions)
+                + sys.getsizeof(self._comment_mentions)
+                + sys.getsizeof(self._mention_counts)
+            )
+            return {
+                "issues": self._count,
+                "slots": len(self.state),
+                "labels": len(self.label_names),
+                "users": len(self.users),
+                "bytes": sum(columns.values()),
+                "columns": columns,
+            }
+
+
+# -- search qualifiers -----------------------------------------------------------
+
+_QUALIFIER = re.compile(
+    r'(?<!\S)(is|state|label|repo|org|user|author|assignee|mentions|milestone|no|comments|created|updated):("[^"]*"|\S+)(?!\S)'
+)
+_RANGE = re.compile(r"^(>=|<=|>|<)?(.+?)(?:\.\.(.+))?$")
+
+
+def _parse_int(value: str, *, end: bool) -> int:
+    return int(value)
+
+
+def _parse_date(value: str, *, end: bool) -> int:
+    """Epoch seconds for a date or timestamp; ``end`` picks the last second of a bare date."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1, seconds=-1)
+    return int(parsed.timestamp())
+
+
+def _parse_range(value: str, parse) -> Range:
+    """``N``, ``>N``, ``>=N``, ``<N``, ``<=N`` or ``N..M``, as an inclusive range."""
+    match = _RANGE.match(value)
+    if match is None:
+        raise ValueError(value)
+    op, first, second = match.groups()
+    if second is not None:
+        if op:
+            raise ValueError(value)
+        return parse(first, end=False) if first != "*" else None, parse(second, end=True) if second != "*" else None
+    if op == ">":
+        return parse(first, end=True) + 1, None
+    if op == ">=":
+        return parse(first, end=False), None
+    if op == "<":
+        return None, parse(first, end=False) - 1
+    if op == "<=":
+        return None, parse(first, end=True)
+    return parse(first, end=False), parse(first, end=True)
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    """A search string split into free text and metadata qualifiers."""
+
+    text: str
+    where: MetadataFilter
+    repos: frozenset[str] = frozenset()  # "owner/repo"
+    owners: frozenset[str] = frozenset()
+
+    @property
+    def qualified(self) -> bool:
+        return bool(self.repos or self.owners) or not self.where.is_trivial
+
+
+def parse_search_query(query: str) -> SearchQuery:
+    """Split GitHub-style qualifiers out of *query*.
+
+    Supported: ``is:open|closed``, ``state:open|closed``, ``label:NAME``
+    (repeatable, all must match; quote names with spaces), ``repo:OWNER/NAME``,
+    ``org:`` / ``user:OWNER``, ``author:`` / ``assignee:`` / ``mentions:LOGIN``,
+    ``milestone:NUMBER``, ``no:assignee`` / ``no:milestone``, and ``comments:``,
+    ``created:``, ``updated:`` with ``N``, ``>N``, ``>=N``, ``<N``, ``<=N`` or
+    ``N..M`` (dates as ``YYYY-MM-DD`` or ISO-8601 timestamps).  Anything
+    else -- including a qualifier with an unparseable value -- is left in the
+    free text.
+    """
+    state = "all"
+    labels: list[str] = []
+    ranges: dict[str, Range] = {}
+    repos: set[str] = set()
+    owners: set[str] = set()
+    fields: dict[str, str] = {}  # MetadataFilter user/milestone fields
+
+    def take(match: re.Match[str]) -> str:
+        nonlocal state
+        key, value = match.group(1), match.group(2).strip('"')
+        try:
+            if key in ("is", "state") and value in ("open", "closed"):
+                state = value
+            elif key == "label":
+                labels.append(value)
+            elif key == "repo" and "/" in value:
+                repos.add(value)
+            elif key in ("org", "user"):
+                owners.add(value)
+            elif key == "author":
+                fields["creator"] = value
+            elif key == "assignee":
+                fields["assignee"] = value
+            elif key == "mentions":
+                fields["mentioned"] = value
+            elif key == "milestone" and value.isdigit():
+                fields["milestone"] = value
+            elif key == "no" and value in ("assignee", "milestone"):
+                fields[value] = NONE
+            elif key == "comments":
+                ranges[key] = _parse_range(value, _parse_int)
+            elif key in ("created", "updated"):
+                ranges[key] = _parse_range(value, _parse_date)
+            else:
+                return match.group(0)
+        except ValueError:
+            return match.group(0)
+        return ""
+
+    text = _QUALIFIER.sub(take, query)
+    if text == query:
+        return SearchQuery(query, _NO_FILTER)
+    where = MetadataFilter(
+        state=state,
+        labels=tuple(labels),
+        created=ranges.get("created", (None, None)),
+        updated=ranges.get("updated", (None, None)),
+        comments=ranges.get("comments", (None, None)),
+        **fields,
+    )
+    return SearchQuery(" ".join(text.split()), where, frozenset(repos), frozenset(owners))
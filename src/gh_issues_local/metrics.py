@@ -0,0 +1,319 @@
+"""Prometheus text-format metrics: request latency, storage calls, store counters and warm-up progress."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from gh_issues_local.request_stats import record_storage_call
+from gh_issues_local.storage import StorageBackend
+from gh_issues_local.tracing import record_span
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STORAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# Route label for requests that never reached a route, so arbitrary paths
+# can't create unbounded label values.
+UNMATCHED_ROUTE = "<unmatched>"
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram.  Not thread-safe; callers lock."""
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: _Labels) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts, strict=True):
+            cumulative += count
+            yield _sample(f"{name}_bucket", (*labels, ("le", str(bound))), cumulative)
+        yield _sample(f"{name}_sum", labels, self.sum)
+        yield _sample(f"{name}_count", labels, self.count)
+
+
+# -- request metrics ----------------------------------------------------------
+
+
+class RequestMetrics:
+    """Request counts and latency histograms per route template, plus in-flight gauges."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, int], int] = {}
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._in_flight: dict[str, int] = {}
+
+    def started(self, method: str) -> None:
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._in_flight[method] -= 1
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            lines = _header("gh_issues_local_http_requests_total", "counter", "HTTP requests by route and status.")
+            for (method, route, status), count in sorted(self._requests.items()):
+                labels = (("method", method), ("route", route), ("status", str(status)))
+                lines.append(_sample("gh_issues_local_http_requests_total", labels, count))
+            lines += _header(
+                "gh_issues_local_http_request_duration_seconds", "histogram", "HTTP request latency by route."
+            )
+            for (method, route), histogram in sorted(self._latency.items()):
+                labels = (("method", method), ("route", route))
+                lines.extend(histogram.samples("gh_issues_local_http_request_duration_seconds", labels))
+            lines += _header("gh_issues_local_http_requests_in_flight", "gauge", "Requests currently being served.")
+            for method, count in sorted(self._in_flight.items()):
+                lines.append(_sample("gh_issues_local_http_requests_in_flight", (("method", method),), count))
+        return lines
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Record latency and status per route template for every request.
+
+    The template (e.g. ``/repos/{owner}/{repo}/issues``) is read from the
+    scope after routing.  Requests answered before routing -- 401s from auth,
+    503s from admission control -- and unknown paths share ``UNMATCHED_ROUTE``.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        metrics: RequestMetrics = request.app.state.request_metrics
+        method = request.method
+        metrics.started(method)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            metrics.finished(method, route, status, time.perf_counter() - started)
+
+
+# -- storage metrics ----------------------------------------------------------
+
+
+class InstrumentedStorage:
+    """Wrap a storage backend, recording calls, errors, bytes and latency per operation."""
+
+    OPERATIONS = ("read", "write", "exists", "delete", "list")
+
+    def __init__(self, storage: StorageBackend) -> None:
+        self._storage = storage
+        self._lock = threading.Lock()
+        self.calls = dict.fromkeys(self.OPERATIONS, 0)
+        self.errors = dict.fromkeys(self.OPERATIONS, 0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._latency = {op: Histogram(STORAGE_BUCKETS) for op in self.OPERATIONS}
+
+    def _record(
+        self, op: str, path: str, started: float, *, failed: bool = False, read: int = 0, written: int = 0
+    ) -> None:
+        finished = time.perf_counter()
+        elapsed = finished - started
+        with self._lock:
+            self.calls[op] += 1
+            self.errors[op] += failed
+            self.bytes_read += read
+            self.bytes_written += written
+            self._latency[op].observe(elapsed)
+        record_storage_call(op, elapsed)
+        record_span(f"storage.{op}", started, finished, error=failed, **{"storage.path": path})
+
+    def _call(self, op: str, path: str) -> Any:
+        started = time.perf_counter()
+        try:
+            result = getattr(self._storage, op)(path)
+        except Exception:
+            self._record(op, path, started, failed=True)
+            raise
+        self._record(op, path, started)
+        return result
+
+    def render(self) -> list[str]:
+        with self._lock:
+            lines = _header(
+                "gh_issues_local_storage_operations_total", "counter", "Storage provider calls by operation."
+            )
+            lines += [
+                _sample("gh_issues_local_storage_operations_total", (("op", op),), n) for op, n in self.calls.items()
+            ]
+            lines += _header(
+                "gh_issues_local_storage_errors_total",
+                "counter",
+                "Storage provider calls that raised (including not-found) by operation.",
+            )
+            lines += [
+                _sample("gh_issues_local_storage_errors_total", (("op", op),), n) for op, n in self.errors.items()
+            ]
+            lines += _header(
+                "gh_issues_local_storage_bytes_total", "counter", "Bytes moved through the storage provider."
+            )
+            lines.append(_sample("gh_issues_local_storage_bytes_total", (("direction", "read"),), self.bytes_read))
+            lines.append(
+                _sample("gh_issues_local_storage_bytes_total", (("direction", "written"),), self.bytes_written)
+            )
+            lines += _header(
+                "gh_issues_local_storage_operation_duration_seconds",
+                "histogram",
+                "Storage provider call latency by operation.",
+            )
+            for op, histogram in self._latency.items():
+                lines.extend(histogram.samples("gh_issues_local_storage_operation_duration_seconds", (("op", op),)))
+        return lines
+
+    def read(self, path: str) -> bytes:
+        started = time.perf_counter()
+        try:
+            data = self._storage.read(path)
+        except Exception:
+            self._record("read", path, started, failed=True)
+            raise
+        self._record("read", path, started, read=len(data))
+        return data
+
+    def write(self, path: str, data: bytes) -> None:
+        started = time.perf_counter()
+        try:
+            self._storage.write(path, data)
+        except Exception:
+            self._record("write", path, started, failed=True)
+            raise
+        self._record("write", path, started, written=len(data))
+
+    def exists(self, path: str) -> bool:
+        return self._call("exists", path)
+
+    def delete(self, path: str) -> None:
+        self._call("delete", path)
+
+    def list(self, path: str) -> list[str]:
+        return self._call("list", path)
+
+
+# -- exposition -----------------------------------------------------------------
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: _Labels, value: float) -> str:
+    if labels:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f"{name}{{{label_text}}} {value}"
+    return f"{name} {value}"
+
+
+def _header(name: str, kind: str, help_text: str) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _store_lines(app: FastAPI) -> list[str]:
+    store_stats = app.state.issue_store.stats()
+    lines: list[str] = []
+
+    cache = store_stats["query_cache"]
+    lookups = cache["hits"] + cache["misses"]
+    lines += _header("gh_issues_local_query_cache_lookups_total", "counter", "Query cache lookups by result.")
+    lines.append(_sample("gh_issues_local_query_cache_lookups_total", (("result", "hit"),), cache["hits"]))
+    lines.append(_sample("gh_issues_local_query_cache_lookups_total", (("result", "miss"),), cache["misses"]))
+    lines += _header("gh_issues_local_query_cache_hit_ratio", "gauge", "Query cache hits / lookups since start.")
+    lines.append(_sample("gh_issues_local_query_cache_hit_ratio", (), cache["hits"] / lookups if lookups else 0.0))
+    lines += _header("gh_issues_local_query_cache_entries", "gauge", "Entries held in the query cache.")
+    lines.append(_sample("gh_issues_local_query_cache_entries", (), cache["entries"]))
+
+    flight = store_stats["single_flight"]
+    lines += _header("gh_issues_local_scans_total", "counter", "List/search scans, executed or coalesced.")
+    lines.append(_sample("gh_issues_local_scans_total", (("result", "executed"),), flight["executed"]))
+    lines.append(_sample("gh_issues_local_scans_total", (("result", "coalesced"),), flight["coalesced"]))
+    lines += _header("gh_issues_local_scans_in_flight", "gauge", "Distinct scans currently running.")
+    lines.append(_sample("gh_issues_local_scans_in_flight", (), flight["in_flight"]))
+
+    admission = app.state.admission.stats()
+    for name, kind, help_text in (
+        ("admitted", "counter", "Requests admitted per cost class."),
+        ("rejected", "counter", "Requests shed with 503 per cost class."),
+        ("active", "gauge", "Requests running per cost class."),
+        ("waiting", "gauge", "Requests queued per cost class."),
+    ):
+        metric = f"gh_issues_local_admission_{name}" + ("_total" if kind == "counter" else "")
+        lines += _header(metric, kind, help_text)
+        lines += [_sample(metric, (("class", cls),), gate[name]) for cls, gate in admission.items()]
+
+    totals = app.state.issue_store.totals()
+    lines += _header("gh_issues_local_repos", "gauge", "Repos with at least one issue.")
+    lines.append(_sample("gh_issues_local_repos", (), totals["repos"]))
+    lines += _header("gh_issues_local_issues", "gauge", "Stored issues.")
+    lines.append(_sample("gh_issues_local_issues", (), totals["issues"]))
+    lines += _header("gh_issues_local_comments", "gauge", "Stored comments.")
+    lines.append(_sample("gh_issues_local_comments", (), totals["comments"]))
+    lines += _header("gh_issues_local_metadata_index_bytes", "gauge", "Resident bytes of the columnar issue metadata.")
+    lines.append(
+        _sample("gh_issues_local_metadata_index_bytes", (), app.state.issue_store.index_memory()["total_bytes"])
+    )
+    return lines
+
+
+def _warmup_lines(app: FastAPI) -> list[str]:
+    warmup = app.state.warmup
+    progress = warmup.progress()
+    lines = _header("gh_issues_local_ready", "gauge", "1 once the index restore and warm-up have finished.")
+    lines.append(_sample("gh_issues_local_ready", (), int(warmup.ready)))
+    lines += _header("gh_issues_local_warmup_repos", "gauge", "Repos restored, warmed or failed by the warm-up.")
+    for state in ("restored", "warmed", "failed", "total"):
+        lines.append(_sample("gh_issues_local_warmup_repos", (("state", state),), progress[f"{state}_repos"]))
+    lines += _header("gh_issues_local_warmup_seconds", "gauge", "Time spent in the warm-up so far.")
+    lines.append(_sample("gh_issues_local_warmup_seconds", (), progress["elapsed_seconds"]))
+    return lines
+
+
+def _tracing_lines(app: FastAPI) -> list[str]:
+    lines = _header(
+        "gh_issues_local_traces_dropped_total", "counter", "Sampled traces dropped because the export queue was full."
+    )
+    lines.append(_sample("gh_issues_local_traces_dropped_total", (), app.state.tracer.dropped_traces))
+    return lines
+
+
+def render_metrics(app: FastAPI) -> str:
+    """The full metrics page in Prometheus text exposition format."""
+    lines = app.state.request_metrics.render()
+    lines += app.state.storage_metrics.render()
+    lines += _store_lines(app)
+    lines += _warmup_lines(app)
+    lines += _tracing_lines(app)
+    return "\n".join(lines) + "\n"
@@ -39,3 +39,19 @@ class UpdateCommentRequest(BaseModel):
     """Request body for PATCH /repos/{owner}/{repo}/issues/comments/{comment_id}."""
 
     body: str
+
+
+class CreateLabelRequest(BaseModel):
+    """Request body for POST /repos/{owner}/{repo}/labels."""
+
+    name: str
+    color: str | None = None
+    description: str | None = None
+
+
+class UpdateLabelRequest(BaseModel):
+    """Request body for PATCH /repos/{owner}/{repo}/labels/{name}."""
+
+    new_name: str | None = None
+    color: str | None = None
+    description: str | None = None
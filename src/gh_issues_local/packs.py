@@ -0,0 +1,357 @@
+"""Packed per-repo archives of issue and comment documents.
+
+A pack is three files in ``<packs dir>/{owner}/{repo}/``:
+
+* ``pack-NNNNNN.dat`` -- the raw JSON documents, concatenated in (kind, id)
+  order, so a cold scan of a repo is one sequential read.
+* ``pack-NNNNNN.idx`` -- a header plus fixed-width ``(kind, length, id,
+  offset)`` entries in the same order.  It is memory-mapped and
+  binary-searched, so a point lookup is one seek into the data file.
+* ``pack-NNNNNN.tomb`` -- append-only ``(kind, id)`` records for packed
+  documents that were since rewritten as loose files or deleted.
+
+``CURRENT`` names the live pack.  Packs are immutable: the loose files in the
+storage provider remain the place writes go, and a write tombstones the
+packed copy.  ``IssueStore.repack`` folds loose files into a new pack, either
+on demand (``--repack``) or periodically from a ``Repacker`` thread.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from gh_issues_local.storage import IssueStore
+
+logger = logging.getLogger(__name__)
+
+KIND_ISSUE = 0
+KIND_COMMENT = 1
+
+DEFAULT_REPACK_INTERVAL = 3600.0
+DEFAULT_REPACK_MIN_LOOSE = 100
+
+_MAGIC = b"GHIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHxxQ")  # magic, version, entry count
+_ENTRY = struct.Struct("<BxxxIQQ")  # kind, length, id, offset
+_TOMBSTONE = struct.Struct("<BQ")  # kind, id
+
+_RepoKey = tuple[str, str]
+
+
+class PackFormatError(Exception):
+    """Raised when a pack index is truncated or has an unknown format."""
+
+
+class _IndexView:
+    """Sequence of ``(kind, id)`` keys read straight from the mapped index, for ``bisect``."""
+
+    def __init__(self, index: mmap.mmap, count: int) -> None:
+        self._index = index
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> tuple[int, int]:
+        kind, _, doc_id, _ = _ENTRY.unpack_from(self._index, _HEADER.size + i * _ENTRY.size)
+        return kind, doc_id
+
+
+class RepoPack:
+    """One immutable pack plus its tombstones."""
+
+    def __init__(self, directory: Path, name: str) -> None:
+        self.name = name
+        self._data_file = (directory / f"{name}.dat").open("rb")
+        self._index_file = (directory / f"{name}.idx").open("rb")
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._index, 0)
+        if magic != _MAGIC or version != _VERSION or len(self._index) != _HEADER.size + count * _ENTRY.size:
+            raise PackFormatError(f"Bad pack index {directory / name}.idx")
+        self._keys = _IndexView(self._index, count)
+        self._tombstone_path = directory / f"{name}.tomb"
+        self._tombstones: set[tuple[int, int]] = set()
+        self._tombstones_read = 0
+        self.refresh_tombstones()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def refresh_tombstones(self) -> None:
+        """Pick up tombstones appended by another process since the last call."""
+        try:
+            with self._tombstone_path.open("rb") as f:
+                f.seek(self._tombstones_read)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        usable = len(data) - len(data) % _TOMBSTONE.size
+        self._tombstones.update(_TOMBSTONE.iter_unpack(data[:usable]))
+        self._tombstones_read += usable
+
+    def _find(self, kind: int, doc_id: int) -> int | None:
+        key = (kind, doc_id)
+        i = bisect_left(self._keys, key)
+        return i if i < len(self._keys) and self._keys[i] == key else None
+
+    def _entry(self, i: int) -> tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._index, _HEADER.size + i * _ENTRY.size)
+
+    def contains(self, kind: int, doc_id: int) -> bool:
+        """True if the pack holds a live (not tombstoned) copy of the document."""
+        return (kind, doc_id) not in self._tombstones and self._find(kind, doc_id) is not None
+
+    def get(self, kind: int, doc_id: int) -> bytes | None:
+        if (kind, doc_id) in self._tombstones:
+            return None
+        i = self._find(kind, doc_id)
+        if i is None:
+            return None
+        _, length, _, offset = self._entry(i)
+        return self._data[offset : offset + length]
+
+    def ids(self, kind: int) -> list[int]:
+        """Live ids of *kind*, ascending."""
+        return [doc_id for k, doc_id in self._iter_keys(kind) if (k, doc_id) not in self._tombstones]
+
+    def _iter_keys(self, kind: int) -> Iterator[tuple[int, int]]:
+        for i in range(bisect_left(self._keys, (kind, -1)), len(self._keys)):
+            key = self._keys[i]
+            if key[0] != kind:
+                return
+            yield key
+
+    def documents(self) -> Iterator[tuple[int, int, bytes]]:
+        """Every live ``(kind, id, data)`` in pack order (one sequential pass)."""
+        for i in range(len(self._keys)):
+            kind, length, doc_id, offset = self._entry(i)
+            if (kind, doc_id) not in self._tombstones:
+                yield kind, doc_id, self._data[offset : offset + length]
+
+    def tombstone(self, kind: int, doc_id: int) -> None:
+        if (kind, doc_id) in self._tombstones or self._find(kind, doc_id) is None:
+            return
+        with self._tombstone_path.open("ab") as f:
+            f.write(_TOMBSTONE.pack(kind, doc_id))
+            f.flush()
+            os.fsync(f.fileno())
+        self._tombstones.add((kind, doc_id))
+        self._tombstones_read += _TOMBSTONE.size
+
+
+def _write_pack(directory: Path, name: str, documents: Iterable[tuple[int, int, bytes]]) -> int:
+    """Write ``name.dat`` / ``name.idx`` from *documents* (any order).  Returns the entry count."""
+    docs = sorted(documents, key=lambda doc: (doc[0], doc[1]))
+    entries: list[bytes] = []
+    offset = 0
+    data_path = directory / f"{name}.dat"
+    with data_path.open("wb") as f:
+        for kind, doc_id, data in docs:
+            f.write(data)
+            entries.append(_ENTRY.pack(kind, len(data), doc_id, offset))
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    index_tmp = directory / f"{name}.idx.tmp"
+    with index_tmp.open("wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(entries)))
+        f.write(b"".join(entries))
+        f.flush()
+        os.fsync(f.fileno())
+    index_tmp.replace(directory / f"{name}.idx")
+    return len(entries)
+
+
+class RepackSession:
+    """A repack in progress.
+
+    The caller sets ``documents``; writes seen while the session is open
+    (``dirty``) are tombstoned in the new pack.
+    """
+
+    def __init__(self) -> None:
+        self.documents: list[tuple[int, int, bytes]] | None = None
+        self.dirty: set[tuple[int, int]] = set()
+
+
+class PackStore:
+    """The live pack of every repo under *root*."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._packs: dict[_RepoKey, RepoPack | None] = {}
+        self._sessions: dict[_RepoKey, RepackSession] = {}
+        self._repack_locks: dict[_RepoKey, threading.Lock] = {}
+
+    def _directory(self, owner: str, repo: str) -> Path:
+        return self.root / owner / repo
+
+    def _open(self, owner: str, repo: str) -> RepoPack | None:
+        directory = self._directory(owner, repo)
+        try:
+            name = (directory / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+        return RepoPack(directory, name) if name else None
+
+    def pack(self, owner: str, repo: str) -> RepoPack | None:
+        key = (owner, repo)
+        try:
+            return self._packs[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._packs:
+                self._packs[key] = self._open(owner, repo)
+            return self._packs[key]
+
+    def refresh(self, owner: str, repo: str) -> None:
+        """Re-read ``CURRENT`` and tombstones written by another process."""
+        pack = self._open(owner, repo)
+        current = self._packs.get((owner, repo))
+        if current is not None and pack is not None and current.name == pack.name:
+            current.refresh_tombstones()
+        else:
+            self._packs[(owner, repo)] = pack
+
+    def repos(self) -> list[_RepoKey]:
+        """Repos that have a pack on disk."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            (owner_dir.name, repo_dir.name)
+            for owner_dir in self.root.iterdir()
+            if owner_dir.is_dir()
+            for repo_dir in owner_dir.iterdir()
+            if (repo_dir / "CURRENT").is_file()
+        )
+
+    def get(self, owner: str, repo: str, kind: int, doc_id: int) -> bytes | None:
+        pack = self.pack(owner, repo)
+        return pack.get(kind, doc_id) if pack is not None else None
+
+    def contains(self, owner: str, repo: str, kind: int, doc_id: int) -> bool:
+        pack = self.pack(owner, repo)
+        return pack is not None and pack.contains(kind, doc_id)
+
+    def ids(self, owner: str, repo: str, kind: int) -> list[int]:
+        pack = self.pack(owner, repo)
+        return pack.ids(kind) if pack is not None else []
+
+    def invalidate(self, owner: str, repo: str, kind: int, doc_id: int) -> None:
+        """Mark the packed copy of a document stale.  Call after its loose file was written or deleted."""
+        key = (owner, repo)
+        if key not in self._sessions and self.pack(owner, repo) is None:
+            return
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                session.dirty.add((kind, doc_id))
+            pack = self._packs.get(key)
+            if pack is not None:
+                pack.tombstone(kind, doc_id)
+
+    @contextmanager
+    def repacking(self, owner: str, repo: str) -> Iterator[RepackSession]:
+        """Build a new pack for a repo and make it live when the block exits cleanly.
+
+        Documents written via ``invalidate`` while the block runs are
+        tombstoned in the new pack before it goes live.
+        """
+        key = (owner, repo)
+        with self._lock:
+            repack_lock = self._repack_locks.setdefault(key, threading.Lock())
+        with repack_lock:
+            session = RepackSession()
+            with self._lock:
+                self._sessions[key] = session
+            try:
+                yield session
+                if session.documents is None:
+                    return
+                directory = self._directory(owner, repo)
+                directory.mkdir(parents=True, exist_ok=True)
+                old = self.pack(owner, repo)
+                name = f"pack-{int(old.name.removeprefix('pack-')) + 1 if old else 1:06d}"
+                count = _write_pack(directory, name, session.documents)
+                new = RepoPack(directory, name) if count else None
+                with self._lock:
+                    if new is not None:
+                        for kind, doc_id in session.dirty:
+                            new.tombstone(kind, doc_id)
+                    current_tmp = directory / "CURRENT.tmp"
+                    current_tmp.write_text(f"{name}\n" if new is not None else "")
+                    current_tmp.replace(directory / "CURRENT")
+                    self._packs[key] = new
+                self._remove_stale(directory, keep=name if new is not None else None)
+            finally:
+                with self._lock:
+                    del self._sessions[key]
+
+    def drop(self, owner: str, repo: str) -> None:
+        """Retire a repo's pack (after its documents were written back as loose files)."""
+        directory = self._directory(owner, repo)
+        with self._lock:
+            if (directory / "CURRENT").is_file():
+                (directory / "CURRENT").unlink()
+            self._packs[(owner, repo)] = None
+        self._remove_stale(directory, keep=None)
+
+    @staticmethod
+    def _remove_stale(directory: Path, keep: str | None) -> None:
+        # Open mappings of a removed pack stay valid until released.
+        for path in directory.glob("pack-*"):
+            if keep is None or not path.name.startswith(f"{keep}."):
+                path.unlink(missing_ok=True)
+
+
+class Repacker:
+    """Background thread that repacks repos with enough loose documents every *interval* seconds."""
+
+    def __init__(self, store: IssueStore, *, interval: float, min_loose: int) -> None:
+        self.store = store
+        self.interval = interval
+        self.min_loose = min_loose
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls, store: IssueStore) -> Repacker | None:
+        """Configured from ``GH_ISSUES_LOCAL_REPACK_INTERVAL`` (``0`` disables) and ``GH_ISSUES_LOCAL_REPACK_MIN_LOOSE``."""
+        interval = float(os.environ.get("GH_ISSUES_LOCAL_REPACK_INTERVAL", DEFAULT_REPACK_INTERVAL))
+        if interval <= 0:
+            return None
+        min_loose = int(os.environ.get("GH_ISSUES_LOCAL_REPACK_MIN_LOOSE", DEFAULT_REPACK_MIN_LOOSE))
+        return cls(store, interval=interval, min_loose=min_loose)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="gh-issues-local-repack", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                packed = self.store.repack_all(self.min_loose)
+            except Exception:
+                logger.exception("repack failed")
+                continue
+            for name, count in packed.items():
+                logger.info("repacked %s: %d documents", name, count)
@@ -0,0 +1,163 @@
+"""Opt-in per-request cProfile capture.
+
+When enabled (``GH_ISSUES_LOCAL_PROFILING=1``), a request is profiled if it
+carries ``X-Profile: 1`` or ``?profile=1``, or is picked by random sampling
+at ``GH_ISSUES_LOCAL_PROFILE_SAMPLE_RATE``.  The pstats dump and a small JSON
+sidecar are written to ``<data dir>/profiles``.
+
+cProfile hooks every thread through ``sys.monitoring``, so a capture also
+picks up the threadpool worker running the handler -- and any request served
+concurrently.  Only one profiler can be active per process, so requests that
+arrive while a capture is running are served unprofiled.
+"""
+
+from __future__ import annotations
+
+import cProfile
+from datetime import UTC, datetime
+import io
+import json
+import os
+from pathlib import Path
+import pstats
+import random
+import re
+import threading
+import time
+from typing import Any
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from gh_issues_local.auth import _is_protected
+
+DEFAULT_PROFILE_KEEP = 100
+PROFILE_HEADER = "X-Profile"
+
+_ID_PATTERN = re.compile(r"^[0-9A-Za-z_.-]+$")
+
+
+class Profiler:
+    """Capture settings plus the on-disk store of profiles."""
+
+    def __init__(self, directory: Path, *, enabled: bool, sample_rate: float = 0.0, keep: int = DEFAULT_PROFILE_KEEP):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self._active = threading.Lock()
+
+    @classmethod
+    def from_env(cls, data_dir: Path) -> Profiler:
+        return cls(
+            data_dir / "profiles",
+            enabled=os.environ.get("GH_ISSUES_LOCAL_PROFILING", "") not in ("", "0"),
+            sample_rate=float(os.environ.get("GH_ISSUES_LOCAL_PROFILE_SAMPLE_RATE", "0")),
+            keep=int(os.environ.get("GH_ISSUES_LOCAL_PROFILE_KEEP", DEFAULT_PROFILE_KEEP)),
+        )
+
+    def wants(self, request: Request) -> bool:
+        if not self.enabled:
+            return False
+        if request.headers.get(PROFILE_HEADER) == "1" or request.query_params.get("profile") == "1":
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def try_start(self) -> cProfile.Profile | None:
+        """Start a capture, or return None if one is already running."""
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another sys.monitoring profiler (e.g. a debugger) is active
+            self._active.release()
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, meta: dict[str, Any]) -> str:
+        """Stop *profile*, persist it with *meta* and return its id."""
+        profile.disable()
+        self._active.release()
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+        route = re.sub(r"[^0-9A-Za-z]+", "_", meta["route"]).strip("_")[:80] or "root"
+        profile_id = f"{stamp}-{meta['method'].lower()}-{route}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.directory / f"{profile_id}.prof")
+        (self.directory / f"{profile_id}.json").write_text(json.dumps({"id": profile_id, **meta}))
+        self._prune()
+        return profile_id
+
+    def _prune(self) -> None:
+        dumps = sorted(self.directory.glob("*.prof"))
+        for old in dumps[: max(0, len(dumps) - self.keep)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+
+    def captured(self) -> list[dict[str, Any]]:
+        """Captured profiles, newest first."""
+        if not self.directory.is_dir():
+            return []
+        profiles: list[dict[str, Any]] = []
+        for sidecar in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                meta = json.loads(sidecar.read_text())
+            except (OSError, ValueError):
+                continue
+            dump = sidecar.with_suffix(".prof")
+            if dump.is_file():
+                profiles.append({**meta, "size": dump.stat().st_size})
+        return profiles
+
+    def path(self, profile_id: str) -> Path | None:
+        if not _ID_PATTERN.match(profile_id):
+            return None
+        dump = self.directory / f"{profile_id}.prof"
+        return dump if dump.is_file() else None
+
+    def report(self, profile_id: str, *, sort: str = "cumulative", limit: int = 50) -> str | None:
+        """Text ``pstats`` report for a stored profile."""
+        dump = self.path(profile_id)
+        if dump is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(str(dump), stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Wrap requests selected by ``Profiler.wants`` in a cProfile capture."""
+
+    async def dispatch(self, request: Request, call_next):
+        profiler: Profiler = request.app.state.profiler
+        # With auth on, only data/API paths -- which have passed the token check
+        # by the time they get here -- may be profiled.
+        if not profiler.wants(request) or (request.app.state.auth_required and not _is_protected(request.url.path)):
+            return await call_next(request)
+
+        profile = profiler.try_start()
+        if profile is None:
+            response = await call_next(request)
+            response.headers[PROFILE_HEADER] = "busy"
+            return response
+
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            profile_id = profiler.finish(
+                profile,
+                {
+                    "method": request.method,
+                    "route": getattr(request.scope.get("route"), "path", None) or request.url.path,
+                    "path": request.url.path,
+                    "query": str(request.url.query),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "created_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                },
+            )
+        response.headers[PROFILE_HEADER] = profile_id
+        return response
@@ -0,0 +1,53 @@
+"""LRU cache of query results validated against repo mutation generations."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+import threading
+from typing import Any
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class QueryCache:
+    """Map (endpoint, normalized params) to a sorted, filtered id list.
+
+    Each entry is stored with a *validator* -- the generation counter(s) of the
+    repos the query covered, captured before the scan started.  A lookup only
+    hits when the caller's current validator is equal, so any write to a
+    covered repo invalidates exactly the entries that depend on it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, validator: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != validator:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, validator: Hashable, ids: Any) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (validator, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,131 @@
+"""Per-request accounting of storage, parse and serialize time.
+
+A ``RequestStats`` is bound to a context variable for the lifetime of each
+request.  ``InstrumentedStorage`` adds every storage call to it, the store's
+JSON parsing goes through ``parse_json`` and responses are rendered by the
+timed ``JSONResponse`` below, so the work a request caused is attributed to
+it even though handlers run in the threadpool.  The totals are reported in a
+``Server-Timing`` header and, past a threshold, in the slow-request log.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from fastapi.responses import JSONResponse as _JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_REQUEST_MS = 1000.0
+
+
+@dataclass
+class RequestStats:
+    """Work done on behalf of one request."""
+
+    storage_calls: dict[str, int] = field(default_factory=dict)
+    storage_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+    @property
+    def storage_call_count(self) -> int:
+        return sum(self.storage_calls.values())
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("gh_issues_local_request_stats", default=None)
+
+
+def current() -> RequestStats | None:
+    """The stats object for the request being served, if any."""
+    return _current.get()
+
+
+def record_storage_call(op: str, seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.storage_calls[op] = stats.storage_calls.get(op, 0) + 1
+        stats.storage_seconds += seconds
+
+
+def parse_json(data: bytes) -> Any:
+    """``json.loads``, with the time charged to the current request."""
+    started = time.perf_counter()
+    value = json.loads(data)
+    stats = _current.get()
+    if stats is not None:
+        stats.parse_seconds += time.perf_counter() - started
+    return value
+
+
+class JSONResponse(_JSONResponse):
+    """``JSONResponse`` that charges rendering time to the current request."""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = super().render(content)
+        stats = _current.get()
+        if stats is not None:
+            stats.serialize_seconds += time.perf_counter() - started
+        return body
+
+
+def _server_timing(stats: RequestStats, total_seconds: float) -> str:
+    return ", ".join(
+        (
+            f'storage;dur={stats.storage_seconds * 1000:.3f};desc="{stats.storage_call_count} calls"',
+            f"parse;dur={stats.parse_seconds * 1000:.3f}",
+            f"serialize;dur={stats.serialize_seconds * 1000:.3f}",
+            f"total;dur={total_seconds * 1000:.3f}",
+        )
+    )
+
+
+class RequestStatsMiddleware(BaseHTTPMiddleware):
+    """Bind a ``RequestStats`` per request; add ``Server-Timing`` and log slow requests.
+
+    The slow-request threshold comes from ``GH_ISSUES_LOCAL_SLOW_REQUEST_MS``
+    (default 1000; ``0`` disables the log).
+    """
+
+    def __init__(self, app, slow_request_ms: float | None = None) -> None:
+        super().__init__(app)
+        if slow_request_ms is None:
+            slow_request_ms = float(os.environ.get("GH_ISSUES_LOCAL_SLOW_REQUEST_MS", DEFAULT_SLOW_REQUEST_MS))
+        self.slow_request_seconds = slow_request_ms / 1000 if slow_request_ms > 0 else None
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+        response.headers["Server-Timing"] = _server_timing(stats, elapsed)
+        if self.slow_request_seconds is not None and elapsed >= self.slow_request_seconds:
+            route = getattr(request.scope.get("route"), "path", None) or request.url.path
+            logger.warning(
+                "slow request: %s %s %.1fms status=%d params=%s query=%s storage_calls=%s storage_ms=%.1f "
+                "parse_ms=%.1f serialize_ms=%.1f",
+                request.method,
+                route,
+                elapsed * 1000,
+                response.status_code,
+                request.path_params,
+                dict(request.query_params),
+                stats.storage_calls,
+                stats.storage_seconds * 1000,
+                stats.parse_seconds * 1000,
+                stats.serialize_seconds * 1000,
+            )
+        return response
@@ -5,9 +5,9 @@ from __future__ import annotations
 from typing import Any
 
 from fastapi import APIRouter, Query, Request
-from fastapi.responses import JSONResponse
 
 from gh_issues_local.models import CreateCommentRequest, UpdateCommentRequest
+from gh_issues_local.request_stats import JSONResponse
 from gh_issues_local.storage import IssueStore
 
 router = APIRouter()
@@ -27,7 +27,7 @@ def _get_store(request: Request) -> IssueStore:
 # 1. GET /repos/{owner}/{repo}/issues/comments  --  issues/list-comments-for-repo
 # ---------------------------------------------------------------------------
 @router.get("/repos/{owner}/{repo}/issues/comments")
-async def list_comments_for_repo(
+def list_comments_for_repo(
     request: Request,
     owner: str,
     repo: str,
@@ -49,11 +49,36 @@ async def list_comments_for_repo(
     )
 
 
+# ---------------------------------------------------------------------------
+# GET /repos/{owner}/{repo}/issues/comments/deleted  --  local extension
+# (registered before the {comment_id} routes).  GitHub has no way to learn
+# about deleted comments; incremental sync clients use this with ``since``.
+# ---------------------------------------------------------------------------
+@router.get("/repos/{owner}/{repo}/issues/comments/deleted")
+def list_deleted_comments(
+    request: Request,
+    owner: str,
+    repo: str,
+    since: str,
+) -> JSONResponse:
+    store = _get_store(request)
+    deleted = store.deleted_comments(owner, repo, since)
+    if deleted is None:
+        return JSONResponse(
+            status_code=422,
+            content={
+                "message": "Validation Failed",
+                "errors": [{"resource": "Comment", "code": "invalid", "field": "since"}],
+            },
+        )
+    return JSONResponse(content=deleted)
+
+
 # ---------------------------------------------------------------------------
 # 2. GET /repos/{owner}/{repo}/issues/comments/{comment_id}  --  issues/get-comment
 # ---------------------------------------------------------------------------
 @router.get("/repos/{owner}/{repo}/issues/comments/{comment_id}")
-async def get_comment(
+def get_comment(
     request: Request,
     owner: str,
     repo: str,
@@ -70,7 +95,7 @@ async def get_comment(
 # 3. PATCH /repos/{owner}/{repo}/issues/comments/{comment_id}  --  issues/update-comment
 # ---------------------------------------------------------------------------
 @router.patch("/repos/{owner}/{repo}/issues/comments/{comment_id}")
-async def update_comment(
+def update_comment(
     request: Request,
     owner: str,
     repo: str,
@@ -94,7 +119,7 @@ async def update_comment(
 # 4. DELETE /repos/{owner}/{repo}/issues/comments/{comment_id}  --  issues/delete-comment
 # ---------------------------------------------------------------------------
 @router.delete("/repos/{owner}/{repo}/issues/comments/{comment_id}", status_code=204)
-async def delete_comment(
+def delete_comment(
     request: Request,
     owner: str,
     repo: str,
@@ -111,7 +136,7 @@ async def delete_comment(
 # 5. PUT /repos/{owner}/{repo}/issues/comments/{comment_id}/pin  --  issues/pin-comment
 # ---------------------------------------------------------------------------
 @router.put("/repos/{owner}/{repo}/issues/comments/{comment_id}/pin")
-async def pin_comment(
+def pin_comment(
     request: Request,
     owner: str,
     repo: str,
@@ -128,7 +153,7 @@ async def pin_comment(
 # 6. DELETE /repos/{owner}/{repo}/issues/comments/{comment_id}/pin  --  issues/unpin-comment
 # ---------------------------------------------------------------------------
 @router.delete("/repos/{owner}/{repo}/issues/comments/{comment_id}/pin", status_code=204)
-async def unpin_comment(
+def unpin_comment(
     request: Request,
     owner: str,
     repo: str,
@@ -145,7 +170,7 @@ async def unpin_comment(
 # 7. GET /repos/{owner}/{repo}/issues/{issue_number}/comments  --  issues/list-comments
 # ---------------------------------------------------------------------------
 @router.get("/repos/{owner}/{repo}/issues/{issue_number}/comments")
-async def list_comments(
+def list_comments(
     request: Request,
     owner: str,
     repo: str,
@@ -172,7 +197,7 @@ async def list_comments(
 # 8. POST /repos/{owner}/{repo}/issues/{issue_number}/comments  --  issues/create-comment
 # ---------------------------------------------------------------------------
 @router.post("/repos/{owner}/{repo}/issues/{issue_number}/comments", status_code=201)
-async def create_comment(
+def create_comment(
     request: Request,
     owner: str,
     repo: str,
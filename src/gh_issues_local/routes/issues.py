@@ -5,13 +5,17 @@ from __future__ import annotations
 from typing import Any
 
 from fastapi import APIRouter, Query, Request
-from fastapi.responses import JSONResponse
 
 from gh_issues_local.models import CreateIssueRequest, UpdateIssueRequest
-from gh_issues_local.storage import IssueStore
+from gh_issues_local.request_stats import JSONResponse
+from gh_issues_local.storage import SEARCH_RESULT_LIMIT, IssueStore, VersionConflictError
+from gh_issues_local.users import LOCAL_LOGIN
 
 router = APIRouter()
 
+# Route handlers are plain ``def`` so FastAPI runs them in its threadpool; the
+# store guards concurrent read-modify-write cycles with per-repo/issue locks.
+
 
 def _base_url(request: Request) -> str:
     """Derive the base URL from the incoming request (no trailing slash)."""
@@ -22,17 +26,54 @@ def _get_store(request: Request) -> IssueStore:
     return request.app.state.issue_store
 
 
+def _etag(version: int) -> str:
+    """Strong ETag derived from the issue's stored version."""
+    return f'"{version}"'
+
+
+def _if_match_versions(request: Request) -> set[int] | None:
+    """Parse ``If-Match`` into the set of acceptable versions.
+
+    Returns None when the header is absent or ``*`` (any current version).
+    Unparseable tags yield an empty set, which never matches.
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    versions: set[int] = set()
+    for raw_tag in header.split(","):
+        tag = raw_tag.strip()
+        if tag == "*":
+            return None
+        tag = tag.removeprefix("W/").strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+# ``filter`` for the cross-repo lists.  ``subscribed`` and ``repos`` have no
+# local meaning and list everything, as does the default ``all`` (GitHub
+# defaults to ``assigned``; listing everything keeps existing clients working).
+_FILTER_PATTERN = "^(assigned|created|mentioned|subscribed|repos|all)$"
+
+
+def _local_user_if(filter_: str, value: str) -> str | None:
+    """The local user's login when ``filter`` is *value*, else None (no filter)."""
+    return LOCAL_LOGIN if filter_ == value else None
+
+
 # ---------------------------------------------------------------------------
 # 1. GET /issues  --  issues/list
 # ---------------------------------------------------------------------------
 @router.get("/issues")
-async def list_issues(
+def list_issues(
     request: Request,
     state: str = "open",
     sort: str = "created",
     direction: str = "desc",
     labels: str | None = None,
     since: str | None = None,
+    filter_: str = Query(default="all", alias="filter", pattern=_FILTER_PATTERN),
     per_page: int = Query(default=30, ge=1, le=100),
     page: int = Query(default=1, ge=1),
 ) -> list[dict[str, Any]]:
@@ -43,6 +84,9 @@ async def list_issues(
         direction=direction,
         labels=labels,
         since=since,
+        assignee=_local_user_if(filter_, "assigned"),
+        creator=_local_user_if(filter_, "created"),
+        mentioned=_local_user_if(filter_, "mentioned"),
         per_page=per_page,
         page=page,
     )
@@ -52,7 +96,7 @@ async def list_issues(
 # 2. GET /orgs/{org}/issues  --  issues/list-for-org
 # ---------------------------------------------------------------------------
 @router.get("/orgs/{org}/issues")
-async def list_org_issues(
+def list_org_issues(
     request: Request,
     org: str,
     state: str = "open",
@@ -60,6 +104,7 @@ async def list_org_issues(
     direction: str = "desc",
     labels: str | None = None,
     since: str | None = None,
+    filter_: str = Query(default="all", alias="filter", pattern=_FILTER_PATTERN),
     per_page: int = Query(default=30, ge=1, le=100),
     page: int = Query(default=1, ge=1),
 ) -> list[dict[str, Any]]:
@@ -71,6 +116,9 @@ async def list_org_issues(
         direction=direction,
         labels=labels,
         since=since,
+        assignee=_local_user_if(filter_, "assigned"),
+        creator=_local_user_if(filter_, "created"),
+        mentioned=_local_user_if(filter_, "mentioned"),
         per_page=per_page,
         page=page,
     )
@@ -80,13 +128,14 @@ async def list_org_issues(
 # 3. GET /user/issues  --  issues/list-for-authenticated-user
 # ---------------------------------------------------------------------------
 @router.get("/user/issues")
-async def list_user_issues(
+def list_user_issues(
     request: Request,
     state: str = "open",
     sort: str = "created",
     direction: str = "desc",
     labels: str | None = None,
     since: str | None = None,
+    filter_: str = Query(default="all", alias="filter", pattern=_FILTER_PATTERN),
     per_page: int = Query(default=30, ge=1, le=100),
     page: int = Query(default=1, ge=1),
 ) -> list[dict[str, Any]]:
@@ -97,6 +146,9 @@ async def list_user_issues(
         direction=direction,
         labels=labels,
         since=since,
+        assignee=_local_user_if(filter_, "assigned"),
+        creator=_local_user_if(filter_, "created"),
+        mentioned=_local_user_if(filter_, "mentioned"),
         per_page=per_page,
         page=page,
     )
@@ -106,7 +158,7 @@ async def list_user_issues(
 # 4. GET /repos/{owner}/{repo}/issues  --  issues/list-for-repo
 # ---------------------------------------------------------------------------
 @router.get("/repos/{owner}/{repo}/issues")
-async def list_repo_issues(
+def list_repo_issues(
     request: Request,
     owner: str,
     repo: str,
@@ -115,6 +167,10 @@ async def list_repo_issues(
     direction: str = "desc",
     labels: str | None = None,
     since: str | None = None,
+    assignee: str | None = None,
+    creator: str | None = None,
+    mentioned: str | None = None,
+    milestone: str | None = None,
     per_page: int = Query(default=30, ge=1, le=100),
     page: int = Query(default=1, ge=1),
 ) -> list[dict[str, Any]]:
@@ -127,6 +183,10 @@ async def list_repo_issues(
         direction=direction,
         labels=labels,
         since=since,
+        assignee=assignee,
+        creator=creator,
+        mentioned=mentioned,
+        milestone=milestone,
         per_page=per_page,
         page=page,
     )
@@ -136,14 +196,14 @@ async def list_repo_issues(
 # 5. POST /repos/{owner}/{repo}/issues  --  issues/create
 # ---------------------------------------------------------------------------
 @router.post("/repos/{owner}/{repo}/issues", status_code=201)
-async def create_issue(
+def create_issue(
     request: Request,
     owner: str,
     repo: str,
     body: CreateIssueRequest,
 ) -> JSONResponse:
     store = _get_store(request)
-    issue = store.create(
+    issue, version = store.create(
         owner=owner,
         repo=repo,
         title=str(body.title),
@@ -156,7 +216,7 @@ async def create_issue(
     return JSONResponse(
         content=issue,
         status_code=201,
-        headers={"Location": issue["url"]},
+        headers={"Location": issue["url"], "ETag": _etag(version)},
     )
 
 
@@ -164,15 +224,15 @@ async def create_issue(
 # 6. GET /repos/{owner}/{repo}/issues/{issue_number}  --  issues/get
 # ---------------------------------------------------------------------------
 @router.get("/repos/{owner}/{repo}/issues/{issue_number}")
-async def get_issue(
+def get_issue(
     request: Request,
     owner: str,
     repo: str,
     issue_number: int,
 ) -> JSONResponse:
     store = _get_store(request)
-    issue = store.get(owner, repo, issue_number)
-    if issue is None:
+    found = store.get_versioned(owner, repo, issue_number)
+    if found is None:
         return JSONResponse(
             status_code=404,
             content={
@@ -180,14 +240,15 @@ async def get_issue(
                 "documentation_url": "https://docs.github.com/rest",
             },
         )
-    return JSONResponse(content=issue)
+    issue, version = found
+    return JSONResponse(content=issue, headers={"ETag": _etag(version)})
 
 
 # ---------------------------------------------------------------------------
 # 7. PATCH /repos/{owner}/{repo}/issues/{issue_number}  --  issues/update
 # ---------------------------------------------------------------------------
 @router.patch("/repos/{owner}/{repo}/issues/{issue_number}")
-async def update_issue(
+def update_issue(
     request: Request,
     owner: str,
     repo: str,
@@ -202,14 +263,25 @@ async def update_issue(
     for field_name in body.model_fields_set:
         changes[field_name] = getattr(body, field_name)
 
-    issue = store.update(
-        owner=owner,
-        repo=repo,
-        number=issue_number,
-        changes=changes,
-        base_url=_base_url(request),
-    )
-    if issue is None:
+    try:
+        found = store.update(
+            owner=owner,
+            repo=repo,
+            number=issue_number,
+            changes=changes,
+            base_url=_base_url(request),
+            if_match=_if_match_versions(request),
+        )
+    except VersionConflictError as exc:
+        return JSONResponse(
+            status_code=412,
+            content={
+                "message": "Precondition Failed",
+                "documentation_url": "https://docs.github.com/rest",
+            },
+            headers={"ETag": _etag(exc.current_version)},
+        )
+    if found is None:
         return JSONResponse(
             status_code=404,
             content={
@@ -217,26 +289,39 @@ async def update_issue(
                 "documentation_url": "https://docs.github.com/rest",
             },
         )
-    return JSONResponse(content=issue)
+    issue, version = found
+    return JSONResponse(content=issue, headers={"ETag": _etag(version)})
 
 
 # ---------------------------------------------------------------------------
 # 8. GET /search/issues  --  search/issues-and-pull-requests
 # ---------------------------------------------------------------------------
 @router.get("/search/issues")
-async def search_issues(
+def search_issues(
     request: Request,
     q: str = Query(...),
     sort: str | None = None,
     order: str = "desc",
     per_page: int = Query(default=30, ge=1, le=100),
     page: int = Query(default=1, ge=1),
-) -> dict[str, Any]:
+    timeout: float | None = Query(default=None, gt=0, description="Search deadline in seconds (capped by the server)"),
+) -> JSONResponse:
+    if (page - 1) * per_page >= SEARCH_RESULT_LIMIT:
+        return JSONResponse(
+            status_code=422,
+            content={
+                "message": f"Only the first {SEARCH_RESULT_LIMIT} search results are available",
+                "documentation_url": "https://docs.github.com/rest/search/search",
+            },
+        )
     store = _get_store(request)
-    return store.search(
-        q,
-        sort=sort,
-        order=order,
-        per_page=per_page,
-        page=page,
+    return JSONResponse(
+        content=store.search(
+            q,
+            sort=sort,
+            order=order,
+            per_page=per_page,
+            page=page,
+            timeout=timeout,
+        )
     )
@@ -0,0 +1,128 @@
+"""Labels API routes."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, Query, Request
+
+from gh_issues_local.labels import LabelExistsError
+from gh_issues_local.models import CreateLabelRequest, UpdateLabelRequest
+from gh_issues_local.request_stats import JSONResponse
+from gh_issues_local.storage import IssueStore
+
+router = APIRouter()
+
+NOT_FOUND = {"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}
+
+
+def _base_url(request: Request) -> str:
+    return str(request.base_url).rstrip("/")
+
+
+def _get_store(request: Request) -> IssueStore:
+    return request.app.state.issue_store
+
+
+def _validation_failed(field: str, code: str) -> JSONResponse:
+    """GitHub's 422 body for a rejected label field."""
+    return JSONResponse(
+        status_code=422,
+        content={
+            "message": "Validation Failed",
+            "errors": [{"resource": "Label", "code": code, "field": field}],
+            "documentation_url": "https://docs.github.com/rest/issues/labels",
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# 1. GET /repos/{owner}/{repo}/labels  --  issues/list-labels-for-repo
+# ---------------------------------------------------------------------------
+@router.get("/repos/{owner}/{repo}/labels")
+def list_labels(
+    request: Request,
+    owner: str,
+    repo: str,
+    per_page: int = Query(default=30, ge=1, le=100),
+    page: int = Query(default=1, ge=1),
+) -> list[dict[str, Any]]:
+    store = _get_store(request)
+    return store.list_labels(owner, repo, _base_url(request), per_page=per_page, page=page)
+
+
+# ---------------------------------------------------------------------------
+# 2. POST /repos/{owner}/{repo}/labels  --  issues/create-label
+# ---------------------------------------------------------------------------
+@router.post("/repos/{owner}/{repo}/labels", status_code=201)
+def create_label(
+    request: Request,
+    owner: str,
+    repo: str,
+    body: CreateLabelRequest,
+) -> JSONResponse:
+    store = _get_store(request)
+    try:
+        label = store.create_label(owner, repo, body.name, body.color, body.description, _base_url(request))
+    except LabelExistsError:
+        return _validation_failed("name", "already_exists")
+    except ValueError:
+        return _validation_failed("color", "invalid")
+    return JSONResponse(content=label, status_code=201, headers={"Location": label["url"]})
+
+
+# ---------------------------------------------------------------------------
+# 3. GET /repos/{owner}/{repo}/labels/{name}  --  issues/get-label
+# ---------------------------------------------------------------------------
+@router.get("/repos/{owner}/{repo}/labels/{name}")
+def get_label(
+    request: Request,
+    owner: str,
+    repo: str,
+    name: str,
+) -> JSONResponse:
+    store = _get_store(request)
+    label = store.get_label(owner, repo, name, _base_url(request))
+    if label is None:
+        return JSONResponse(status_code=404, content=NOT_FOUND)
+    return JSONResponse(content=label)
+
+
+# ---------------------------------------------------------------------------
+# 4. PATCH /repos/{owner}/{repo}/labels/{name}  --  issues/update-label
+# ---------------------------------------------------------------------------
+@router.patch("/repos/{owner}/{repo}/labels/{name}")
+def update_label(
+    request: Request,
+    owner: str,
+    repo: str,
+    name: str,
+    body: UpdateLabelRequest,
+) -> JSONResponse:
+    store = _get_store(request)
+    changes = {field_name: getattr(body, field_name) for field_name in body.model_fields_set}
+    try:
+        label = store.update_label(owner, repo, name, changes, _base_url(request))
+    except LabelExistsError:
+        return _validation_failed("new_name", "already_exists")
+    except ValueError:
+        return _validation_failed("color", "invalid")
+    if label is None:
+        return JSONResponse(status_code=404, content=NOT_FOUND)
+    return JSONResponse(content=label)
+
+
+# ---------------------------------------------------------------------------
+# 5. DELETE /repos/{owner}/{repo}/labels/{name}  --  issues/delete-label
+# ---------------------------------------------------------------------------
+@router.delete("/repos/{owner}/{repo}/labels/{name}", status_code=204)
+def delete_label(
+    request: Request,
+    owner: str,
+    repo: str,
+    name: str,
+) -> JSONResponse:
+    store = _get_store(request)
+    if not store.delete_label(owner, repo, name):
+        return JSONResponse(status_code=404, content=NOT_FOUND)
+    return JSONResponse(status_code=204, content=None)
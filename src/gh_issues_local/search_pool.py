@@ -0,0 +1,175 @@
+"""Parallel full-text search over a pool of worker processes.
+
+Search shards -- ``(owner, repo, number // SEARCH_SHARD_SIZE)`` -- are pinned
+to worker processes by a stable hash, so each shard's pre-lowercased text is
+held by exactly one worker.  Workers open the same storage config as the
+server and reload a shard whenever the server reports a new repo generation,
+re-reading the repo's pack (if packs are enabled) and listing its issues once
+for all of its shards.  A load that runs past the search deadline is used
+for that search but not kept.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+import multiprocessing
+from pathlib import Path
+import time
+from typing import Any
+import zlib
+
+from gh_issues_local.packs import PackStore
+from gh_issues_local.storage import SEARCH_SHARD_SIZE, IssueStore, select_search_top
+
+# (number, lowered title, lowered body, {sort field: value})
+_Doc = tuple[int, str, str, dict[str, Any]]
+_Shard = tuple[str, str, int, int]  # (owner, repo, chunk, generation)
+
+# -- worker side ------------------------------------------------------------
+
+_worker_store: IssueStore | None = None
+_corpora: dict[tuple[str, str, int], tuple[int, list[_Doc]]] = {}
+# (owner, repo) -> (generation, {chunk: issue numbers}); listed once per generation.
+_chunk_numbers: dict[tuple[str, str], tuple[int, dict[int, list[int]]]] = {}
+
+
+def _init_worker(config_dir: str, packs_dir: str | None) -> None:
+    global _worker_store
+    from storage_provider import create_storage
+
+    _worker_store = IssueStore(
+        create_storage(config_dir=Path(config_dir)),
+        query_cache_size=0,
+        search_timeout=None,
+        packs=PackStore(Path(packs_dir)) if packs_dir is not None else None,
+    )
+
+
+def _numbers_in_chunk(store: IssueStore, owner: str, repo: str, chunk: int, generation: int) -> list[int]:
+    cached = _chunk_numbers.get((owner, repo))
+    if cached is None or cached[0] != generation:
+        store.reload_pack(owner, repo)
+        chunks: dict[int, list[int]] = {}
+        for num in store.issue_numbers(owner, repo):
+            chunks.setdefault(num // SEARCH_SHARD_SIZE, []).append(num)
+        cached = _chunk_numbers[(owner, repo)] = (generation, chunks)
+    return cached[1].get(chunk, [])
+
+
+def _load_chunk(owner: str, repo: str, chunk: int, generation: int, deadline: float | None) -> tuple[list[_Doc], bool]:
+    """A shard's documents, and whether all of them were read before *deadline*.
+
+    A partial load is returned for searching but not cached.
+    """
+    cached = _corpora.get((owner, repo, chunk))
+    if cached is not None and cached[0] == generation:
+        return cached[1], True
+
+    store = _worker_store
+    assert store is not None, "worker not initialised"
+    docs: list[_Doc] = []
+    for i, num in enumerate(_numbers_in_chunk(store, owner, repo, chunk, generation)):
+        # Reads are far slower than matches, so the clock is checked more often here.
+        if deadline is not None and not i & 0x1F and time.monotonic() > deadline:
+            return docs, False
+        issue = store.get(owner, repo, num)
+        if issue is None:
+            continue
+        docs.append(
+            (
+                num,
+                (issue.get("title") or "").lower(),
+                (issue.get("body") or "").lower(),
+                {
+                    "created_at": issue.get("created_at", 0),
+                    "updated_at": issue.get("updated_at", 0),
+                    "comments": issue.get("comments", 0),
+                },
+            )
+        )
+    _corpora[(owner, repo, chunk)] = (generation, docs)
+    return docs, True
+
+
+def _search_shard(
+    shard: _Shard,
+    q_lower: str,
+    field: str | None,
+    order: str,
+    budget: float | None,
+) -> tuple[int, list[tuple[Any, int]], bool]:
+    """Search one shard.  Returns ``(match_count, top_matches, incomplete)``."""
+    deadline = time.monotonic() + budget if budget is not None else None
+    owner, repo, chunk, generation = shard
+    docs, loaded = _load_chunk(owner, repo, chunk, generation, deadline)
+    matches: list[tuple[Any, int]] = []
+    incomplete = not loaded
+    for i, (num, title, body, sort_values) in enumerate(docs):
+        # Checking the clock every 256 docs keeps it out of the hot loop.
+        if deadline is not None and not i & 0xFF and time.monotonic() > deadline:
+            incomplete = True
+            break
+        if q_lower in title or q_lower in body:
+            matches.append((sort_values[field] if field else None, num))
+    return len(matches), select_search_top(matches, sorted_by=field, order=order), incomplete
+
+
+# -- server side ------------------------------------------------------------
+
+
+class SearchPool:
+    """Fan search shards out to worker processes and merge their results."""
+
+    def __init__(self, config_dir: Path, workers: int, packs_dir: Path | None = None) -> None:
+        context = multiprocessing.get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(str(config_dir), str(packs_dir) if packs_dir is not None else None),
+            )
+            for _ in range(workers)
+        ]
+
+    def _executor_for(self, shard: _Shard) -> ProcessPoolExecutor:
+        owner, repo, chunk, _ = shard
+        return self._executors[zlib.crc32(f"{owner}/{repo}/{chunk}".encode()) % len(self._executors)]
+
+    def search(
+        self,
+        shards: list[_Shard],
+        q_lower: str,
+        field: str | None,
+        order: str,
+        deadline: float | None,
+    ) -> tuple[int, list[tuple[Any, str, str, int]], bool]:
+        """Search *shards* (given in scan order) in parallel.
+
+        Returns ``(total_matches, top_matches, incomplete)`` with the same
+        shape and ordering as the in-process scan.  Shards that miss the
+        deadline are dropped and mark the result incomplete.
+        """
+        budget = None if deadline is None else max(0.0, deadline - time.monotonic())
+        futures: list[Future[tuple[int, list[tuple[Any, int]], bool]]] = [
+            self._executor_for(shard).submit(_search_shard, shard, q_lower, field, order, budget) for shard in shards
+        ]
+        _, not_done = wait(futures, timeout=budget, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+
+        total = 0
+        incomplete = bool(not_done)
+        merged: list[tuple[Any, str, str, int]] = []
+        for (owner, repo, _, _), future in zip(shards, futures, strict=True):
+            if future in not_done:
+                continue
+            count, top, shard_incomplete = future.result()
+            total += count
+            incomplete = incomplete or shard_incomplete
+            merged.extend((sort_value, owner, repo, num) for sort_value, num in top)
+        return total, select_search_top(merged, sorted_by=field, order=order), incomplete
+
+    def shutdown(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,235 @@
+"""Checkpoints of the in-memory list indexes, for fast restarts.
+
+Building a repo's ``RepoMetadata`` reads every issue (and, for comment lists
+and ``mentioned`` filters, every comment) in it.  With snapshots enabled the
+metadata of every loaded repo is checkpointed to ``<index dir>/snapshot.bin``
+and every issue or comment write is first appended to a journal, so a
+restart loads the checkpoint and re-reads only the documents written since.
+
+* ``snapshot.bin`` -- a header (magic, format version, document length), a
+  JSON document describing each repo, then the repos' column buffers back to
+  back in the order the document lists them.  Written to a temporary file and
+  renamed into place, so a crash mid-checkpoint leaves the previous one.
+* ``changes-NNNNNN.log`` -- JSON lines ``[owner, repo, kind, id]``.  A
+  checkpoint starts a new journal before it dumps anything.  A write
+  journaled just before that switch may reach the indexes only after the
+  dump, so the checkpoint replays from the journal before the new one;
+  re-reading a document the dump already covers is harmless.  Journals
+  older than that are deleted once the checkpoint is in place.
+
+Documents changed by anything other than this server (see ``IssueStore``
+for the per-repo counter check) are not in the journal.  A snapshot with an
+unknown version is ignored and the indexes are built from storage as usual.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import struct
+import threading
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from gh_issues_local.storage import IssueStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "snapshot.bin"
+DEFAULT_CHECKPOINT_INTERVAL = 300.0
+
+_MAGIC = b"GHSN"
+_VERSION = 2  # 2: mentions inside Markdown code are no longer indexed
+_HEADER = struct.Struct("<4sHxxQ")  # magic, version, document length
+_JOURNAL = re.compile(r"^changes-(\d{6})\.log$")
+
+Change = tuple[str, str, int, int]  # owner, repo, kind, id
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a snapshot file is truncated or has an unknown format."""
+
+
+@dataclass
+class RepoSnapshot:
+    """One repo's checkpointed metadata and the counters it was taken against."""
+
+    owner: str
+    repo: str
+    issues: int  # issue counter when the checkpoint started
+    comments: int  # comment counter, likewise
+    doc: dict[str, Any]
+    buffers: dict[str, bytes]
+
+
+class IndexSnapshots:
+    """The snapshot file and write journals under *directory*.  Thread-safe."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._journal: IO[str] | None = None
+        self._sequence = max(self._journals(), default=1)
+
+    def _journals(self) -> list[int]:
+        return sorted(int(m.group(1)) for path in self.directory.iterdir() if (m := _JOURNAL.match(path.name)))
+
+    def _journal_path(self, sequence: int) -> Path:
+        return self.directory / f"changes-{sequence:06d}.log"
+
+    # -- journal --------------------------------------------------------------
+
+    def record(self, owner: str, repo: str, kind: int, doc_id: int) -> None:
+        """Journal a document about to be written or deleted."""
+        line = json.dumps([owner, repo, kind, doc_id], ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self._journal = self._journal_path(self._sequence).open("a", encoding="utf-8")
+            self._journal.write(line)
+            self._journal.flush()
+
+    def rotate(self) -> int:
+        """Start a new journal and return its number (for ``write``).
+
+        The file is created at once, so after a restart appends continue in
+        a journal the snapshot replays even if nothing was written meanwhile.
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+            self._sequence += 1
+            self._journal = self._journal_path(self._sequence).open("a", encoding="utf-8")
+            return self._sequence
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _changes(self, since: int) -> list[Change]:
+        changes: list[Change] = []
+        for sequence in self._journals():
+            if sequence < since:
+                continue
+            with self._journal_path(sequence).open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        owner, repo, kind, doc_id = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from a crash
+                    changes.append((owner, repo, kind, doc_id))
+        return changes
+
+    # -- snapshot -------------------------------------------------------------
+
+    def write(self, journal: int, repos: list[RepoSnapshot]) -> None:
+        """Replace the snapshot; *journal* is the ``rotate`` result taken before the dump.
+
+        Replay starts at the journal before *journal*, which is kept.
+        """
+        replay_from = journal - 1
+        entries = []
+        for snap in repos:
+            entries.append(
+                {
+                    "owner": snap.owner,
+                    "repo": snap.repo,
+                    "issues": snap.issues,
+                    "comments": snap.comments,
+                    "meta": snap.doc,
+                    "buffers": [[name, len(data)] for name, data in snap.buffers.items()],
+                }
+            )
+        doc = json.dumps({"journal": replay_from, "repos": entries}, ensure_ascii=False).encode()
+        tmp = self.directory / f"{SNAPSHOT_NAME}.tmp"
+        with tmp.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(doc)))
+            f.write(doc)
+            for snap in repos:
+                for data in snap.buffers.values():
+                    f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.directory / SNAPSHOT_NAME)
+        for sequence in self._journals():
+            if sequence < replay_from:
+                self._journal_path(sequence).unlink(missing_ok=True)
+
+    def load(self) -> tuple[list[RepoSnapshot], list[Change]] | None:
+        """The checkpointed repos and the writes journaled since, or None without a usable snapshot."""
+        path = self.directory / SNAPSHOT_NAME
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            return self._parse(data)
+        except SnapshotFormatError as exc:
+            logger.warning("ignoring index snapshot: %s", exc)
+            return None
+
+    def _parse(self, data: bytes) -> tuple[list[RepoSnapshot], list[Change]]:
+        if len(data) < _HEADER.size:
+            raise SnapshotFormatError(f"{SNAPSHOT_NAME} is truncated")
+        magic, version, length = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise SnapshotFormatError(f"{SNAPSHOT_NAME} has an unknown format")
+        offset = _HEADER.size + length
+        doc = json.loads(data[_HEADER.size : offset])
+        repos: list[RepoSnapshot] = []
+        for entry in doc["repos"]:
+            buffers: dict[str, bytes] = {}
+            for name, size in entry["buffers"]:
+                buffers[name] = data[offset : offset + size]
+                offset += size
+            repos.append(
+                RepoSnapshot(entry["owner"], entry["repo"], entry["issues"], entry["comments"], entry["meta"], buffers)
+            )
+        if offset != len(data):
+            raise SnapshotFormatError(f"{SNAPSHOT_NAME} is truncated")
+        return repos, self._changes(doc["journal"])
+
+
+class Checkpointer:
+    """Background thread that checkpoints the store's indexes every *interval* seconds, and once on stop."""
+
+    def __init__(self, store: IssueStore, *, interval: float) -> None:
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls, store: IssueStore) -> Checkpointer:
+        """Configured from ``GH_ISSUES_LOCAL_CHECKPOINT_INTERVAL`` (``0``: only on shutdown)."""
+        interval = float(os.environ.get("GH_ISSUES_LOCAL_CHECKPOINT_INTERVAL", DEFAULT_CHECKPOINT_INTERVAL))
+        return cls(store, interval=interval)
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="gh-issues-local-checkpoint", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._checkpoint()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        try:
+            count = self.store.checkpoint_indexes()
+        except Exception:
+            logger.exception("index checkpoint failed")
+            return
+        logger.info("checkpointed indexes of %d repos", count)
@@ -2,75 +2,70 @@
 
 from __future__ import annotations
 
+from array import array
+from collections.abc import Collection, Hashable, Iterable, Iterator, Sequence
+import contextlib
 from datetime import UTC, datetime
+import heapq
+import itertools
 import json
-from typing import Any
+from operator import itemgetter
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Protocol
+import weakref
 
-from storage_provider import StorageProvider
 from storage_provider.exceptions import StorageNotFoundError
 
-# Default user for all operations (no real user system).
-DEFAULT_USER = {
-    "login": "local-user",
-    "id": 1,
-    "node_id": "U_local1",
-    "avatar_url": "",
-    "gravatar_id": "",
-    "url": "",
-    "html_url": "",
-    "followers_url": "",
-    "following_url": "",
-    "gists_url": "",
-    "starred_url": "",
-    "subscriptions_url": "",
-    "organizations_url": "",
-    "repos_url": "",
-    "events_url": "",
-    "received_events_url": "",
-    "type": "User",
-    "site_admin": False,
-}
+from gh_issues_local.coalesce import SingleFlight, coalesced
+from gh_issues_local.labels import RepoLabels, render_label
+from gh_issues_local.metadata import MetadataFilter, RepoMetadata, SearchQuery, iso_epoch, parse_search_query
+from gh_issues_local.packs import KIND_COMMENT, KIND_ISSUE, PackStore
+from gh_issues_local.query_cache import QueryCache
+from gh_issues_local.request_stats import parse_json
+from gh_issues_local.snapshots import RepoSnapshot
+from gh_issues_local.tracing import traced
+from gh_issues_local.users import LOCAL_LOGIN, UserDirectory
 
+if TYPE_CHECKING:
+    from gh_issues_local.search_pool import SearchPool
+    from gh_issues_local.snapshots import IndexSnapshots
 
-def _now_iso() -> str:
-    return datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+# Only the first 1000 search results are retrievable, as on GitHub.
+SEARCH_RESULT_LIMIT = 1000
 
+# Seconds a search may scan before returning partial results.
+DEFAULT_SEARCH_TIMEOUT = 5.0
 
-def _make_user(login: str, base_url: str) -> dict[str, Any]:
-    """Build a simple-user dict for a given login."""
-    return {
-        "login": login,
-        "id": abs(hash(login)) % 10_000_000,
-        "node_id": f"U_{login}",
-        "avatar_url": "",
-        "gravatar_id": "",
-        "url": f"{base_url}/users/{login}",
-        "html_url": f"{base_url}/users/{login}",
-        "followers_url": f"{base_url}/users/{login}/followers",
-        "following_url": f"{base_url}/users/{login}/following{{/other_user}}",
-        "gists_url": f"{base_url}/users/{login}/gists{{/gist_id}}",
-        "starred_url": f"{base_url}/users/{login}/starred{{/owner}}{{/repo}}",
-        "subscriptions_url": f"{base_url}/users/{login}/subscriptions",
-        "organizations_url": f"{base_url}/users/{login}/orgs",
-        "repos_url": f"{base_url}/users/{login}/repos",
-        "events_url": f"{base_url}/users/{login}/events{{/privacy}}",
-        "received_events_url": f"{base_url}/users/{login}/received_events",
-        "type": "User",
-        "site_admin": False,
-    }
+# Issues per search shard when searching over a process pool.  A repo's
+# issues are split by ``number // SEARCH_SHARD_SIZE``.
+SEARCH_SHARD_SIZE = 5000
 
+# Key under which ``issue.json`` keeps the issue's optimistic-lock version.
+# It is not an API field: reads strip it, and the routes expose it as the ETag.
+_VERSION_KEY = "version"
 
-def _make_label(name: str, label_id: int, base_url: str, owner: str, repo: str) -> dict[str, Any]:
-    """Build a label object from a name string."""
-    return {
-        "id": label_id,
-        "node_id": f"LA_{label_id}",
-        "url": f"{base_url}/repos/{owner}/{repo}/labels/{name}",
-        "name": name,
-        "description": None,
-        "color": "ededed",
-        "default": False,
-    }
+
+class StorageBackend(Protocol):
+    """The part of the storage-provider ``StorageProvider`` interface IssueStore uses.
+
+    Any ``StorageProvider`` satisfies it, as does the in-memory backend in
+    ``memory_storage``.
+    """
+
+    def read(self, path: str) -> bytes: ...
+
+    def write(self, path: str, data: bytes) -> None: ...
+
+    def exists(self, path: str) -> bool: ...
+
+    def delete(self, path: str) -> None: ...
+
+    def list(self, path: str) -> list[str]: ...
+
+
+def _now_iso() -> str:
+    return datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def _issue_urls(base_url: str, owner: str, repo: str, number: int) -> dict[str, str]:
@@ -87,52 +82,894 @@ def _issue_urls(base_url: str, owner: str, repo: str, number: int) -> dict[str,
     }
 
 
+# Supported ``sort`` values mapped to the issue field they order by.
+_SORT_FIELDS = {
+    "created": "created_at",
+    "updated": "updated_at",
+    "comments": "comments",
+}
+
+
+def _sort_field(sort: str) -> str:
+    """Issue field for a list ``sort`` value (unknown values sort by creation)."""
+    return _SORT_FIELDS.get(sort, "created_at")
+
+
+def _list_filter(
+    state: str,
+    labels: str | None,
+    since: str | None,
+    *,
+    assignee: str | None = None,
+    creator: str | None = None,
+    mentioned: str | None = None,
+    milestone: str | None = None,
+) -> MetadataFilter:
+    """The metadata predicates for the list endpoints' query parameters."""
+    # Labels filter: comma-separated names, all must match.
+    required = tuple(sorted({name.strip() for name in labels.split(",")})) if labels else ()
+    updated_since = iso_epoch(since) if since else 0
+    return MetadataFilter(
+        state=state,
+        labels=required,
+        updated=(updated_since or None, None),
+        assignee=assignee,
+        creator=creator,
+        mentioned=mentioned,
+        milestone=milestone,
+    )
+
+
+def select_search_top(matches: list[tuple[Any, ...]], *, sorted_by: str | None, order: str) -> list[tuple[Any, ...]]:
+    """Keep the retrievable top search matches, ordered by their first element.
+
+    ``matches`` must be in scan order.  nlargest/nsmallest are equivalent to
+    ``sorted(...)[:n]``, so ties keep scan order as a full stable sort would.
+    """
+    if not sorted_by:
+        return matches[:SEARCH_RESULT_LIMIT]
+    select = heapq.nlargest if order == "desc" else heapq.nsmallest
+    return select(SEARCH_RESULT_LIMIT, matches, key=itemgetter(0))
+
+
+# Directory layouts for per-issue and per-comment documents.  ``flat`` keeps
+# every id directly under ``issues/`` / ``comments/``; ``sharded`` nests them
+# under the digit pairs of ``h = id // 100``: below a million ids as
+# ``{h // 100:02d}/{h % 100:02d}/{id}``, from there as ``L{n}/`` followed by
+# all ``n`` pairs (``L3/01/00/00/1000000``), one more level per factor of
+# 100.  Besides those few ``L{n}`` buckets, no directory holds more than 100
+# entries.
+LAYOUTS = ("flat", "sharded")
+DEFAULT_LAYOUT = "flat"
+LAYOUT_MARKER_PATH = "layout.json"
+
+
+def _layout_key(layout: str, entity_id: int) -> str:
+    if layout == "flat":
+        return str(entity_id)
+    h = entity_id // 100
+    if h < 10_000:
+        return f"{h // 100:02d}/{h % 100:02d}/{entity_id}"
+    digits = str(h)
+    if len(digits) % 2:
+        digits = f"0{digits}"
+    pairs = [digits[i : i + 2] for i in range(0, len(digits), 2)]
+    return f"L{len(pairs)}/{'/'.join(pairs)}/{entity_id}"
+
+
+def _bucket_depth(layout: str, top: str) -> int:
+    """Directory levels between ``issues/`` / ``comments/`` and an id, given the first one (*top*)."""
+    if layout == "flat":
+        return 0
+    return int(top[1:]) + 1 if top.startswith("L") and top[1:].isdigit() else 2
+
+
+class LayoutMismatchError(Exception):
+    """Raised when the requested layout differs from the one recorded in storage."""
+
+
+class VersionConflictError(Exception):
+    """Raised when an ``If-Match`` precondition does not match the stored issue version."""
+
+    def __init__(self, current_version: int) -> None:
+        super().__init__(f"Issue version is {current_version}")
+        self.current_version = current_version
+
+
 class IssueStore:
-    """CRUD operations for issues, persisted via a StorageProvider."""
+    """CRUD operations for issues, persisted via a StorageProvider.
+
+    Read-modify-write cycles are guarded by fine-grained locks: one per repo
+    (for the number/id counters) and one per issue or comment document.  Writes
+    to different repos and different issues proceed in parallel.
+
+    Identical concurrent list/search calls are coalesced into one scan, and
+    their sorted id lists are cached until a write to a covered repo bumps that
+    repo's generation counter.  List filters and sorts run over per-repo
+    columnar metadata (``RepoMetadata``) and only read the issues on the page.
+    """
 
-    def __init__(self, storage: StorageProvider) -> None:
+    def __init__(
+        self,
+        storage: StorageBackend,
+        *,
+        query_cache_size: int = 512,
+        search_timeout: float | None = DEFAULT_SEARCH_TIMEOUT,
+        search_pool: SearchPool | None = None,
+        layout: str | None = None,
+        packs: PackStore | None = None,
+        snapshots: IndexSnapshots | None = None,
+    ) -> None:
         self._storage = storage
+        self._packs = packs
+        self._snapshots = snapshots
+        self._layout = self._resolve_layout(layout)
+        self._search_timeout = search_timeout
+        self._search_pool = search_pool
+        # Held only weakly: a lock lives while some caller holds or waits on
+        # it, so the map stays bounded by concurrency rather than by every
+        # issue and comment ever touched.
+        self._locks: weakref.WeakValueDictionary[tuple[Any, ...], threading.Lock] = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._query_cache = QueryCache(query_cache_size)
+        # Generations are drawn from one monotonic sequence so a bump is a
+        # single atomic assignment.  The catalog generation changes when a
+        # repo is created.
+        self._generation_seq = itertools.count(1)
+        self._generations: dict[tuple[str, str], int] = {}
+        self._catalog_generation = 0
+        self._repo_catalog: tuple[int, list[tuple[str, str]]] | None = None
+        # Per-repo (generation, issue count, comment count) for ``totals``.
+        self._repo_totals: dict[tuple[str, str], tuple[int, int, int]] = {}
+        # Columnar issue metadata per repo, built on first use.  While a build
+        # runs, writes to that repo are parked in ``_metadata_pending`` and
+        # applied before the metadata is published.
+        self._metadata: dict[tuple[str, str], RepoMetadata] = {}
+        self._metadata_pending: dict[tuple[str, str], dict[int, dict[str, Any]]] = {}
+        # Metadata being restored from a snapshot, reachable by comment
+        # writes (which it parks) before it is published.
+        self._metadata_restoring: dict[tuple[str, str], RepoMetadata] = {}
+        self._metadata_guard = threading.Lock()
+        self._users = UserDirectory()
+        # Label registries per repo, loaded on first use; guarded by ``_label_lock``.
+        self._label_registries: dict[tuple[str, str], RepoLabels] = {}
+
+    def stats(self) -> dict[str, Any]:
+        """Runtime counters for the stats endpoint."""
+        return {
+            "single_flight": self._single_flight.stats(),
+            "query_cache": self._query_cache.stats(),
+        }
+
+    @traced
+    def totals(self) -> dict[str, int]:
+        """Repo, issue and comment counts across all repos.
+
+        Counts come from directory listings (no file reads) and are reused per
+        repo until that repo's generation changes, so polling this is cheap.
+        """
+        repos = self._repos()
+        issues = comments = 0
+        for owner, repo in repos:
+            generation = self._generation(owner, repo)
+            cached = self._repo_totals.get((owner, repo))
+            if cached is None or cached[0] != generation:
+                issue_count = len(self._list_issue_numbers(owner, repo))
+                comment_count = len(self._list_comment_ids(owner, repo))
+                cached = (generation, issue_count, comment_count)
+                self._repo_totals[(owner, repo)] = cached
+            issues += cached[1]
+            comments += cached[2]
+        return {"repos": len(repos), "issues": issues, "comments": comments}
+
+    def index_memory(self) -> dict[str, Any]:
+        """Resident bytes of the columnar metadata, per repo and in total."""
+        repos = {f"{owner}/{repo}": meta.memory() for (owner, repo), meta in sorted(self._metadata.items())}
+        return {"repos": repos, "total_bytes": sum(m["bytes"] for m in repos.values())}
+
+    # -- layout -------------------------------------------------------------
+
+    def _resolve_layout(self, requested: str | None) -> str:
+        """Return the layout recorded in storage, recording one if there is none.
+
+        Storage without a marker but with data predates layouts and is flat.
+        """
+        if requested is not None and requested not in LAYOUTS:
+            raise ValueError(f"Unknown layout {requested!r} (expected one of {', '.join(LAYOUTS)})")
+        try:
+            stored = json.loads(self._storage.read(LAYOUT_MARKER_PATH))["layout"]
+        except StorageNotFoundError:
+            stored = None
+        if stored is None:
+            has_data = bool(self._list_dir("repos/"))
+            stored = "flat" if has_data else requested or DEFAULT_LAYOUT
+            self._storage.write(LAYOUT_MARKER_PATH, json.dumps({"layout": stored}).encode())
+        if requested is not None and requested != stored:
+            raise LayoutMismatchError(
+                f"Storage uses the {stored!r} layout but {requested!r} was requested; "
+                f"run `gh-issues-local --migrate-layout {requested}` first"
+            )
+        return stored
+
+    @property
+    def layout(self) -> str:
+        return self._layout
+
+    @traced
+    def migrate_layout(self, target: str) -> int:
+        """Move every issue and comment document to the *target* layout.
+
+        Returns the number of documents moved.  Intended to run while no
+        server is using the storage: all documents are copied first, then the
+        old copies are deleted and emptied directories pruned.  Flat id
+        directories 10-99 share names with first-level sharded buckets, so
+        mid-migration both layouts' entries sit in the same directories; the
+        file names differ, so nothing is overwritten, but listings are only
+        right once the migration has finished.
+        """
+        if target not in LAYOUTS:
+            raise ValueError(f"Unknown layout {target!r} (expected one of {', '.join(LAYOUTS)})")
+        source = self._layout
+        if target == source:
+            return 0
+        moves: list[tuple[str, str]] = []
+        for owner, repo in self._list_repos():
+            for kind, filename in (("issues", "issue.json"), ("comments", "comment.json")):
+                base = f"repos/{owner}/{repo}/{kind}/"
+                for entity_id in self._list_ids(base, source):
+                    old = f"{base}{_layout_key(source, entity_id)}/{filename}"
+                    new = f"{base}{_layout_key(target, entity_id)}/{filename}"
+                    try:
+                        self._storage.write(new, self._storage.read(old))
+                    except StorageNotFoundError:  # empty directory left by a deleted comment
+                        continue
+                    moves.append((old, new))
+        for old, _ in moves:
+            self._storage.delete(old)
+        for owner, repo in self._list_repos():
+            for kind in ("issues", "comments"):
+                self._prune_empty_dirs(f"repos/{owner}/{repo}/{kind}/")
+        self._storage.write(LAYOUT_MARKER_PATH, json.dumps({"layout": target}).encode())
+        self._layout = target
+        self._query_cache.clear()
+        self._repo_totals.clear()
+        return len(moves)
+
+    def _prune_empty_dirs(self, prefix: str) -> bool:
+        """Delete empty directories below *prefix* (but not *prefix* itself).  Returns True if it is empty."""
+        try:
+            entries = self._storage.list(prefix)
+        except StorageNotFoundError:
+            return True
+        remaining = len(entries)
+        for entry in entries:
+            if entry.endswith("/") and self._prune_empty_dirs(f"{prefix}{entry}"):
+                with contextlib.suppress(StorageNotFoundError):
+                    self._storage.delete(f"{prefix}{entry}")
+                remaining -= 1
+        return remaining == 0
+
+    def _list_ids(self, base: str, layout: str | None = None) -> list[int]:
+        """Return the ids stored under *base* (an ``issues/`` or ``comments/`` dir), sorted ascending."""
+        layout = layout or self._layout
+        prefixes = [base]
+        if layout != "flat":
+            prefixes = []
+            for top in self._list_dir(base):
+                if not top.endswith("/"):
+                    continue
+                level = [f"{base}{top}"]
+                for _ in range(_bucket_depth(layout, top.rstrip("/")) - 1):
+                    level = [
+                        f"{prefix}{entry}"
+                        for prefix in level
+                        for entry in self._list_dir(prefix)
+                        if entry.endswith("/")
+                    ]
+                prefixes.extend(level)
+        ids: list[int] = []
+        for prefix in prefixes:
+            for entry in self._list_dir(prefix):
+                name = entry.rstrip("/")
+                if name.isdigit():
+                    ids.append(int(name))
+        ids.sort()
+        return ids
+
+    def _list_dir(self, prefix: str) -> list[str]:
+        try:
+            return self._storage.list(prefix)
+        except StorageNotFoundError:
+            return []
+
+    # -- packs --------------------------------------------------------------
+
+    def _require_packs(self) -> PackStore:
+        if self._packs is None:
+            raise RuntimeError("Packs are not enabled for this store")
+        return self._packs
+
+    @traced
+    def repack(self, owner: str, repo: str) -> int:
+        """Fold a repo's issues and comments into a new pack.  Returns the number of documents packed.
+
+        Safe while serving: writes that land during the repack are tombstoned
+        in the new pack, and a loose file is only removed (under its document
+        lock) while its packed copy is live and identical.
+        """
+        packs = self._require_packs()
+        with packs.repacking(owner, repo) as session:
+            documents: list[tuple[int, int, bytes]] = []
+            for kind, ids in (
+                (KIND_ISSUE, self._list_issue_numbers(owner, repo)),
+                (KIND_COMMENT, self._list_comment_ids(owner, repo)),
+            ):
+                for doc_id in ids:
+                    data = self._read_raw(owner, repo, kind, doc_id)
+                    if data is not None:
+                        documents.append((kind, doc_id, bytes(data)))
+            session.documents = documents
+
+        for kind, doc_id, data in documents:
+            path = self._doc_path(owner, repo, kind, doc_id)
+            with self._doc_lock(owner, repo, kind, doc_id):
+                try:
+                    loose = self._storage.read(path)
+                except StorageNotFoundError:
+                    continue
+                if loose != data or not packs.contains(owner, repo, kind, doc_id):
+                    continue
+                self._storage.delete(path)
+                doc_dir = path.rpartition("/")[0] + "/"
+                if not self._list_dir(doc_dir):
+                    with contextlib.suppress(StorageNotFoundError):
+                        self._storage.delete(doc_dir)
+        return len(documents)
+
+    @traced
+    def repack_all(self, min_loose: int = 1) -> dict[str, int]:
+        """Repack every repo with at least *min_loose* loose documents.  Returns ``{"owner/repo": packed}``."""
+        self._require_packs()
+        packed: dict[str, int] = {}
+        for owner, repo in self._list_repos():
+            loose = len(self._list_ids(f"repos/{owner}/{repo}/issues/")) + len(
+                self._list_ids(f"repos/{owner}/{repo}/comments/")
+            )
+            if loose >= min_loose:
+                packed[f"{owner}/{repo}"] = self.repack(owner, repo)
+        return packed
+
+    @traced
+    def unpack(self, owner: str, repo: str) -> int:
+        """Write a repo's packed documents back as loose files and retire its pack.  Returns the count."""
+        packs = self._require_packs()
+        pack = packs.pack(owner, repo)
+        if pack is None:
+            return 0
+        count = 0
+        for kind, doc_id, data in pack.documents():
+            with self._doc_lock(owner, repo, kind, doc_id):
+                # A tombstoned copy was superseded by a loose write.
+                if packs.contains(owner, repo, kind, doc_id):
+                    self._storage.write(self._doc_path(owner, repo, kind, doc_id), bytes(data))
+                    count += 1
+        packs.drop(owner, repo)
+        return count
+
+    def _read_raw(self, owner: str, repo: str, kind: int, doc_id: int) -> bytes | None:
+        """The stored bytes of a document: its live packed copy, else its loose file."""
+        if self._packs is not None:
+            data = self._packs.get(owner, repo, kind, doc_id)
+            if data is not None:
+                return data
+        try:
+            return self._storage.read(self._doc_path(owner, repo, kind, doc_id))
+        except StorageNotFoundError:
+            return None
+
+    def _unpacked(self, owner: str, repo: str, kind: int, doc_id: int) -> None:
+        """Retire the packed copy of a document whose loose file was just written or deleted."""
+        if self._packs is not None:
+            self._packs.invalidate(owner, repo, kind, doc_id)
+
+    def _with_packed_ids(self, owner: str, repo: str, kind: int, ids: list[int]) -> list[int]:
+        if self._packs is None:
+            return ids
+        packed = self._packs.ids(owner, repo, kind)
+        return sorted(set(ids).union(packed)) if packed else ids
 
     # -- path helpers -------------------------------------------------------
 
-    @staticmethod
-    def _issue_path(owner: str, repo: str, number: int) -> str:
-        return f"repos/{owner}/{repo}/issues/{number}/issue.json"
+    def _doc_path(self, owner: str, repo: str, kind: int, doc_id: int) -> str:
+        if kind == KIND_ISSUE:
+            return self._issue_path(owner, repo, doc_id)
+        return self._comment_path(owner, repo, doc_id)
+
+    def _issue_path(self, owner: str, repo: str, number: int) -> str:
+        return f"repos/{owner}/{repo}/issues/{_layout_key(self._layout, number)}/issue.json"
 
     @staticmethod
     def _counter_path(owner: str, repo: str) -> str:
         return f"repos/{owner}/{repo}/counter.txt"
 
-    @staticmethod
-    def _comment_path(owner: str, repo: str, comment_id: int) -> str:
-        return f"repos/{owner}/{repo}/comments/{comment_id}/comment.json"
+    def _comment_path(self, owner: str, repo: str, comment_id: int) -> str:
+        return f"repos/{owner}/{repo}/comments/{_layout_key(self._layout, comment_id)}/comment.json"
 
     @staticmethod
     def _comment_counter_path(owner: str, repo: str) -> str:
         return f"repos/{owner}/{repo}/comment_counter.txt"
 
+    @staticmethod
+    def _labels_path(owner: str, repo: str) -> str:
+        return f"repos/{owner}/{repo}/labels.json"
+
+    # -- locking ------------------------------------------------------------
+
+    def _lock(self, *key: Any) -> threading.Lock:
+        """Return the lock for *key*, creating it if no caller holds a reference to it."""
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+    def _repo_lock(self, owner: str, repo: str) -> threading.Lock:
+        return self._lock("repo", owner, repo)
+
+    def _issue_lock(self, owner: str, repo: str, number: int) -> threading.Lock:
+        return self._lock("issue", owner, repo, number)
+
+    def _comment_lock(self, owner: str, repo: str, comment_id: int) -> threading.Lock:
+        return self._lock("comment", owner, repo, comment_id)
+
+    def _label_lock(self, owner: str, repo: str) -> threading.Lock:
+        """Guards a repo's label registry.  Taken before (never inside) an issue lock."""
+        return self._lock("labels", owner, repo)
+
+    def _doc_lock(self, owner: str, repo: str, kind: int, doc_id: int) -> threading.Lock:
+        if kind == KIND_ISSUE:
+            return self._issue_lock(owner, repo, doc_id)
+        return self._comment_lock(owner, repo, doc_id)
+
+    # -- generations --------------------------------------------------------
+
+    def _generation(self, owner: str, repo: str) -> int:
+        return self._generations.get((owner, repo), 0)
+
+    def _bump_generation(self, owner: str, repo: str) -> None:
+        """Invalidate cached results covering a repo.
+
+        Call after the write lands *and* is indexed: a list that starts in
+        between would otherwise cache a stale result under the new generation.
+        """
+        self._generations[(owner, repo)] = next(self._generation_seq)
+
+    def _multi_validator(self, repos: Sequence[tuple[str, str]], catalog_generation: int) -> Hashable:
+        return (catalog_generation, tuple(self._generation(owner, repo) for owner, repo in repos))
+
+    def _repos(self) -> list[tuple[str, str]]:
+        """``_list_repos``, cached until a new repo is created."""
+        catalog = self._repo_catalog
+        if catalog is None or catalog[0] != self._catalog_generation:
+            catalog = (self._catalog_generation, self._list_repos())
+            self._repo_catalog = catalog
+        return catalog[1]
+
     # -- internal helpers ---------------------------------------------------
 
+    def _read_counter(self, path: str) -> int:
+        try:
+            return int(self._storage.read(path).decode().strip())
+        except StorageNotFoundError:
+            return 0
+
     def _next_number(self, owner: str, repo: str) -> int:
         path = self._counter_path(owner, repo)
-        current = 0
-        if self._storage.exists(path):
-            current = int(self._storage.read(path).decode().strip())
-        next_num = current + 1
-        self._storage.write(path, str(next_num).encode())
+        with self._repo_lock(owner, repo):
+            current = 0
+            if self._storage.exists(path):
+                current = int(self._storage.read(path).decode().strip())
+            next_num = current + 1
+            self._storage.write(path, str(next_num).encode())
+        if current == 0:
+            self._catalog_generation = next(self._generation_seq)
         return next_num
 
     def _read_issue(self, owner: str, repo: str, number: int) -> dict[str, Any] | None:
-        path = self._issue_path(owner, repo, number)
-        try:
-            data = self._storage.read(path)
-        except StorageNotFoundError:
+        found = self._read_issue_versioned(owner, repo, number)
+        return found[0] if found is not None else None
+
+    def _read_issue_versioned(self, owner: str, repo: str, number: int) -> tuple[dict[str, Any], int] | None:
+        """An issue and its stored version, which is kept out of the returned document."""
+        data = self._read_raw(owner, repo, KIND_ISSUE, number)
+        if data is None:
             return None
-        return json.loads(data)
+        issue = parse_json(data)
+        return issue, issue.pop(_VERSION_KEY, 0)
 
-    def _write_issue(self, owner: str, repo: str, number: int, issue: dict[str, Any]) -> None:
+    def _issue_exists(self, owner: str, repo: str, number: int) -> bool:
+        if self._packs is not None and self._packs.contains(owner, repo, KIND_ISSUE, number):
+            return True
+        return self._storage.exists(self._issue_path(owner, repo, number))
+
+    def _write_issue(self, owner: str, repo: str, number: int, issue: dict[str, Any], version: int) -> int:
+        """Persist an issue written over stored *version*; returns the new version.  Hold the issue lock."""
+        version += 1
         path = self._issue_path(owner, repo, number)
-        self._storage.write(path, json.dumps(issue, ensure_ascii=False).encode())
+        self._journal(owner, repo, KIND_ISSUE, number)
+        self._storage.write(path, json.dumps({**issue, _VERSION_KEY: version}, ensure_ascii=False).encode())
+        self._unpacked(owner, repo, KIND_ISSUE, number)
+        self._index_issue(owner, repo, issue)
+        self._bump_generation(owner, repo)
+        return version
+
+    # -- columnar metadata ----------------------------------------------------
+
+    def _journal(self, owner: str, repo: str, kind: int, doc_id: int) -> None:
+        """Note a document about to change, for catching up a restored snapshot."""
+        if self._snapshots is not None:
+            self._snapshots.record(owner, repo, kind, doc_id)
+
+    def _index_issue(self, owner: str, repo: str, issue: dict[str, Any]) -> None:
+        """Reflect a written issue in its repo's metadata (or park it while a build runs)."""
+        key = (owner, repo)
+        with self._metadata_guard:
+            meta = self._metadata.get(key)
+            if meta is not None:
+                meta.set(issue)
+                return
+            pending = self._metadata_pending.get(key)
+            if pending is not None:
+                pending[issue["number"]] = issue
+
+    def _index_comment(self, owner: str, repo: str, comment_id: int, comment: dict[str, Any] | None) -> None:
+        """Reflect a written (or, with None, deleted) comment in its repo's metadata."""
+        meta = self._metadata.get((owner, repo)) or self._metadata_restoring.get((owner, repo))
+        if meta is not None:
+            meta.set_comment(comment_id, comment)
+
+    @traced
+    def _ensure_comments(
+        self, owner: str, repo: str, meta: RepoMetadata, loaded: dict[int, dict[str, Any]] | None = None
+    ) -> None:
+        """Index a repo's comments, once, before the first ``mentioned`` filter or comment list.
+
+        Comments read by the scan are added to *loaded*, by id.
+        """
+        if meta.comments_indexed:
+            return
+        with self._lock("mentions", owner, repo):
+            if meta.comments_indexed:
+                return
+            meta.begin_comment_scan()
+            complete = False
+            try:
+                for comment_id in self._list_comment_ids(owner, repo):
+                    comment = self._read_comment(owner, repo, comment_id)
+                    if comment is not None:
+                        meta.scan_comment(comment_id, comment)
+                        if loaded is not None:
+                            loaded[comment_id] = comment
+                complete = True
+            finally:
+                meta.end_comment_scan(complete=complete)
+
+    @traced
+    def _repo_metadata(
+        self, owner: str, repo: str, loaded: dict[tuple[str, str, int], dict[str, Any]] | None = None
+    ) -> RepoMetadata:
+        """A repo's metadata, building it from the stored issues if needed.
+
+        Issues read by a build are added to *loaded* so the caller can serve
+        its page without reading them again.
+        """
+        key = (owner, repo)
+        meta = self._metadata.get(key)
+        if meta is not None:
+            return meta
+        with self._lock("metadata", owner, repo):
+            meta = self._metadata.get(key)
+            if meta is not None:
+                return meta
+            with self._metadata_guard:
+                self._metadata_pending[key] = {}
+            meta = RepoMetadata()
+            try:
+                for issue in self._read_issues(owner, repo, self._list_issue_numbers(owner, repo)):
+                    meta.set(issue)
+                    if loaded is not None:
+                        loaded[(owner, repo, issue["number"])] = issue
+            finally:
+                with self._metadata_guard:
+                    pending = self._metadata_pending.pop(key)
+            with self._metadata_guard:
+                # Writes that landed during the build are at least as new as what it read.
+                for issue in pending.values():
+                    meta.set(issue)
+                self._metadata[key] = meta
+        return meta
+
+    def checkpoint_indexes(self) -> int:
+        """Write the metadata of every loaded repo to the index snapshot; returns the repo count."""
+        if self._snapshots is None:
+            return 0
+        journal = self._snapshots.rotate()
+        repos: list[RepoSnapshot] = []
+        for (owner, repo), meta in list(self._metadata.items()):
+            # Counters first: documents numbered past them are re-read on
+            # restore even if the dump below already has them.
+            issues = self._read_counter(self._counter_path(owner, repo))
+            comments = self._read_counter(self._comment_counter_path(owner, repo))
+            doc, buffers = meta.dump()
+            repos.append(RepoSnapshot(owner, repo, issues, comments, doc, buffers))
+        self._snapshots.write(journal, repos)
+        return len(repos)
+
+    @traced
+    def restore_indexes(self) -> int:
+        """Load repo metadata from the index snapshot and catch it up; returns the repos restored.
+
+        Only the documents journaled since the checkpoint, or numbered past
+        its counters, are read.  A repo whose counters went backwards (its
+        data was replaced, e.g. restored from a backup) is skipped and built
+        from storage on first use as usual.
+        """
+        if self._snapshots is None:
+            return 0
+        loaded = self._snapshots.load()
+        if loaded is None:
+            return 0
+        snapshots, changes = loaded
+        changed: dict[tuple[str, str, int], set[int]] = {}
+        for owner, repo, kind, doc_id in changes:
+            changed.setdefault((owner, repo, kind), set()).add(doc_id)
+        restored = 0
+        for snap in snapshots:
+            issues = changed.get((snap.owner, snap.repo, KIND_ISSUE), set())
+            comments = changed.get((snap.owner, snap.repo, KIND_COMMENT), set())
+            if self._restore_repo(snap, issues, comments):
+                restored += 1
+        return restored
+
+    def _restore_repo(self, snap: RepoSnapshot, issues: set[int], comments: set[int]) -> bool:
+        owner, repo = snap.owner, snap.repo
+        key = (owner, repo)
+        with self._lock("metadata", owner, repo):
+            if key in self._metadata:
+                return False
+            issue_counter = self._read_counter(self._counter_path(owner, repo))
+            comment_counter = self._read_counter(self._comment_counter_path(owner, repo))
+            if issue_counter < snap.issues or comment_counter < snap.comments:
+                return False
+            with_comments = snap.doc["comments_indexed"]
+            meta = RepoMetadata.restore(snap.doc, snap.buffers)
+            with self._metadata_guard:
+                self._metadata_pending[key] = {}
+                if with_comments:
+                    meta.begin_comment_scan()
+                    self._metadata_restoring[key] = meta
+            try:
+                numbers = issues.union(range(snap.issues + 1, issue_counter + 1))
+                for issue in self._read_issues(owner, repo, sorted(numbers)):
+                    meta.set(issue)
+            finally:
+                with self._metadata_guard:
+                    pending = self._metadata_pending.pop(key)
+            with self._metadata_guard:
+                for issue in pending.values():
+                    meta.set(issue)
+                self._metadata[key] = meta
+                self._metadata_restoring.pop(key, None)
+        if with_comments:
+            with self._lock("mentions", owner, repo):
+                complete = False
+                try:
+                    for comment_id in sorted(comments.union(range(snap.comments + 1, comment_counter + 1))):
+                        meta.scan_comment(comment_id, self._read_comment(owner, repo, comment_id))
+                    complete = True
+                finally:
+                    meta.end_comment_scan(complete=complete)
+        return True
+
+    def repos(self) -> list[tuple[str, str]]:
+        """Every (owner, repo) with issues, from the cached repo catalog."""
+        return list(self._repos())
+
+    @traced
+    def issue_numbers(self, owner: str, repo: str) -> list[int]:
+        """Every issue number in a repo, loose or packed, sorted ascending."""
+        return self._list_issue_numbers(owner, repo)
+
+    def reload_pack(self, owner: str, repo: str) -> None:
+        """Pick up a repack or tombstones written by another process.  A no-op without packs."""
+        if self._packs is not None:
+            self._packs.refresh(owner, repo)
+
+    @traced
+    def warm(self, owner: str, repo: str) -> None:
+        """Build a repo's metadata and comment index ahead of the first list that needs them."""
+        self._ensure_comments(owner, repo, self._repo_metadata(owner, repo))
+
+    # -- external changes -----------------------------------------------------
+
+    @traced
+    def refresh_paths(self, paths: Iterable[str]) -> int:
+        """Bring caches and indexes in line with storage paths changed by another writer.
+
+        *paths* are storage paths of files or directories that were written,
+        created or removed.  A changed issue or comment is re-read and its
+        metadata row updated (an issue that disappeared drops its repo's
+        metadata, since rows are never removed); a changed ``labels.json`` is
+        reloaded; a repo directory that appeared or went away refreshes the
+        repo catalog and drops the repo's metadata, as does a removed
+        ``issues/`` or ``comments/`` directory.  Every repo touched has its
+        cached results invalidated.
+        Paths outside ``repos/`` and files this store does not read (counters,
+        temporary files) are ignored.  Returns the number of documents re-read.
+        """
+        documents: set[tuple[str, str, int, int]] = set()
+        labels: set[tuple[str, str]] = set()
+        resets: set[tuple[str, str]] = set()
+        catalog = False
+        for path in paths:
+            parts = path.strip("/").split("/")
+            if parts[0] != "repos":
+                continue
+            if len(parts) <= 3:
+                # An owner or repo directory itself: the catalog may have changed,
+                # and a directory moved away produces no events for its files.
+                catalog = True
+                if len(parts) == 3:
+                    resets.add((parts[1], parts[2]))
+                else:
+                    known = set(self._generations).union(self._metadata)
+                    resets.update(key for key in known if len(parts) == 1 or key[0] == parts[1])
+                continue
+            owner, repo, section = parts[1], parts[2], parts[3]
+            if section == "labels.json" and len(parts) == 4:
+                labels.add((owner, repo))
+                continue
+            kind = {"issues": KIND_ISSUE, "comments": KIND_COMMENT}.get(section)
+            if kind is None:
+                continue
+            name = "issue.json" if kind == KIND_ISSUE else "comment.json"
+            depth = _bucket_depth(self._layout, parts[4]) if len(parts) > 4 else 0
+            if len(parts) < 5 + depth:
+                # The issues/comments dir or a bucket dir.  The files of a new
+                # one are reported on their own; one that went away is not.
+                if not self._storage.exists("/".join(parts)):
+                    resets.add((owner, repo))
+            elif len(parts) == 5 + depth and parts[-1].isdigit():
+                documents.add((owner, repo, kind, int(parts[-1])))
+            elif len(parts) == 6 + depth and parts[-1] == name and parts[-2].isdigit():
+                documents.add((owner, repo, kind, int(parts[-2])))
+        if catalog:
+            self._catalog_generation = next(self._generation_seq)
+        for owner, repo in resets:
+            self._forget_metadata(owner, repo)
+            labels.add((owner, repo))
+        for owner, repo, kind, doc_id in sorted(documents):
+            if (owner, repo) not in resets:
+                self._refresh_document(owner, repo, kind, doc_id)
+        for owner, repo in labels:
+            self._reload_labels(owner, repo)
+        for owner, repo in resets.union(labels, ((owner, repo) for owner, repo, _, _ in documents)):
+            self._bump_generation(owner, repo)
+        return len(documents)
+
+    @traced
+    def refresh_all(self) -> None:
+        """Drop every cache and index, as after changes too many to follow (e.g. a watcher overflow)."""
+        self._catalog_generation = next(self._generation_seq)
+        repos = set(self._generations).union(self._metadata, self._label_registries, self._repos())
+        for owner, repo in repos:
+            self._forget_metadata(owner, repo)
+            self._reload_labels(owner, repo)
+            self._bump_generation(owner, repo)
+
+    def _refresh_document(self, owner: str, repo: str, kind: int, doc_id: int) -> None:
+        """Re-read one externally changed document and update its metadata row."""
+        path = self._doc_path(owner, repo, kind, doc_id)
+        with self._doc_lock(owner, repo, kind, doc_id):
+            try:
+                data: bytes | None = self._storage.read(path)
+            except StorageNotFoundError:
+                data = None
+            if self._packs is not None:
+                packed = self._packs.get(owner, repo, kind, doc_id)
+                if data is None:
+                    data = packed  # deleted, or just folded into a pack
+                elif packed is not None and packed != data:
+                    self._unpacked(owner, repo, kind, doc_id)  # the loose file is newer
+            self._journal(owner, repo, kind, doc_id)
+            meta = self._metadata.get((owner, repo)) or self._metadata_restoring.get((owner, repo))
+            if kind == KIND_ISSUE:
+                if data is not None:
+                    self._index_issue(owner, repo, parse_json(data))
+                elif meta is not None and meta.has_issue(doc_id):
+                    self._forget_metadata(owner, repo)
+            elif data is not None:
+                self._index_comment(owner, repo, doc_id, parse_json(data))
+            elif meta is not None and meta.has_comment(doc_id):
+                self._index_comment(owner, repo, doc_id, None)
+
+    def _forget_metadata(self, owner: str, repo: str) -> None:
+        """Drop a repo's metadata so the next use rebuilds it from storage."""
+        with self._metadata_guard:
+            self._metadata.pop((owner, repo), None)
+
+    def _reload_labels(self, owner: str, repo: str) -> None:
+        """Re-read a loaded label registry if its file no longer matches it."""
+        key = (owner, repo)
+        with self._label_lock(owner, repo):
+            registry = self._label_registries.get(key)
+            if registry is None:
+                return
+            try:
+                data: bytes | None = self._storage.read(self._labels_path(owner, repo))
+            except StorageNotFoundError:
+                data = None
+            if data == registry.to_json():
+                return
+            reloaded = self._load_labels(owner, repo, data)
+            # A version step makes ``_refresh_labels`` re-render labels written meanwhile.
+            reloaded.version = registry.version + 1
+            self._label_registries[key] = reloaded
+
+    def _select_slots(
+        self,
+        owner: str,
+        repo: str,
+        meta: RepoMetadata,
+        where: MetadataFilter,
+        since: str | None,
+        loaded: dict[tuple[str, str, int], dict[str, Any]],
+    ) -> list[int]:
+        """Slots of a repo's issues passing *where* and ``since``, ascending."""
+        if where.mentioned:
+            if meta.excludes(where):
+                return []
+            self._ensure_comments(owner, repo, meta)
+        slots = meta.select(where)
+        if since and where.updated == (None, None):
+            # Not a timestamp we can compare as epoch seconds; fall back to
+            # comparing the stored strings, as the list filter always has.
+            refs = [(owner, repo, slot + 1) for slot in slots]
+            slots = [
+                issue["number"] - 1
+                for issue in self._read_issue_refs(refs, loaded)
+                if issue.get("updated_at", "") >= since
+            ]
+        return slots
+
+    def _first_slots(
+        self,
+        owner: str,
+        repo: str,
+        meta: RepoMetadata,
+        where: MetadataFilter,
+        since: str | None,
+        field: str,
+        descending: bool,
+        limit: int,
+        loaded: dict[tuple[str, str, int], dict[str, Any]],
+    ) -> tuple[list[int], bool]:
+        """At least the first *limit* matching slots in list order, and whether that is all of them.
+
+        Small pages of broad filters walk the repo's sort index and stop
+        after *limit* matches; otherwise every match is selected and sorted.
+        """
+        if not (since and where.updated == (None, None)):
+            if where.mentioned:
+                if meta.excludes(where):
+                    return [], True
+                self._ensure_comments(owner, repo, meta)
+            slots = meta.first(where, field, descending, limit)
+            if slots is not None:
+                return slots, len(slots) < limit
+        slots = self._select_slots(owner, repo, meta, where, since, loaded)
+        return meta.sort(slots, field, descending), True
 
     def _list_repos(self) -> list[tuple[str, str]]:
         """Return all (owner, repo) pairs that have issues."""
@@ -153,55 +990,140 @@ class IssueStore:
 
     def _list_issue_numbers(self, owner: str, repo: str) -> list[int]:
         """Return all issue numbers for a repo, sorted ascending."""
-        try:
-            entries = self._storage.list(f"repos/{owner}/{repo}/issues/")
-        except StorageNotFoundError:
-            return []
-        numbers: list[int] = []
-        for entry in entries:
-            name = entry.rstrip("/")
-            if name.isdigit():
-                numbers.append(int(name))
-        numbers.sort()
-        return numbers
+        return self._with_packed_ids(owner, repo, KIND_ISSUE, self._list_ids(f"repos/{owner}/{repo}/issues/"))
 
     def _next_comment_id(self, owner: str, repo: str) -> int:
         path = self._comment_counter_path(owner, repo)
-        current = 0
-        if self._storage.exists(path):
-            current = int(self._storage.read(path).decode().strip())
-        next_id = current + 1
-        self._storage.write(path, str(next_id).encode())
+        with self._repo_lock(owner, repo):
+            current = 0
+            if self._storage.exists(path):
+                current = int(self._storage.read(path).decode().strip())
+            next_id = current + 1
+            self._storage.write(path, str(next_id).encode())
         return next_id
 
     def _read_comment(self, owner: str, repo: str, comment_id: int) -> dict[str, Any] | None:
-        path = self._comment_path(owner, repo, comment_id)
-        try:
-            data = self._storage.read(path)
-        except StorageNotFoundError:
-            return None
-        return json.loads(data)
+        data = self._read_raw(owner, repo, KIND_COMMENT, comment_id)
+        return parse_json(data) if data is not None else None
 
     def _write_comment(self, owner: str, repo: str, comment_id: int, comment: dict[str, Any]) -> None:
         path = self._comment_path(owner, repo, comment_id)
+        self._journal(owner, repo, KIND_COMMENT, comment_id)
         self._storage.write(path, json.dumps(comment, ensure_ascii=False).encode())
+        self._unpacked(owner, repo, KIND_COMMENT, comment_id)
+        self._index_comment(owner, repo, comment_id, comment)
+        self._bump_generation(owner, repo)
 
     def _list_comment_ids(self, owner: str, repo: str) -> list[int]:
         """Return all comment IDs for a repo, sorted ascending."""
-        try:
-            entries = self._storage.list(f"repos/{owner}/{repo}/comments/")
-        except StorageNotFoundError:
-            return []
-        ids: list[int] = []
-        for entry in entries:
-            name = entry.rstrip("/")
-            if name.isdigit():
-                ids.append(int(name))
-        ids.sort()
-        return ids
+        return self._with_packed_ids(owner, repo, KIND_COMMENT, self._list_ids(f"repos/{owner}/{repo}/comments/"))
+
+    # -- labels -------------------------------------------------------------
+
+    def _repo_labels(self, owner: str, repo: str) -> RepoLabels:
+        """A repo's label registry.  Callers must hold the label lock.
+
+        A repo without a registry file gets one seeded from the labels already
+        on its issues (found through the metadata), so existing data keeps
+        working; those issues pick up the registry ids on their next write.
+        """
+        key = (owner, repo)
+        registry = self._label_registries.get(key)
+        if registry is None:
+            registry = self._label_registries[key] = self._load_labels(owner, repo)
+        return registry
+
+    def _load_labels(self, owner: str, repo: str, data: bytes | None = None) -> RepoLabels:
+        """Read (or seed) a repo's label registry; *data* is the file's content if already read."""
+        path = self._labels_path(owner, repo)
+        if data is None and self._storage.exists(path):
+            data = self._storage.read(path)
+        if data is not None:
+            return RepoLabels.from_json(data)
+        registry = RepoLabels()
+        meta = self._repo_metadata(owner, repo)
+        for name in meta.label_names.names:
+            if registry.get(name) is None and meta.label_slots(name):
+                registry.add(name)
+        if len(registry):
+            self._storage.write(path, registry.to_json())
+        return registry
+
+    def _resolve_labels(
+        self, owner: str, repo: str, names: Iterable[str], base_url: str
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Label objects for *names*, registering unknown ones (as GitHub does on issue writes).
+
+        Returns the objects and the registry version they were rendered at,
+        for ``_refresh_labels``.
+        """
+        with self._label_lock(owner, repo):
+            registry = self._repo_labels(owner, repo)
+            entries: dict[int, dict[str, Any]] = {}
+            added = False
+            for name in names:
+                entry = registry.get(name)
+                if entry is None:
+                    entry = registry.add(name)
+                    added = True
+                entries.setdefault(entry["id"], entry)
+            if added:
+                self._storage.write(self._labels_path(owner, repo), registry.to_json())
+            return [render_label(entry, base_url, owner, repo) for entry in entries.values()], registry.version
+
+    def _refresh_labels(
+        self, owner: str, repo: str, number: int, issue: dict[str, Any], issue_version: int, version: int, base_url: str
+    ) -> int:
+        """Re-render labels written at registry *version* if a label has changed since.
+
+        Called with the issue lock held, right after the write of *issue_version*;
+        returns the issue's version afterwards.  A rename or
+        delete that raced with this write may have picked its affected issues
+        before the write was indexed; re-checking the version after the write
+        closes that gap without taking the label lock inside the issue lock.
+        """
+        registry = self._label_registries[(owner, repo)]
+        while registry.version != version:
+            version = registry.version
+            entries = [registry.by_id(label["id"]) for label in issue["labels"]]
+            labels = [render_label(entry, base_url, owner, repo) for entry in entries if entry is not None]
+            if labels != issue["labels"]:
+                issue["labels"] = labels
+                issue_version = self._write_issue(owner, repo, number, issue, issue_version)
+        return issue_version
+
+    def _relabel(self, owner: str, repo: str, old_name: str, label: dict[str, Any] | None, base_url: str) -> int:
+        """Replace (or, with None, remove) *old_name* on the issues carrying it.
+
+        Callers hold the label lock.  The metadata's per-label bitmaps are the
+        reverse index, so only affected issues are read and rewritten.
+        Returns the number of issues rewritten.
+        """
+        folded = old_name.lower()
+        rewritten = 0
+        for slot in self._repo_metadata(owner, repo).label_slots(old_name):
+            with self._issue_lock(owner, repo, slot + 1):
+                found = self._read_issue_versioned(owner, repo, slot + 1)
+                if found is None:
+                    continue
+                issue, version = found
+                labels: list[dict[str, Any]] = []
+                for existing in issue.get("labels") or []:
+                    if existing.get("name", "").lower() != folded:
+                        labels.append(existing)
+                    elif label is not None:
+                        rendered = render_label(label, base_url, owner, repo)
+                        if rendered not in labels:
+                            labels.append(rendered)
+                if labels != issue.get("labels"):
+                    issue["labels"] = labels
+                    self._write_issue(owner, repo, slot + 1, issue, version)
+                    rewritten += 1
+        return rewritten
 
     # -- public API ---------------------------------------------------------
 
+    @traced
     def create(
         self,
         owner: str,
@@ -212,30 +1134,25 @@ class IssueStore:
         assignee: str | None,
         assignees: list[str] | None,
         base_url: str,
-    ) -> dict[str, Any]:
-        """Create an issue and return the full issue dict."""
+    ) -> tuple[dict[str, Any], int]:
+        """Create an issue.  Returns the full issue dict and its version."""
         number = self._next_number(owner, repo)
         now = _now_iso()
 
         urls = _issue_urls(base_url, owner, repo, number)
-        user = {
-            **DEFAULT_USER,
-            "url": f"{base_url}/users/local-user",
-            "html_url": f"{base_url}/users/local-user",
-        }
+        user = self._users.user(LOCAL_LOGIN, base_url)
 
-        # Build label objects.
         label_objects: list[dict[str, Any]] = []
+        label_version = 0
         if labels:
-            for i, name in enumerate(labels):
-                label_objects.append(_make_label(name, number * 100 + i, base_url, owner, repo))
+            label_objects, label_version = self._resolve_labels(owner, repo, labels, base_url)
 
         # Build assignee objects.
         assignee_objects: list[dict[str, Any]] = []
         if assignees:
-            assignee_objects = [_make_user(a, base_url) for a in assignees]
+            assignee_objects = [self._users.user(a, base_url) for a in assignees]
         elif assignee:
-            assignee_objects = [_make_user(assignee, base_url)]
+            assignee_objects = [self._users.user(assignee, base_url)]
 
         issue: dict[str, Any] = {
             "id": number,
@@ -261,13 +1178,23 @@ class IssueStore:
             "author_association": "OWNER",
         }
 
-        self._write_issue(owner, repo, number, issue)
-        return issue
+        with self._issue_lock(owner, repo, number):
+            version = self._write_issue(owner, repo, number, issue, 0)
+            if label_objects:
+                version = self._refresh_labels(owner, repo, number, issue, version, label_version, base_url)
+        return issue, version
 
+    @traced
     def get(self, owner: str, repo: str, number: int) -> dict[str, Any] | None:
         """Get a single issue, or None if not found."""
         return self._read_issue(owner, repo, number)
 
+    @traced
+    def get_versioned(self, owner: str, repo: str, number: int) -> tuple[dict[str, Any], int] | None:
+        """``get``, with the issue's version (the ETag), or None if not found."""
+        return self._read_issue_versioned(owner, repo, number)
+
+    @traced
     def update(
         self,
         owner: str,
@@ -275,15 +1202,46 @@ class IssueStore:
         number: int,
         changes: dict[str, Any],
         base_url: str,
-    ) -> dict[str, Any] | None:
-        """Update an issue from a dict of changed fields.
+        if_match: Collection[int] | None = None,
+    ) -> tuple[dict[str, Any], int] | None:
+        """Update an issue from a dict of changed fields.  Returns the issue and its new version.
 
         ``changes`` should contain only the keys that were explicitly provided
         in the PATCH request body.  Keys not present are left untouched.
+
+        When ``if_match`` is given, the update only applies if the stored
+        version is one of those values; otherwise ``VersionConflictError`` is
+        raised and nothing is written.
+        """
+        # Resolved before taking the issue lock: the label lock is never taken inside it.
+        label_objects: list[dict[str, Any]] = []
+        label_version = 0
+        if changes.get("labels"):
+            label_objects, label_version = self._resolve_labels(owner, repo, changes["labels"], base_url)
+        with self._issue_lock(owner, repo, number):
+            found = self._read_issue_versioned(owner, repo, number)
+            if found is None:
+                return None
+            issue, version = found
+            if if_match is not None and version not in if_match:
+                raise VersionConflictError(version)
+            self._apply_changes(issue, changes, base_url, label_objects)
+            version = self._write_issue(owner, repo, number, issue, version)
+            if label_objects:
+                version = self._refresh_labels(owner, repo, number, issue, version, label_version, base_url)
+        return issue, version
+
+    def _apply_changes(
+        self,
+        issue: dict[str, Any],
+        changes: dict[str, Any],
+        base_url: str,
+        label_objects: list[dict[str, Any]],
+    ) -> None:
+        """Apply a PATCH ``changes`` dict to *issue* in place.
+
+        ``label_objects`` are the already-resolved objects for ``changes["labels"]``.
         """
-        issue = self._read_issue(owner, repo, number)
-        if issue is None:
-            return None
 
         if "title" in changes and changes["title"] is not None:
             issue["title"] = str(changes["title"])
@@ -313,13 +1271,7 @@ class IssueStore:
             issue["state_reason"] = changes["state_reason"]
 
         if "labels" in changes:
-            raw_labels = changes["labels"]
-            if raw_labels is None:
-                issue["labels"] = []
-            else:
-                issue["labels"] = [
-                    _make_label(name, number * 100 + i, base_url, owner, repo) for i, name in enumerate(raw_labels)
-                ]
+            issue["labels"] = label_objects
 
         if "assignees" in changes:
             raw = changes["assignees"]
@@ -327,7 +1279,7 @@ class IssueStore:
                 issue["assignees"] = []
                 issue["assignee"] = None
             else:
-                issue["assignees"] = [_make_user(a, base_url) for a in raw]
+                issue["assignees"] = [self._users.user(a, base_url) for a in raw]
                 issue["assignee"] = issue["assignees"][0] if issue["assignees"] else None
         elif "assignee" in changes:
             raw = changes["assignee"]
@@ -335,14 +1287,14 @@ class IssueStore:
                 issue["assignees"] = []
                 issue["assignee"] = None
             else:
-                user_obj = _make_user(raw, base_url)
+                user_obj = self._users.user(raw, base_url)
                 issue["assignee"] = user_obj
                 issue["assignees"] = [user_obj]
 
         issue["updated_at"] = _now_iso()
-        self._write_issue(owner, repo, number, issue)
-        return issue
 
+    @traced
+    @coalesced
     def list_for_repo(
         self,
         owner: str,
@@ -353,48 +1305,45 @@ class IssueStore:
         direction: str = "desc",
         labels: str | None = None,
         since: str | None = None,
+        assignee: str | None = None,
+        creator: str | None = None,
+        mentioned: str | None = None,
+        milestone: str | None = None,
         per_page: int = 30,
         page: int = 1,
     ) -> list[dict[str, Any]]:
-        """List issues for a specific repo with filtering, sorting, pagination."""
-        numbers = self._list_issue_numbers(owner, repo)
-        issues: list[dict[str, Any]] = []
-        for num in numbers:
-            issue = self._read_issue(owner, repo, num)
-            if issue is None:
-                continue
-            # State filter.
-            if state != "all" and issue.get("state") != state:
-                continue
-            # Labels filter (comma-separated label names, all must match).
-            if labels:
-                required = {lbl_name.strip() for lbl_name in labels.split(",")}
-                issue_labels = {
-                    lbl.get("name", "") if isinstance(lbl, dict) else str(lbl) for lbl in issue.get("labels", [])
-                }
-                if not required.issubset(issue_labels):
-                    continue
-            # Since filter.
-            if since and issue.get("updated_at", "") < since:
-                continue
-            issues.append(issue)
-
-        # Sort.
-        sort_key = sort if sort in ("created", "updated", "comments") else "created"
-        key_map = {
-            "created": "created_at",
-            "updated": "updated_at",
-            "comments": "comments",
-        }
-        issues.sort(
-            key=lambda i: i.get(key_map[sort_key], ""),
-            reverse=(direction == "desc"),
-        )
+        """List issues for a specific repo with filtering, sorting, pagination.
 
-        # Paginate.
+        The cache holds the sorted issue numbers, or just a prefix of them
+        when the page was answered from the sort index; a later page past
+        the prefix recomputes a longer one.
+        """
+        people = (assignee, creator, mentioned, milestone)
+        key = ("repo_issues", owner, repo, state, sort, direction, labels, since, people)
+        validator = self._generation(owner, repo)
         start = (page - 1) * per_page
-        return issues[start : start + per_page]
+        need = start + per_page
+
+        cached = self._query_cache.get(key, validator)
+        if cached is not None:
+            numbers, complete = cached
+            if complete or need <= len(numbers):
+                return self._read_issues(owner, repo, numbers[start:need])
+
+        loaded: dict[tuple[str, str, int], dict[str, Any]] = {}
+        meta = self._repo_metadata(owner, repo, loaded)
+        where = _list_filter(
+            state, labels, since, assignee=assignee, creator=creator, mentioned=mentioned, milestone=milestone
+        )
+        slots, complete = self._first_slots(
+            owner, repo, meta, where, since, _sort_field(sort), direction == "desc", need, loaded
+        )
+        numbers = array("q", [slot + 1 for slot in slots])
+        self._query_cache.put(key, validator, (numbers, complete))
+        return self._read_issue_refs([(owner, repo, num) for num in numbers[start:need]], loaded)
 
+    @traced
+    @coalesced
     def list_all(
         self,
         *,
@@ -403,41 +1352,31 @@ class IssueStore:
         direction: str = "desc",
         labels: str | None = None,
         since: str | None = None,
+        assignee: str | None = None,
+        creator: str | None = None,
+        mentioned: str | None = None,
+        milestone: str | None = None,
         per_page: int = 30,
         page: int = 1,
     ) -> list[dict[str, Any]]:
         """List issues across all repos."""
-        all_issues: list[dict[str, Any]] = []
-        for owner, repo in self._list_repos():
-            all_issues.extend(
-                self.list_for_repo(
-                    owner,
-                    repo,
-                    state=state,
-                    sort=sort,
-                    direction=direction,
-                    labels=labels,
-                    since=since,
-                    per_page=999_999,
-                    page=1,
-                )
-            )
-
-        # Re-sort the combined list.
-        sort_key = sort if sort in ("created", "updated", "comments") else "created"
-        key_map = {
-            "created": "created_at",
-            "updated": "updated_at",
-            "comments": "comments",
-        }
-        all_issues.sort(
-            key=lambda i: i.get(key_map[sort_key], ""),
-            reverse=(direction == "desc"),
+        catalog_generation = self._catalog_generation
+        return self._list_across(
+            ("all_issues", state, sort, direction, labels, since, (assignee, creator, mentioned, milestone)),
+            self._repos(),
+            catalog_generation,
+            where=_list_filter(
+                state, labels, since, assignee=assignee, creator=creator, mentioned=mentioned, milestone=milestone
+            ),
+            since=since,
+            sort=sort,
+            direction=direction,
+            per_page=per_page,
+            page=page,
         )
 
-        start = (page - 1) * per_page
-        return all_issues[start : start + per_page]
-
+    @traced
+    @coalesced
     def list_for_org(
         self,
         org: str,
@@ -447,42 +1386,86 @@ class IssueStore:
         direction: str = "desc",
         labels: str | None = None,
         since: str | None = None,
+        assignee: str | None = None,
+        creator: str | None = None,
+        mentioned: str | None = None,
+        milestone: str | None = None,
         per_page: int = 30,
         page: int = 1,
     ) -> list[dict[str, Any]]:
         """List issues for repos owned by a given org."""
-        all_issues: list[dict[str, Any]] = []
-        for owner, repo in self._list_repos():
-            if owner != org:
-                continue
-            all_issues.extend(
-                self.list_for_repo(
-                    owner,
-                    repo,
-                    state=state,
-                    sort=sort,
-                    direction=direction,
-                    labels=labels,
-                    since=since,
-                    per_page=999_999,
-                    page=1,
-                )
-            )
-
-        sort_key = sort if sort in ("created", "updated", "comments") else "created"
-        key_map = {
-            "created": "created_at",
-            "updated": "updated_at",
-            "comments": "comments",
-        }
-        all_issues.sort(
-            key=lambda i: i.get(key_map[sort_key], ""),
-            reverse=(direction == "desc"),
+        catalog_generation = self._catalog_generation
+        return self._list_across(
+            ("org_issues", org, state, sort, direction, labels, since, (assignee, creator, mentioned, milestone)),
+            [(owner, repo) for owner, repo in self._repos() if owner == org],
+            catalog_generation,
+            where=_list_filter(
+                state, labels, since, assignee=assignee, creator=creator, mentioned=mentioned, milestone=milestone
+            ),
+            since=since,
+            sort=sort,
+            direction=direction,
+            per_page=per_page,
+            page=page,
         )
 
+    @traced
+    def _list_across(
+        self,
+        key: tuple[Any, ...],
+        repos: list[tuple[str, str]],
+        catalog_generation: int,
+        *,
+        where: MetadataFilter,
+        since: str | None,
+        sort: str,
+        direction: str,
+        per_page: int,
+        page: int,
+    ) -> list[dict[str, Any]]:
+        """Filter, sort and paginate issues across several repos.
+
+        A repo where *where*'s label, assignee or creator never appears is
+        ruled out by dict lookups, before its comments are indexed for a
+        ``mentioned`` filter.  A ``mentioned`` filter on its own still indexes
+        each repo's comments the first time, since a mention may be in any
+        of them.
+        Each repo contributes its first ``page * per_page`` matches in sort
+        order and those runs are merged, so an early page does not sort
+        every match in every repo.  Ties keep repo order, as a stable sort
+        of the concatenated repos would.
+        """
+        validator = self._multi_validator(repos, catalog_generation)
         start = (page - 1) * per_page
-        return all_issues[start : start + per_page]
-
+        need = start + per_page
+
+        cached = self._query_cache.get(key, validator)
+        if cached is not None:
+            refs, complete = cached
+            if complete or need <= len(refs):
+                return self._read_issue_refs(refs[start:need])
+
+        loaded: dict[tuple[str, str, int], dict[str, Any]] = {}
+        field = _sort_field(sort)
+        descending = direction == "desc"
+        runs: list[list[tuple[int, str, str, int]]] = []
+        complete = True
+        for owner, repo in repos:
+            meta = self._repo_metadata(owner, repo, loaded)
+            slots, repo_complete = self._first_slots(owner, repo, meta, where, since, field, descending, need, loaded)
+            complete = complete and repo_complete
+            runs.append(
+                [(value, owner, repo, slot + 1) for value, slot in zip(meta.values(slots, field), slots, strict=True)]
+            )
+        merged = heapq.merge(*runs, key=itemgetter(0), reverse=descending)
+        if not complete:
+            merged = itertools.islice(merged, need)
+        refs = [(owner, repo, num) for _, owner, repo, num in merged]
+        self._query_cache.put(key, validator, (refs, complete))
+        return self._read_issue_refs(refs[start:need], loaded)
+
+    @traced
+    @coalesced
     def search(
         self,
         query: str,
@@ -491,50 +1474,182 @@ class IssueStore:
         order: str = "desc",
         per_page: int = 30,
         page: int = 1,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Basic text search across all issues. Returns search-result envelope."""
-        q_lower = query.lower()
-        matches: list[dict[str, Any]] = []
-        for owner, repo in self._list_repos():
-            for num in self._list_issue_numbers(owner, repo):
-                issue = self._read_issue(owner, repo, num)
-                if issue is None:
-                    continue
-                title = (issue.get("title") or "").lower()
-                body = (issue.get("body") or "").lower()
-                if q_lower in title or q_lower in body:
-                    result = {**issue, "score": 1.0}
-                    matches.append(result)
-
-        # Sort if requested.
-        if sort == "created":
-            matches.sort(
-                key=lambda i: i.get("created_at", ""),
-                reverse=(order == "desc"),
-            )
-        elif sort == "updated":
-            matches.sort(
-                key=lambda i: i.get("updated_at", ""),
-                reverse=(order == "desc"),
-            )
-        elif sort == "comments":
-            matches.sort(
-                key=lambda i: i.get("comments", 0),
-                reverse=(order == "desc"),
-            )
+        """Basic text search across all issues. Returns search-result envelope.
 
-        total = len(matches)
+        The scan stops at the search deadline (``timeout`` seconds, capped at
+        the store's ``search_timeout``) and reports what it found so far with
+        ``incomplete_results: true``.  Like GitHub, only the first
+        ``SEARCH_RESULT_LIMIT`` results are retrievable; ``total_count`` still
+        counts every match seen.
+        """
+        catalog_generation = self._catalog_generation
+        repos = self._repos()
+        key = ("search", query, sort, order)
+        validator = self._multi_validator(repos, catalog_generation)
         start = (page - 1) * per_page
-        items = matches[start : start + per_page]
+
+        cached = self._query_cache.get(key, validator)
+        if cached is not None:
+            total, refs = cached
+            incomplete = False
+        else:
+            total, refs, incomplete = self._search_scan(repos, query, sort, order, self._search_deadline(timeout))
+            # Partial results must never be served as if they were complete.
+            if not incomplete:
+                self._query_cache.put(key, validator, (total, refs))
 
         return {
             "total_count": total,
-            "incomplete_results": False,
-            "items": items,
+            "incomplete_results": incomplete,
+            "items": [{**issue, "score": 1.0} for issue in self._read_issue_refs(refs[start : start + per_page])],
         }
 
+    def _highest_number(self, owner: str, repo: str) -> int:
+        """An upper bound on a repo's issue numbers, without listing its issues.
+
+        Read from the repo's metadata when it is loaded, else from its counter.
+        """
+        meta = self._metadata.get((owner, repo))
+        if meta is not None:
+            return len(meta.state)
+        return self._read_counter(self._counter_path(owner, repo))
+
+    def _search_deadline(self, timeout: float | None) -> float | None:
+        """Monotonic deadline for a search, or None when unbounded."""
+        limits = [t for t in (timeout, self._search_timeout) if t is not None]
+        return time.monotonic() + min(limits) if limits else None
+
+    @traced
+    def _search_scan(
+        self,
+        repos: list[tuple[str, str]],
+        query: str,
+        sort: str | None,
+        order: str,
+        deadline: float | None,
+    ) -> tuple[int, list[tuple[str, str, int]], bool]:
+        """Match *query* against every issue until *deadline*.
+
+        Returns ``(total_matches, top_refs, incomplete)`` where ``top_refs``
+        holds at most ``SEARCH_RESULT_LIMIT`` refs in the requested order.
+        """
+        field = _SORT_FIELDS.get(sort or "")
+        parsed = parse_search_query(query)
+        if parsed.qualified:
+            return self._search_metadata(repos, parsed, field, order, deadline)
+
+        q_lower = query.lower()
+        if self._search_pool is not None:
+            shards = [
+                (owner, repo, chunk, self._generation(owner, repo))
+                for owner, repo in repos
+                for chunk in range(self._highest_number(owner, repo) // SEARCH_SHARD_SIZE + 1)
+            ]
+            total, top, incomplete = self._search_pool.search(shards, q_lower, field, order, deadline)
+            return total, [(owner, repo, num) for _, owner, repo, num in top], incomplete
+
+        matches: list[tuple[Any, str, str, int]] = []
+        incomplete = False
+        for owner, repo, issue in self._iter_issues(repos):
+            if deadline is not None and time.monotonic() > deadline:
+                incomplete = True
+                break
+            title = (issue.get("title") or "").lower()
+            body = (issue.get("body") or "").lower()
+            if q_lower in title or q_lower in body:
+                sort_value = issue.get(field, 0) if field else None
+                matches.append((sort_value, owner, repo, issue["number"]))
+
+        top = select_search_top(matches, sorted_by=field, order=order)
+        return len(matches), [(owner, repo, num) for _, owner, repo, num in top], incomplete
+
+    @traced
+    def _search_metadata(
+        self,
+        repos: list[tuple[str, str]],
+        parsed: SearchQuery,
+        field: str | None,
+        order: str,
+        deadline: float | None,
+    ) -> tuple[int, list[tuple[str, str, int]], bool]:
+        """``_search_scan`` for a query with qualifiers.
+
+        The qualifiers are evaluated over each repo's metadata first, so only
+        the issues they leave are read for the free-text match (none at all
+        when there is no free text).  Runs in-process even with a search pool.
+        """
+        if parsed.repos:
+            repos = [(owner, repo) for owner, repo in repos if f"{owner}/{repo}" in parsed.repos]
+        if parsed.owners:
+            repos = [(owner, repo) for owner, repo in repos if owner in parsed.owners]
+        q_lower = parsed.text.lower()
+        matches: list[tuple[Any, str, str, int]] = []
+        incomplete = False
+        loaded: dict[tuple[str, str, int], dict[str, Any]] = {}
+        for owner, repo in repos:
+            meta = self._repo_metadata(owner, repo, loaded)
+            if parsed.where.mentioned:
+                self._ensure_comments(owner, repo, meta)
+            slots = meta.select(parsed.where)
+            sort_values = meta.values(slots, field) if field else itertools.repeat(None)
+            for slot, sort_value in zip(slots, sort_values, strict=False):
+                if deadline is not None and time.monotonic() > deadline:
+                    incomplete = True
+                    break
+                if q_lower:
+                    issue = loaded.get((owner, repo, slot + 1)) or self._read_issue(owner, repo, slot + 1)
+                    if issue is None:
+                        continue
+                    title = (issue.get("title") or "").lower()
+                    body = (issue.get("body") or "").lower()
+                    if q_lower not in title and q_lower not in body:
+                        continue
+                matches.append((sort_value, owner, repo, slot + 1))
+            if incomplete:
+                break
+
+        top = select_search_top(matches, sorted_by=field, order=order)
+        return len(matches), [(owner, repo, num) for _, owner, repo, num in top], incomplete
+
+    def _iter_issues(self, repos: Iterable[tuple[str, str]]) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """Yield ``(owner, repo, issue)`` for every issue in *repos*."""
+        for owner, repo in repos:
+            for num in self._list_issue_numbers(owner, repo):
+                issue = self._read_issue(owner, repo, num)
+                if issue is not None:
+                    yield owner, repo, issue
+
+    @traced
+    def _read_issues(self, owner: str, repo: str, numbers: Iterable[int]) -> list[dict[str, Any]]:
+        """Read a page of issues by number, skipping any that have disappeared."""
+        issues: list[dict[str, Any]] = []
+        for num in numbers:
+            issue = self._read_issue(owner, repo, num)
+            if issue is not None:
+                issues.append(issue)
+        return issues
+
+    @traced
+    def _read_issue_refs(
+        self,
+        refs: Iterable[tuple[str, str, int]],
+        loaded: dict[tuple[str, str, int], dict[str, Any]] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Read issues by ``(owner, repo, number)``, taking any already in *loaded*."""
+        issues: list[dict[str, Any]] = []
+        for ref in refs:
+            issue = loaded.get(ref) if loaded else None
+            if issue is None:
+                issue = self._read_issue(*ref)
+            if issue is not None:
+                issues.append(issue)
+        return issues
+
     # -- Comment API --------------------------------------------------------
 
+    @traced
     def create_comment(
         self,
         owner: str,
@@ -544,17 +1659,12 @@ class IssueStore:
         base_url: str,
     ) -> dict[str, Any] | None:
         """Create a comment on an issue. Returns None if the issue doesn't exist."""
-        issue = self._read_issue(owner, repo, issue_number)
-        if issue is None:
+        if not self._issue_exists(owner, repo, issue_number):
             return None
 
         comment_id = self._next_comment_id(owner, repo)
         now = _now_iso()
-        user = {
-            **DEFAULT_USER,
-            "url": f"{base_url}/users/local-user",
-            "html_url": f"{base_url}/users/local-user",
-        }
+        user = self._users.user(LOCAL_LOGIN, base_url)
 
         comment: dict[str, Any] = {
             "id": comment_id,
@@ -575,17 +1685,24 @@ class IssueStore:
 
         self._write_comment(owner, repo, comment_id, comment)
 
-        # Increment the issue's comment count.
-        issue["comments"] = issue.get("comments", 0) + 1
-        issue["updated_at"] = now
-        self._write_issue(owner, repo, issue_number, issue)
+        # Increment the issue's comment count.  Re-read under the issue lock so
+        # a concurrent update or comment on the same issue is not lost.
+        with self._issue_lock(owner, repo, issue_number):
+            found = self._read_issue_versioned(owner, repo, issue_number)
+            if found is not None:
+                issue, version = found
+                issue["comments"] = issue.get("comments", 0) + 1
+                issue["updated_at"] = now
+                self._write_issue(owner, repo, issue_number, issue, version)
 
         return comment
 
+    @traced
     def get_comment(self, owner: str, repo: str, comment_id: int) -> dict[str, Any] | None:
         """Get a single comment, or None if not found."""
         return self._read_comment(owner, repo, comment_id)
 
+    @traced
     def update_comment(
         self,
         owner: str,
@@ -595,33 +1712,46 @@ class IssueStore:
         base_url: str,
     ) -> dict[str, Any] | None:
         """Update a comment's body. Returns None if not found."""
-        comment = self._read_comment(owner, repo, comment_id)
-        if comment is None:
-            return None
+        with self._comment_lock(owner, repo, comment_id):
+            comment = self._read_comment(owner, repo, comment_id)
+            if comment is None:
+                return None
 
-        comment["body"] = body
-        comment["updated_at"] = _now_iso()
-        self._write_comment(owner, repo, comment_id, comment)
+            comment["body"] = body
+            comment["updated_at"] = _now_iso()
+            self._write_comment(owner, repo, comment_id, comment)
         return comment
 
+    @traced
     def delete_comment(self, owner: str, repo: str, comment_id: int) -> bool:
         """Delete a comment. Returns False if not found."""
-        comment = self._read_comment(owner, repo, comment_id)
-        if comment is None:
-            return False
+        with self._comment_lock(owner, repo, comment_id):
+            comment = self._read_comment(owner, repo, comment_id)
+            if comment is None:
+                return False
+            self._journal(owner, repo, KIND_COMMENT, comment_id)
+            # Tombstone any packed copy first; the loose file may not exist.
+            self._unpacked(owner, repo, KIND_COMMENT, comment_id)
+            with contextlib.suppress(StorageNotFoundError):
+                self._storage.delete(self._comment_path(owner, repo, comment_id))
+            self._index_comment(owner, repo, comment_id, None)
+            self._bump_generation(owner, repo)
 
         # Decrement the parent issue's comment count.
         issue_number = comment.get("issue_number")
         if issue_number is not None:
-            issue = self._read_issue(owner, repo, issue_number)
-            if issue is not None:
-                issue["comments"] = max(0, issue.get("comments", 0) - 1)
-                issue["updated_at"] = _now_iso()
-                self._write_issue(owner, repo, issue_number, issue)
+            with self._issue_lock(owner, repo, issue_number):
+                found = self._read_issue_versioned(owner, repo, issue_number)
+                if found is not None:
+                    issue, version = found
+                    issue["comments"] = max(0, issue.get("comments", 0) - 1)
+                    issue["updated_at"] = _now_iso()
+                    self._write_issue(owner, repo, issue_number, issue, version)
 
-        self._storage.delete(self._comment_path(owner, repo, comment_id))
         return True
 
+    @traced
+    @coalesced
     def list_comments_for_issue(
         self,
         owner: str,
@@ -633,10 +1763,25 @@ class IssueStore:
         page: int = 1,
     ) -> list[dict[str, Any]] | None:
         """List comments for a specific issue. Returns None if the issue doesn't exist."""
-        issue = self._read_issue(owner, repo, issue_number)
-        if issue is None:
+        if not self._issue_exists(owner, repo, issue_number):
             return None
 
+        key = ("issue_comments", owner, repo, issue_number, since)
+        validator = self._generation(owner, repo)
+        start = (page - 1) * per_page
+
+        ids = self._query_cache.get(key, validator)
+        if ids is not None:
+            return self._read_comments(owner, repo, ids[start : start + per_page])
+
+        if not since or iso_epoch(since):
+            loaded: dict[int, dict[str, Any]] = {}
+            meta = self._comment_index(owner, repo, loaded)
+            ids = array("q", meta.comment_ids(issue_number=issue_number, since=iso_epoch(since)))
+            self._query_cache.put(key, validator, ids)
+            return self._read_comments(owner, repo, ids[start : start + per_page], loaded)
+
+        # Not a timestamp we can compare as epoch seconds: compare the stored strings.
         comments: list[dict[str, Any]] = []
         for cid in self._list_comment_ids(owner, repo):
             comment = self._read_comment(owner, repo, cid)
@@ -651,9 +1796,11 @@ class IssueStore:
         # Comments for an issue are always sorted by created_at ascending.
         comments.sort(key=lambda c: c.get("created_at", ""))
 
-        start = (page - 1) * per_page
+        self._query_cache.put(key, validator, array("q", [comment["id"] for comment in comments]))
         return comments[start : start + per_page]
 
+    @traced
+    @coalesced
     def list_comments_for_repo(
         self,
         owner: str,
@@ -665,7 +1812,28 @@ class IssueStore:
         per_page: int = 30,
         page: int = 1,
     ) -> list[dict[str, Any]]:
-        """List all comments for a repo with sorting and pagination."""
+        """List all comments for a repo with sorting and pagination.
+
+        Answered from the repo's comment index, so ``since`` costs about the
+        number of comments changed since then and only the page is read.
+        """
+        key = ("repo_comments", owner, repo, sort, direction, since)
+        validator = self._generation(owner, repo)
+        start = (page - 1) * per_page
+        sort_field = "updated_at" if sort == "updated" else "created_at"
+
+        ids = self._query_cache.get(key, validator)
+        if ids is not None:
+            return self._read_comments(owner, repo, ids[start : start + per_page])
+
+        if not since or iso_epoch(since):
+            loaded: dict[int, dict[str, Any]] = {}
+            meta = self._comment_index(owner, repo, loaded)
+            ids = array("q", meta.comment_ids(since=iso_epoch(since), field=sort_field, descending=direction == "desc"))
+            self._query_cache.put(key, validator, ids)
+            return self._read_comments(owner, repo, ids[start : start + per_page], loaded)
+
+        # Not a timestamp we can compare as epoch seconds: compare the stored strings.
         comments: list[dict[str, Any]] = []
         for cid in self._list_comment_ids(owner, repo):
             comment = self._read_comment(owner, repo, cid)
@@ -675,33 +1843,143 @@ class IssueStore:
                 continue
             comments.append(comment)
 
-        sort_field = "updated_at" if sort == "updated" else "created_at"
         comments.sort(
             key=lambda c: c.get(sort_field, ""),
             reverse=(direction == "desc"),
         )
 
-        start = (page - 1) * per_page
+        self._query_cache.put(key, validator, array("q", [comment["id"] for comment in comments]))
         return comments[start : start + per_page]
 
+    @traced
+    def deleted_comments(self, owner: str, repo: str, since: str) -> list[dict[str, Any]] | None:
+        """Comments deleted at or after *since*, oldest first, as ``{"id", "deleted_at"}``.
+
+        Returns None if *since* is not an ISO-8601 timestamp.  Deletions are
+        only known from the time the repo's comments were first indexed.
+        """
+        epoch = iso_epoch(since)
+        if not epoch:
+            return None
+        return [
+            {"id": comment_id, "deleted_at": datetime.fromtimestamp(at, UTC).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for at, comment_id in self._comment_index(owner, repo).deleted_comments(epoch)
+        ]
+
+    def _comment_index(self, owner: str, repo: str, loaded: dict[int, dict[str, Any]] | None = None) -> RepoMetadata:
+        """A repo's metadata with its comments indexed (see ``_ensure_comments`` for *loaded*)."""
+        meta = self._repo_metadata(owner, repo)
+        self._ensure_comments(owner, repo, meta, loaded)
+        return meta
+
+    @traced
+    def _read_comments(
+        self, owner: str, repo: str, comment_ids: Iterable[int], loaded: dict[int, dict[str, Any]] | None = None
+    ) -> list[dict[str, Any]]:
+        comments: list[dict[str, Any]] = []
+        for cid in comment_ids:
+            comment = loaded.get(cid) if loaded else None
+            if comment is None:
+                comment = self._read_comment(owner, repo, cid)
+            if comment is not None:
+                comments.append(comment)
+        return comments
+
+    @traced
     def pin_comment(self, owner: str, repo: str, comment_id: int) -> dict[str, Any] | None:
         """Pin a comment. Returns None if not found."""
-        comment = self._read_comment(owner, repo, comment_id)
-        if comment is None:
-            return None
+        with self._comment_lock(owner, repo, comment_id):
+            comment = self._read_comment(owner, repo, comment_id)
+            if comment is None:
+                return None
 
-        comment["pinned"] = True
-        comment["updated_at"] = _now_iso()
-        self._write_comment(owner, repo, comment_id, comment)
+            comment["pinned"] = True
+            comment["updated_at"] = _now_iso()
+            self._write_comment(owner, repo, comment_id, comment)
         return comment
 
+    @traced
     def unpin_comment(self, owner: str, repo: str, comment_id: int) -> bool:
         """Unpin a comment. Returns False if not found."""
-        comment = self._read_comment(owner, repo, comment_id)
-        if comment is None:
-            return False
+        with self._comment_lock(owner, repo, comment_id):
+            comment = self._read_comment(owner, repo, comment_id)
+            if comment is None:
+                return False
 
-        comment["pinned"] = False
-        comment["updated_at"] = _now_iso()
-        self._write_comment(owner, repo, comment_id, comment)
+            comment["pinned"] = False
+            comment["updated_at"] = _now_iso()
+            self._write_comment(owner, repo, comment_id, comment)
+        return True
+
+    # -- labels API ---------------------------------------------------------
+
+    @traced
+    def list_labels(
+        self, owner: str, repo: str, base_url: str, *, per_page: int = 30, page: int = 1
+    ) -> list[dict[str, Any]]:
+        """A page of the repo's labels, oldest first."""
+        with self._label_lock(owner, repo):
+            entries = self._repo_labels(owner, repo).all()
+        start = (page - 1) * per_page
+        return [render_label(entry, base_url, owner, repo) for entry in entries[start : start + per_page]]
+
+    @traced
+    def get_label(self, owner: str, repo: str, name: str, base_url: str) -> dict[str, Any] | None:
+        """A label by name (case-insensitive), or None if not found."""
+        with self._label_lock(owner, repo):
+            entry = self._repo_labels(owner, repo).get(name)
+        return render_label(entry, base_url, owner, repo) if entry is not None else None
+
+    @traced
+    def create_label(
+        self, owner: str, repo: str, name: str, color: str | None, description: str | None, base_url: str
+    ) -> dict[str, Any]:
+        """Register a label.
+
+        Raises ``LabelExistsError`` if the name is taken and ``ValueError``
+        for a malformed color.
+        """
+        with self._label_lock(owner, repo):
+            registry = self._repo_labels(owner, repo)
+            entry = registry.add(name, color, description)
+            self._storage.write(self._labels_path(owner, repo), registry.to_json())
+        return render_label(entry, base_url, owner, repo)
+
+    @traced
+    def update_label(
+        self, owner: str, repo: str, name: str, changes: dict[str, Any], base_url: str
+    ) -> dict[str, Any] | None:
+        """Rename, recolor or re-describe a label, updating the issues that carry it.
+
+        ``changes`` holds the provided ``new_name`` / ``color`` /
+        ``description`` fields.  Returns None if the label does not exist;
+        raises like ``create_label``.
+        """
+        with self._label_lock(owner, repo):
+            registry = self._repo_labels(owner, repo)
+            old = registry.get(name)
+            if old is None:
+                return None
+            entry = registry.update(
+                name,
+                new_name=changes.get("new_name"),
+                color=changes.get("color"),
+                description=changes.get("description"),
+                set_description="description" in changes,
+            )
+            if entry != old:
+                self._storage.write(self._labels_path(owner, repo), registry.to_json())
+                self._relabel(owner, repo, old["name"], entry, base_url)
+        return render_label(entry, base_url, owner, repo)
+
+    @traced
+    def delete_label(self, owner: str, repo: str, name: str) -> bool:
+        """Delete a label and remove it from the issues that carry it.  Returns False if not found."""
+        with self._label_lock(owner, repo):
+            registry = self._repo_labels(owner, repo)
+            entry = registry.remove(name)
+            if entry is None:
+                return False
+            self._storage.write(self._labels_path(owner, repo), registry.to_json())
+            self._relabel(owner, repo, entry["name"], None, "")
         return True
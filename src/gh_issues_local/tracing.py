@@ -0,0 +1,318 @@
+"""Sampled span tracing exported as OTLP/JSON lines.
+
+A sampled request gets a root server span; ``IssueStore`` methods decorated
+with ``traced`` and every storage call made through ``InstrumentedStorage``
+add child spans to it through a context variable (which FastAPI carries into
+the threadpool).  When the request finishes, the whole trace is handed to a
+writer thread that appends it to the trace file as one OTLP
+``ExportTraceServiceRequest`` JSON object per line, loadable by OTLP-aware
+viewers or an OpenTelemetry collector's file receiver; past a size cap the
+file is rotated to ``<name>.1``.  Unsampled requests pay one context-variable
+lookup per span site.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "gh-issues-local"
+DEFAULT_MAX_SPANS = 10_000
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_EXPORT_QUEUE = 1000  # traces waiting for the writer thread
+
+# OTLP span kinds.
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_span_id: str
+    kind: int
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+
+@dataclass
+class _Trace:
+    trace_id: str
+    max_spans: int
+    # perf_counter_ns is monotonic but has no epoch; this maps it to wall time.
+    epoch_offset_ns: int = field(default_factory=lambda: time.time_ns() - time.perf_counter_ns())
+    spans: list[Span] = field(default_factory=list)
+    dropped: int = 0
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+# (trace, current span) for the running request; None when not sampled.
+_active: ContextVar[tuple[_Trace, Span] | None] = ContextVar("gh_issues_local_trace", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return random.getrandbits(n_bytes * 8).to_bytes(n_bytes, "big").hex()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Span | None]:
+    """Record a child span of the current one, if the request is being traced."""
+    active = _active.get()
+    if active is None:
+        yield None
+        return
+    trace, parent = active
+    child = Span(name, _new_id(8), parent.span_id, kind, time.perf_counter_ns(), attributes=attributes)
+    token = _active.set((trace, child))
+    try:
+        yield child
+    except BaseException:
+        child.error = True
+        raise
+    finally:
+        _active.reset(token)
+        child.end_ns = time.perf_counter_ns()
+        trace.add(child)
+
+
+def record_span(name: str, start_s: float, end_s: float, *, error: bool = False, **attributes: Any) -> None:
+    """Add an already-finished child span (times from ``time.perf_counter``)."""
+    active = _active.get()
+    if active is None:
+        return
+    trace, parent = active
+    trace.add(
+        Span(
+            name,
+            _new_id(8),
+            parent.span_id,
+            SPAN_KIND_CLIENT,
+            int(start_s * 1e9),
+            int(end_s * 1e9),
+            attributes,
+            error,
+        )
+    )
+
+
+def traced(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate an ``IssueStore`` method so calls show up as ``IssueStore.<name>`` spans."""
+    name = f"IssueStore.{method.__name__}"
+
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _active.get() is None:
+            return method(*args, **kwargs)
+        with span(name):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+# -- export -------------------------------------------------------------------
+
+
+def _attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(trace: _Trace, s: Span) -> dict[str, Any]:
+    otlp: dict[str, Any] = {
+        "traceId": trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns + trace.epoch_offset_ns),
+        "endTimeUnixNano": str(s.end_ns + trace.epoch_offset_ns),
+        "attributes": [_attribute(k, v) for k, v in s.attributes.items()],
+        "status": {"code": 2} if s.error else {},
+    }
+    if s.parent_span_id:
+        otlp["parentSpanId"] = s.parent_span_id
+    return otlp
+
+
+class Tracer:
+    """Sampling decision plus the JSON-lines exporter and its writer thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        enabled: bool,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        max_spans: int = DEFAULT_MAX_SPANS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self.max_bytes = max_bytes
+        self.dropped_traces = 0  # traces that found the export queue full
+        self._queue: queue.Queue[_Trace | None] = queue.Queue(DEFAULT_EXPORT_QUEUE)
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, data_dir: Path) -> Tracer:
+        return cls(
+            Path(os.environ.get("GH_ISSUES_LOCAL_TRACE_FILE", str(data_dir / "traces.jsonl"))),
+            enabled=os.environ.get("GH_ISSUES_LOCAL_TRACING", "") not in ("", "0"),
+            sample_rate=float(os.environ.get("GH_ISSUES_LOCAL_TRACE_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)),
+            max_spans=int(os.environ.get("GH_ISSUES_LOCAL_TRACE_MAX_SPANS", DEFAULT_MAX_SPANS)),
+            max_bytes=int(os.environ.get("GH_ISSUES_LOCAL_TRACE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+
+    def start(self, traceparent: str | None) -> tuple[_Trace, Span] | None:
+        """Begin a trace if this request is sampled.
+
+        An incoming W3C ``traceparent`` with the sampled flag set is always
+        honoured and continues the caller's trace.
+        """
+        if not self.enabled:
+            return None
+        match = _TRACEPARENT.match(traceparent or "")
+        if match and int(match.group(3), 16) & 1:
+            trace_id, parent_id = match.group(1), match.group(2)
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace_id, parent_id = _new_id(16), ""
+        else:
+            return None
+        trace = _Trace(trace_id, self.max_spans)
+        return trace, Span("request", _new_id(8), parent_id, SPAN_KIND_SERVER, time.perf_counter_ns())
+
+    def export(self, trace: _Trace) -> None:
+        """Queue *trace* for the writer thread; it is dropped if the writer has fallen that far behind."""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="gh-issues-local-trace-export", daemon=True
+                    )
+                    self._writer.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped_traces += 1
+
+    def close(self) -> None:
+        """Write out the queued traces and stop the writer thread."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _write_loop(self) -> None:
+        while (trace := self._queue.get()) is not None:
+            try:
+                self._write(self._serialize(trace))
+            except OSError:
+                logger.exception("writing a trace to %s failed", self.path)
+
+    @staticmethod
+    def _serialize(trace: _Trace) -> str:
+        return json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": "gh_issues_local"},
+                                "spans": [_otlp_span(trace, s) for s in trace.spans],
+                            }
+                        ],
+                    }
+                ]
+            },
+            separators=(",", ":"),
+        )
+
+    def _write(self, line: str) -> None:
+        """Append *line* (ASCII, so its length is its size), first rotating a file that would pass ``max_bytes``."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.max_bytes > 0:
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(line) + 1 > self.max_bytes:
+                self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        with self.path.open("a") as f:
+            f.write(line + "\n")
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Open the root span for sampled requests and export the trace when done."""
+
+    async def dispatch(self, request: Request, call_next):
+        tracer: Tracer = request.app.state.tracer
+        started = tracer.start(request.headers.get("traceparent"))
+        if started is None:
+            return await call_next(request)
+
+        trace, root = started
+        token = _active.set(started)
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            _active.reset(token)
+            root.end_ns = time.perf_counter_ns()
+            route = getattr(request.scope.get("route"), "path", None) or request.url.path
+            root.name = f"{request.method} {route}"
+            root.attributes.update(
+                {
+                    "http.request.method": request.method,
+                    "http.route": route,
+                    "url.path": request.url.path,
+                    "url.query": request.url.query,
+                    "http.response.status_code": status,
+                }
+            )
+            if trace.dropped:
+                root.attributes["spans.dropped"] = trace.dropped
+            root.error = status >= 500
+            trace.spans.append(root)
+            tracer.export(trace)
+        response.headers["X-Trace-Id"] = trace.trace_id
+        return response
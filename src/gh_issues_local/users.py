@@ -0,0 +1,132 @@
+"""Stable user ids and interned user objects.
+
+A login's id is derived from a digest of the lower-cased login, so every
+process and worker assigns the same id without sharing any state (the
+previous ``hash(login)`` ids were salted per process and changed on every
+start).  Rendered simple-user objects are shared by every issue and comment
+that embeds them; callers must treat them as read-only.  They are kept per
+login and base URL in a bounded LRU, since the base URL comes from the
+request's ``Host`` header.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any
+
+DEFAULT_MAX_OBJECTS = 1024
+
+# Digest ids are 48-bit, offset past ``local-user``'s 1, so they stay well
+# inside the integers JavaScript clients represent exactly.
+_ID_BYTES = 6
+_FIRST_ID = 2
+
+# The user every write is attributed to (there is no real user system).  It
+# keeps its compact shape -- only ``url`` / ``html_url`` are filled in --
+# since it is embedded in every issue and comment.
+LOCAL_LOGIN = "local-user"
+LOCAL_USER = {
+    "login": LOCAL_LOGIN,
+    "id": 1,
+    "node_id": "U_local1",
+    "avatar_url": "",
+    "gravatar_id": "",
+    "url": "",
+    "html_url": "",
+    "followers_url": "",
+    "following_url": "",
+    "gists_url": "",
+    "starred_url": "",
+    "subscriptions_url": "",
+    "organizations_url": "",
+    "repos_url": "",
+    "events_url": "",
+    "received_events_url": "",
+    "type": "User",
+    "site_admin": False,
+}
+
+
+def render_user(login: str, user_id: int, base_url: str) -> dict[str, Any]:
+    """The API simple-user object for *login*."""
+    user_url = f"{base_url}/users/{login}"
+    if login.lower() == LOCAL_LOGIN:
+        return {**LOCAL_USER, "url": user_url, "html_url": user_url}
+    return {
+        "login": login,
+        "id": user_id,
+        "node_id": f"U_{login}",
+        "avatar_url": "",
+        "gravatar_id": "",
+        "url": user_url,
+        "html_url": user_url,
+        "followers_url": f"{user_url}/followers",
+        "following_url": f"{user_url}/following{{/other_user}}",
+        "gists_url": f"{user_url}/gists{{/gist_id}}",
+        "starred_url": f"{user_url}/starred{{/owner}}{{/repo}}",
+        "subscriptions_url": f"{user_url}/subscriptions",
+        "organizations_url": f"{user_url}/orgs",
+        "repos_url": f"{user_url}/repos",
+        "events_url": f"{user_url}/events{{/privacy}}",
+        "received_events_url": f"{user_url}/received_events",
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+class UserDirectory:
+    """Login -> stable id and shared user objects.  Thread-safe.
+
+    ``local-user`` always has id 1; other logins are matched
+    case-insensitively.  Two logins whose digests collide are told apart by
+    re-hashing the later one seen; with 48-bit digests that needs millions of
+    distinct logins to become likely.
+    """
+
+    def __init__(self, max_objects: int = DEFAULT_MAX_OBJECTS) -> None:
+        self._max_objects = max_objects
+        self._lock = threading.Lock()
+        self._ids: dict[str, int] = {LOCAL_LOGIN: 1}  # folded login -> id
+        self._claimed: dict[int, str] = {1: LOCAL_LOGIN}  # id -> folded login
+        self._objects: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()  # (login, base URL) -> object
+
+    def id(self, login: str) -> int:
+        """The stable id of *login*."""
+        folded = login.lower()
+        user_id = self._ids.get(folded)
+        if user_id is not None:
+            return user_id
+        with self._lock:
+            user_id = self._ids.get(folded)
+            if user_id is not None:
+                return user_id
+            attempt = 0
+            while True:
+                salted = folded if attempt == 0 else f"{folded}\0{attempt}"
+                digest = hashlib.blake2b(salted.encode(), digest_size=_ID_BYTES).digest()
+                user_id = int.from_bytes(digest, "big") + _FIRST_ID
+                if self._claimed.setdefault(user_id, folded) == folded:
+                    break
+                attempt += 1
+            self._ids[folded] = user_id
+        return user_id
+
+    def user(self, login: str, base_url: str) -> dict[str, Any]:
+        """The shared, read-only user object for *login* under *base_url*."""
+        key = (login, base_url)
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is not None:
+                self._objects.move_to_end(key)
+                return obj
+        obj = render_user(login, self.id(login), base_url)
+        if self._max_objects <= 0:
+            return obj
+        with self._lock:
+            obj = self._objects.setdefault(key, obj)
+            self._objects.move_to_end(key)
+            while len(self._objects) > self._max_objects:
+                self._objects.popitem(last=False)
+        return obj
@@ -0,0 +1,206 @@
+"""Startup warm-up of the list indexes, and the readiness state behind ``/api/ready``.
+
+A cold server builds a repo's metadata (and comment index) on the first list
+or search that touches it, so the first ``/issues`` or ``/search/issues``
+after a start reads the whole data set.  ``Warmup`` does that work in the
+background instead: it restores the index snapshot, if there is one, then
+builds every repo's indexes on a small thread pool and fills the totals
+counters.
+
+While it runs the server is warming and ``/api/ready`` answers 503.  With
+the ``serve`` policy requests are answered as usual (degraded: a list may
+still pay for a build); with ``wait``, list and search requests wait for the
+warm-up to finish, up to a timeout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from gh_issues_local.admission import cost_class
+
+if TYPE_CHECKING:
+    from gh_issues_local.storage import IssueStore
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("serve", "wait")
+DEFAULT_POLICY = "serve"
+DEFAULT_WORKERS = 4
+DEFAULT_WAIT_TIMEOUT = 30.0  # seconds
+
+
+class Warmup:
+    """Restores and builds the store's indexes once, tracking progress.  Thread-safe.
+
+    Phases run ``restoring`` (loading the index snapshot), ``warming``
+    (building every repo's indexes), then ``ready``.  A warm-up with nothing
+    to do is ready from the start.
+    """
+
+    def __init__(
+        self,
+        store: IssueStore,
+        *,
+        restore: bool = False,
+        warm: bool = False,
+        workers: int = DEFAULT_WORKERS,
+        policy: str = DEFAULT_POLICY,
+        wait_timeout: float = DEFAULT_WAIT_TIMEOUT,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown warm-up policy {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.store = store
+        self.restore = restore
+        self.warm = warm
+        self.workers = max(1, workers)
+        self.policy = policy
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.phase = "pending"
+        self.restored_repos = 0
+        self.total_repos = 0
+        self.warmed_repos = 0
+        self.failed_repos = 0
+        self._started: float | None = None
+        self._finished: float | None = None
+        if not restore and not warm:
+            self._finish()
+
+    @classmethod
+    def from_env(cls, store: IssueStore, *, restore: bool) -> Warmup:
+        """Configured from ``GH_ISSUES_LOCAL_WARMUP`` (``1`` enables the build) and ``GH_ISSUES_LOCAL_WARMUP_*``."""
+        return cls(
+            store,
+            restore=restore,
+            warm=os.environ.get("GH_ISSUES_LOCAL_WARMUP", "") not in ("", "0"),
+            workers=int(os.environ.get("GH_ISSUES_LOCAL_WARMUP_WORKERS", DEFAULT_WORKERS)),
+            policy=os.environ.get("GH_ISSUES_LOCAL_WARMUP_POLICY", DEFAULT_POLICY),
+            wait_timeout=float(os.environ.get("GH_ISSUES_LOCAL_WARMUP_WAIT", DEFAULT_WAIT_TIMEOUT)),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def progress(self) -> dict[str, Any]:
+        """The readiness state for ``/api/ready`` and the metrics page."""
+        started, finished = self._started, self._finished
+        elapsed = 0.0 if started is None else (finished or time.monotonic()) - started
+        return {
+            "phase": self.phase,
+            "policy": self.policy,
+            "restored_repos": self.restored_repos,
+            "warmed_repos": self.warmed_repos,
+            "failed_repos": self.failed_repos,
+            "total_repos": self.total_repos,
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+    def run(self) -> None:
+        """Restore, then warm every repo.  Blocks; the server calls it on a background thread."""
+        if self.ready:
+            return
+        self._started = time.monotonic()
+        try:
+            if self.restore:
+                self.phase = "restoring"
+                try:
+                    self.restored_repos = self.store.restore_indexes()
+                    logger.info("restored indexes of %d repos from snapshot", self.restored_repos)
+                except Exception:
+                    logger.exception("index restore failed; indexes will be built on demand")
+            if self.warm:
+                self.phase = "warming"
+                self._warm()
+        finally:
+            self._finished = time.monotonic()
+            self._finish()
+
+    def stop(self) -> None:
+        """Stop handing repos to the pool (repos already building finish)."""
+        self._stop.set()
+
+    def _warm(self) -> None:
+        repos = self.store.repos()
+        self.total_repos = len(repos)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="gh-issues-local-warmup") as pool:
+            for owner, repo in repos:
+                pool.submit(self._warm_repo, owner, repo)
+        if not self._stop.is_set():
+            self.store.totals()
+        logger.info(
+            "warmed indexes of %d/%d repos in %.1fs",
+            self.warmed_repos,
+            self.total_repos,
+            time.monotonic() - (self._started or 0.0),
+        )
+
+    def _warm_repo(self, owner: str, repo: str) -> None:
+        if self._stop.is_set():
+            return
+        try:
+            self.store.warm(owner, repo)
+        except Exception:
+            logger.exception("warming %s/%s failed; it will be built on demand", owner, repo)
+            with self._lock:
+                self.failed_repos += 1
+            return
+        with self._lock:
+            self.warmed_repos += 1
+
+    def _finish(self) -> None:
+        with self._lock:
+            self.phase = "ready"
+            self._ready.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait (without blocking the event loop) until ready; False on timeout."""
+        event = asyncio.Event()
+        with self._lock:
+            if self._ready.is_set():
+                return True
+            self._waiters.append((asyncio.get_running_loop(), event))
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            with self._lock:
+                if (entry := (asyncio.get_running_loop(), event)) in self._waiters:
+                    self._waiters.remove(entry)
+            return False
+        return True
+
+
+class WarmupMiddleware(BaseHTTPMiddleware):
+    """Under the ``wait`` policy, hold list and search requests until the warm-up is done."""
+
+    async def dispatch(self, request: Request, call_next):
+        warmup: Warmup = request.app.state.warmup
+        if warmup.ready or warmup.policy != "wait" or cost_class(request.method, request.url.path) is None:
+            return await call_next(request)
+        if not await warmup.wait(warmup.wait_timeout):
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "message": "Service Unavailable: indexes are still warming up",
+                    "documentation_url": "https://docs.github.com/rest",
+                },
+                headers={"Retry-After": str(request.app.state.admission.retry_after)},
+            )
+        return await call_next(request)
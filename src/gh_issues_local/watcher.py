@@ -0,0 +1,270 @@
+"""Follow changes made to the storage directory by other writers.
+
+``IssueStore`` caches list results, the repo catalog, label registries and
+per-repo metadata, and keeps them current by seeing every write it makes.
+Files changed behind its back -- a script dropping ``issue.json`` files, a
+restore from backup, a ``git pull`` of a data repo -- would be served stale
+until a restart.  ``StorageWatcher`` follows ``repos/`` under the storage
+root and hands the changed paths to ``IssueStore.refresh_paths``.
+
+On Linux it uses inotify through ctypes, with one watch per directory.
+Elsewhere, or once the kernel's watch limit (``fs.inotify.max_user_watches``)
+is reached, it polls the tree's modification times and sizes instead.  The
+store's own writes are seen too; re-reading them is harmless.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+from pathlib import Path
+import select
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import yaml
+
+if TYPE_CHECKING:
+    from gh_issues_local.storage import IssueStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5.0  # seconds
+_BATCH_DELAY = 0.05  # seconds to let a burst of events gather into one refresh
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+# Config file and key naming the storage directory, per storage provider.
+_PROVIDER_ROOTS = {"local": (".local_storage.yaml", "root_path"), "git": (".git_storage.yaml", "repo_path")}
+
+
+def storage_root(config_dir: Path) -> Path | None:
+    """The directory the configured storage provider keeps its files in, if it has one."""
+    try:
+        provider = (yaml.safe_load((config_dir / ".storage.yaml").read_text()) or {}).get("provider", "local")
+        config_name, key = _PROVIDER_ROOTS[provider]
+        root = (yaml.safe_load((config_dir / config_name).read_text()) or {}).get(key)
+    except (FileNotFoundError, KeyError):
+        return None
+    return (config_dir / Path(root).expanduser()).resolve() if root else None
+
+
+class _Inotify:
+    """inotify watches over ``repos/`` and everything below it.  Used by one thread."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise self._error()
+        self._dirs: dict[int, str] = {}  # watch descriptor -> directory relative to root
+        try:
+            # The root itself only matters for ``repos/`` appearing or going away.
+            self._watch(root, ".")
+            self.watch_tree("repos")
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _error(path: Path | None = None) -> OSError:
+        code = ctypes.get_errno()
+        return OSError(code, os.strerror(code), str(path) if path else None)
+
+    def _watch(self, path: Path, rel: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            if ctypes.get_errno() == errno.ENOENT:
+                return False  # removed before we got to it
+            raise self._error(path)
+        self._dirs[wd] = rel
+        return True
+
+    def watch_tree(self, rel: str) -> list[str]:
+        """Watch *rel* and every directory below it; returns the paths found there."""
+        found: list[str] = []
+        for dirpath, dirnames, filenames in os.walk(self.root / rel):
+            directory = Path(dirpath).relative_to(self.root).as_posix()
+            if self._watch(Path(dirpath), directory):
+                found.extend(f"{directory}/{name}" for name in (*dirnames, *filenames))
+        return found
+
+    def _unwatch_tree(self, rel: str) -> None:
+        for wd, directory in list(self._dirs.items()):
+            if directory == rel or directory.startswith(f"{rel}/"):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+
+    def read(self) -> tuple[set[str], bool]:
+        """Paths changed since the last call, and whether the kernel dropped events."""
+        changed: set[str] = set()
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                name = os.fsdecode(buf[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0"))
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & _IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                parent = self._dirs.get(wd)
+                if parent is None or (parent == "." and name != "repos"):
+                    continue
+                path = name if parent == "." else f"{parent}/{name}"
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # Anything written before the watch was added has no event.
+                        changed.update(self.watch_tree(path))
+                    elif mask & _IN_MOVED_FROM:
+                        self._unwatch_tree(path)
+                changed.add(path)
+        return changed, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _Poller:
+    """Finds changes under ``repos/`` by comparing modification times and sizes between scans."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._seen = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        entries: dict[str, tuple[int, int]] = {}
+        pending = ["repos"]
+        while pending:
+            directory = pending.pop()
+            try:
+                scan = os.scandir(self.root / directory)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            with scan:
+                for entry in scan:
+                    path = f"{directory}/{entry.name}"
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            entries[path] = (0, -1)  # directories only count by presence
+                            pending.append(path)
+                        else:
+                            stat = entry.stat(follow_symlinks=False)
+                            entries[path] = (stat.st_mtime_ns, stat.st_size)
+                    except FileNotFoundError:
+                        continue
+        return entries
+
+    def read(self) -> set[str]:
+        """Paths added, changed or removed since the previous scan."""
+        current = self._scan()
+        previous, self._seen = self._seen, current
+        changed = {path for path, signature in current.items() if previous.get(path) != signature}
+        changed.update(path for path in previous if path not in current)
+        return changed
+
+
+class StorageWatcher:
+    """Background thread that feeds external storage changes to ``IssueStore.refresh_paths``."""
+
+    def __init__(
+        self, store: IssueStore, root: Path, *, poll: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        self.store = store
+        self.root = root
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls, store: IssueStore, config_dir: Path) -> StorageWatcher | None:
+        """Configured from ``GH_ISSUES_LOCAL_WATCH`` (``1``, or ``poll`` to skip inotify) and ``_WATCH_INTERVAL``."""
+        mode = os.environ.get("GH_ISSUES_LOCAL_WATCH", "")
+        if mode in ("", "0"):
+            return None
+        root = storage_root(config_dir)
+        if root is None:
+            logger.warning("not watching storage: the storage provider has no local directory")
+            return None
+        interval = float(os.environ.get("GH_ISSUES_LOCAL_WATCH_INTERVAL", DEFAULT_POLL_INTERVAL))
+        return cls(store, root, poll=mode == "poll", poll_interval=interval)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="gh-issues-local-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        if not self.poll:
+            try:
+                inotify = _Inotify(self.root)
+            except (OSError, AttributeError) as exc:  # AttributeError: no inotify in this libc
+                logger.warning("inotify unavailable (%s); polling storage every %gs", exc, self.poll_interval)
+            else:
+                try:
+                    self._follow(inotify)
+                finally:
+                    inotify.close()
+                if self._stop.is_set():
+                    return
+                # Events may have been lost while the watches were incomplete.
+                self._refresh(set(), overflow=True)
+        self._poll()
+
+    def _follow(self, inotify: _Inotify) -> None:
+        while not self._stop.is_set():
+            readable, _, _ = select.select([inotify.fd], [], [], 0.5)
+            if not readable:
+                continue
+            time.sleep(_BATCH_DELAY)
+            try:
+                changed, overflow = inotify.read()
+            except OSError as exc:
+                logger.warning("inotify failed (%s); polling storage every %gs", exc, self.poll_interval)
+                return
+            self._refresh(changed, overflow=overflow)
+
+    def _poll(self) -> None:
+        poller = _Poller(self.root)
+        while not self._stop.wait(self.poll_interval):
+            changed = poller.read()
+            if changed:
+                self._refresh(changed)
+
+    def _refresh(self, changed: set[str], *, overflow: bool = False) -> None:
+        try:
+            if overflow:
+                self.store.refresh_all()
+                logger.info("storage changed faster than it could be followed; dropped all cached indexes")
+            else:
+                self.store.refresh_paths(sorted(changed))
+        except Exception:
+            logger.exception("refreshing after storage changes failed")